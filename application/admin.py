@@ -87,8 +87,20 @@ def get_admin_dashboard_data(project_root: Path = None, limit: int = 200):
         except Exception:
             annotations = []
 
+    # Upstream price fetch counters (coalesced callers etc.)
+    upstream = {}
+    try:
+        try:
+            from .services.elpriser_service import ElpriserService
+        except Exception:
+            from services.elpriser_service import ElpriserService
+        upstream = ElpriserService.upstream_stats()
+    except Exception:
+        upstream = {}
+
     return {
         'records': records,
         'annotations': annotations,
         'stats': stats,
+        'upstream': upstream,
     }
@@ -1,4 +1,6 @@
+import atexit
 import importlib
+import os
 from flask import Flask
 from pathlib import Path
 import uuid
@@ -42,9 +44,93 @@ class FlaskApp:
 
         self.app = Flask(__name__)
         config_class.init_app(self.app)
+        self._configure_upstream()
+        self._configure_database()
         self._register_error_handlers()
         self._register_blueprints()
         self._register_routes()
+        self._configure_vote_buffer()
+        self.prefetcher = None
+        self.compactor = None
+        if self.app.config.get('START_BACKGROUND_TASKS'):
+            self.start_background_tasks()
+
+    def start_background_tasks(self):
+        """Start the price prefetcher and the annotation log compactor (each unless disabled or testing)
+
+        Called by run(); a WSGI server that imports ``app`` starts them by
+        setting START_BACKGROUND_TASKS. Calling it again does nothing.
+        """
+        if self.prefetcher is None:
+            self._start_prefetch_scheduler()
+        if self.compactor is None:
+            self._start_annotation_compactor()
+
+    def _configure_upstream(self):
+        """Build the shared upstream HTTP client and set the price API URL from the app config"""
+        try:
+            from .http_client import configure
+            from .elpriser_api import ElpriserAPI
+        except ImportError:
+            from http_client import configure
+            from elpriser_api import ElpriserAPI
+        configure(self.app.config)
+        base_url = self.app.config.get('ELPRISER_API_BASE_URL')
+        if base_url:
+            ElpriserAPI.BASE_URL = base_url.rstrip('/')
+
+    def _configure_database(self):
+        """Build the DB engine from the app config and close the request's session at teardown"""
+        try:
+            from . import models
+        except ImportError:
+            try:
+                import models
+            except ImportError:
+                return  # SQLAlchemy not installed; JSON backend only
+        models.configure_engine(self.app.config)
+        self.app.teardown_appcontext(models.remove_session)
+
+    def _start_prefetch_scheduler(self):
+        """Start the background price prefetcher unless disabled or testing"""
+        if self.app.testing or not self.app.config.get('PREFETCH_ENABLED'):
+            return
+        try:
+            from .services.prefetch import PrefetchScheduler
+        except ImportError:
+            from services.prefetch import PrefetchScheduler
+        project_root = self.app.config.get('PROJECT_ROOT') or Path(__file__).resolve().parents[1]
+        self.prefetcher = PrefetchScheduler.from_config(self.app.config, project_root).start()
+        self.app.extensions['prefetch_scheduler'] = self.prefetcher
+
+    def _start_annotation_compactor(self):
+        """Start background compaction of the JSON annotation event log unless disabled or testing"""
+        if self.app.testing or not self.app.config.get('ANNOTATIONS_COMPACT_INTERVAL_SECONDS'):
+            return
+        try:
+            from .services.annotation_repository import LogCompactor
+        except ImportError:
+            from services.annotation_repository import LogCompactor
+        project_root = self.app.config.get('PROJECT_ROOT') or Path(__file__).resolve().parents[1]
+        self.compactor = LogCompactor.from_config(self.app.config, project_root).start()
+        self.app.extensions['annotation_compactor'] = self.compactor
+
+    def _configure_vote_buffer(self):
+        """Batch annotation votes if enabled; pending votes are written at interpreter exit"""
+        self.vote_buffer = None
+        if not self.app.config.get('VOTE_BUFFER_ENABLED'):
+            return
+        try:
+            from .endpoints import get_annotations_service
+        except ImportError:
+            from endpoints import get_annotations_service
+        self.vote_buffer = get_annotations_service().enable_vote_buffer(
+            interval_ms=self.app.config.get('VOTE_BUFFER_FLUSH_MS', 500),
+            max_votes=self.app.config.get('VOTE_BUFFER_MAX_VOTES', 1000),
+        )
+        if self.vote_buffer is not None:
+            atexit.register(self.vote_buffer.stop, 5)
+            self.app.extensions['vote_buffer'] = self.vote_buffer
 
     def _register_error_handlers(self):
         """Register error handlers"""
@@ -123,21 +209,28 @@ class FlaskApp:
         # Pandas route
         @self.app.route("/pandas")
         def pandas_view():
-            import pandas_test
-            graph_html = pandas_test.build_chart()
+            try:
+                from . import pandas_test
+            except ImportError:
+                import pandas_test
+            graph_html = pandas_test.build_chart(project_root=self.app.config.get('PROJECT_ROOT') or pandas_test.PROJECT_ROOT)
             from flask import render_template
             return render_template("pandas.html", graph_html=graph_html)
 
     def run(self, host='127.0.0.1', port=5000, debug=None):
         """Run the Flask application"""
         debug = debug if debug is not None else self.app.config['DEBUG']
+        # with the debug reloader only the child process serves requests
+        if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            self.start_background_tasks()
         self.app.run(host=host, port=port, debug=debug)
 
-# Create application instance
-app = FlaskApp().app
+# Create application instance; importing it starts no background threads
+flask_app = FlaskApp()
+app = flask_app.app
 
 if __name__ == '__main__':
-    FlaskApp().run()
+    flask_app.run()
 
 def set_cookie(response, key, value, days_expire=7):
     max_age = days_expire * 24 * 60 * 60
@@ -12,6 +12,11 @@ class Config:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', '0') not in ('0', 'false', 'no')
+    SQLALCHEMY_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    SQLALCHEMY_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    SQLALCHEMY_POOL_RECYCLE = -1
 
     # Application settings
     PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -21,9 +26,40 @@ class Config:
     COOKIE_USER_ID_DAYS = 365
 
     # API settings
-    ELPRISER_API_BASE_URL = "https://www.elprisetjustnu.se/api/v1/prices"
+    # Point at tools/fake_elpriser_server.py for offline benchmarks/load tests
+    ELPRISER_API_BASE_URL = os.environ.get('ELPRISER_API_BASE_URL') or "https://www.elprisetjustnu.se/api/v1/prices"
     ALLOWED_PRISKLASSER = ['SE1', 'SE2', 'SE3', 'SE4']
 
+    # Upstream HTTP client settings (see application/http_client.py)
+    UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+    UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 10))
+    UPSTREAM_MAX_RETRIES = int(os.environ.get('UPSTREAM_MAX_RETRIES', 3))
+    UPSTREAM_BACKOFF_BASE = 0.25
+    UPSTREAM_BACKOFF_MAX = 4.0
+    UPSTREAM_MAX_CONCURRENCY = int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', 8))
+    UPSTREAM_POOL_SIZE = 10
+    UPSTREAM_BREAKER_THRESHOLD = 5  # consecutive failures before a host's circuit opens
+    UPSTREAM_BREAKER_RESET_SECONDS = 30
+
+    # Start the prefetcher and the annotation log compactor when the app is built, not
+    # only from FlaskApp.run(); set it for WSGI servers that import application.app:app
+    START_BACKGROUND_TASKS = os.environ.get('START_BACKGROUND_TASKS', '0') not in ('0', 'false', 'no')
+
+    # Background prefetch of today's/tomorrow's prices (see services/prefetch.py)
+    PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', '1') not in ('0', 'false', 'no')
+    PREFETCH_PUBLISH_HOUR = 13  # next-day prices are published around 13:00 local time
+    PREFETCH_INTERVAL_SECONDS = 600
+    PREFETCH_INITIAL_DELAY = 5
+
+    # Folding the JSON annotation event log into annotations.json (see services/annotation_repository.py)
+    ANNOTATIONS_COMPACT_INTERVAL_SECONDS = int(os.environ.get('ANNOTATIONS_COMPACT_INTERVAL_SECONDS', 300))
+    ANNOTATIONS_COMPACT_MIN_EVENTS = 500
+
+    # Buffer annotation votes in memory and write them in batches (DB backend only, see services/vote_buffer.py)
+    VOTE_BUFFER_ENABLED = os.environ.get('VOTE_BUFFER_ENABLED', '0') not in ('0', 'false', 'no')
+    VOTE_BUFFER_FLUSH_MS = int(os.environ.get('VOTE_BUFFER_FLUSH_MS', 500))
+    VOTE_BUFFER_MAX_VOTES = 1000
+
     @classmethod
     def init_app(cls, app):
         """Initialize application with configuration"""
@@ -47,8 +83,11 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # shared cache: every thread's connection sees the same in-memory database
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///file:annotations_test?mode=memory&cache=shared&uri=true'
     WTF_CSRF_ENABLED = False
+    PREFETCH_ENABLED = False
+    ANNOTATIONS_COMPACT_INTERVAL_SECONDS = 0
 
 
 class ProductionConfig(Config):
@@ -1,9 +1,38 @@
+import logging
 import requests
+import threading
+import time
 from datetime import datetime
 
+try:
+    from .http_client import get_client, CircuitOpenError, UpstreamBusy
+except ImportError:
+    from http_client import get_client, CircuitOpenError, UpstreamBusy
+
+logger = logging.getLogger(__name__)
+
+
+class PricesUnavailable(Exception):
+    """Priser kunde inte hämtas (uppströms API nere eller kretsbrytaren öppen)."""
+    status = 503
+
+
+class PricesNotPublished(PricesUnavailable):
+    """Priser för datumet/prisområdet finns inte (ännu) hos API:t."""
+    status = 422
+
+
 class ElpriserAPI:
     BASE_URL = "https://www.elprisetjustnu.se/api/v1/prices"
 
+    # Negativ cache: misslyckade URL:er svarar direkt under en kort tid
+    NEGATIVE_TTL_NOT_PUBLISHED = 60
+    NEGATIVE_TTL_ERROR = 15
+    # utgångna poster rensas vid varje insättning; de äldsta släpps över taket
+    NEGATIVE_MAX_ENTRIES = 1024
+    _negative = {}
+    _negative_lock = threading.Lock()
+
     def __init__(self, year=None, month=None, day=None, prisklass="SE3"):
         """
         Initialiserar API-klassen med datum och prisområde.
@@ -29,21 +58,76 @@ class ElpriserAPI:
         self.prisklass = prisklass.upper()
         if self.prisklass not in ["SE1", "SE2", "SE3", "SE4"]:
             raise ValueError("Ogiltig prisklass. Välj SE1, SE2, SE3 eller SE4.")
+        # satt av fetch_prices() när hämtningen misslyckas
+        self.error = None
 
     def get_url(self):
         """Bygger URL för API-anrop"""
         return f"{self.BASE_URL}/{self.year}/{self.month}-{self.day}_{self.prisklass}.json"
 
     def fetch_prices(self):
-        """Hämtar elpriser från API och returnerar som JSON"""
+        """Hämtar elpriser från API och returnerar som JSON.
+
+        Vid fel returneras None och self.error sätts till PricesNotPublished
+        (404) eller PricesUnavailable. Felet minns i en kort negativ cache så
+        att upprepade anrop svarar direkt utan att belasta API:t.
+        """
         url = self.get_url()
+        self.error = self.negative_lookup(url)
+        if self.error is not None:
+            return None
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # ger ett fel om status != 200
-            return response.json()
+            # delad klient: keep-alive, timeouts, retry med backoff och kretsbrytare
+            return get_client().get_json(url)  # ger ett fel om status != 200
+        except CircuitOpenError as e:
+            # kretsbrytaren svarar redan snabbt; ingen negativ cache behövs
+            self.error = PricesUnavailable(f"Elpris-API:t är inte tillgängligt just nu: {e}")
+        except UpstreamBusy as e:
+            # vår egen samtidighetsgräns, inte ett fel hos API:t; ingen negativ cache
+            self.error = PricesUnavailable(f"För många samtidiga hämtningar just nu: {e}")
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status == 404:
+                self.error = PricesNotPublished(f"Inga elpriser publicerade för {self.year}-{self.month}-{self.day} {self.prisklass}")
+                self._remember_failure(url, self.error, self.NEGATIVE_TTL_NOT_PUBLISHED)
+            else:
+                self.error = PricesUnavailable(f"Elpris-API:t svarade med status {status}")
+                self._remember_failure(url, self.error, self.NEGATIVE_TTL_ERROR)
         except requests.RequestException as e:
-            print(f"Fel vid hämtning av data: {e}")
-            return None
+            self.error = PricesUnavailable(f"Elpris-API:t kunde inte nås: {e}")
+            self._remember_failure(url, self.error, self.NEGATIVE_TTL_ERROR)
+        logger.warning('Fel vid hämtning av data: %s', self.error)
+        return None
+
+    @classmethod
+    def _remember_failure(cls, url, error, ttl):
+        now = time.monotonic()
+        with cls._negative_lock:
+            for key in [k for k, (expires, _) in cls._negative.items() if expires <= now]:
+                del cls._negative[key]
+            cls._negative.pop(url, None)
+            while len(cls._negative) >= cls.NEGATIVE_MAX_ENTRIES:
+                del cls._negative[next(iter(cls._negative))]
+            cls._negative[url] = (now + ttl, error)
+
+    @classmethod
+    def negative_lookup(cls, url):
+        """Returnerar det cachade felet för url, eller None om inget giltigt finns."""
+        with cls._negative_lock:
+            hit = cls._negative.get(url)
+            if hit is None:
+                return None
+            expires, error = hit
+            if time.monotonic() >= expires:
+                del cls._negative[url]
+                return None
+            return error
+
+    @classmethod
+    def negative_cache_size(cls):
+        now = time.monotonic()
+        with cls._negative_lock:
+            return sum(1 for expires, _ in cls._negative.values() if expires > now)
 
 # --- Exempel på användning ---
 if __name__ == "__main__":
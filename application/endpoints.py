@@ -1,8 +1,13 @@
-from flask import request, Blueprint, jsonify, render_template, current_app, abort, make_response, redirect, url_for
+from flask import request, Blueprint, jsonify, render_template, current_app, abort, make_response, redirect, url_for, Response, stream_with_context
 from flask.views import MethodView 
 from pathlib import Path
+import base64
+import binascii
+import csv
+import io
 import json
 import uuid
+import zlib
 from functools import wraps 
 # admin helper
 try:
@@ -21,22 +26,22 @@ except Exception:
 
 try:
     # prefer package-relative import when running as a package
-    from .json_handler import JsonHandler
+    from .cookie_manager import CookieManager
 except Exception:
-    # fallback for direct script runs
-    from json_handler import JsonHandler
+    from cookie_manager import CookieManager
 
 try:
-    # prefer package-relative import when running as a package
-    from .cookie_manager import CookieManager
+    from .elpriser_api import PricesUnavailable
 except Exception:
-    from cookie_manager import CookieManager
+    from elpriser_api import PricesUnavailable
 
 # Create blueprints
 route_blueprint = Blueprint('routes', __name__)
 bp = Blueprint('endpoints', __name__)
 
 ALLOWED_PRISKLASSER = ['SE1', 'SE2', 'SE3', 'SE4']
+# longest date range the price APIs accept in one request
+MAX_RANGE_DAYS = 366
 
 # Try to use SQLAlchemy models if available
 USE_DB = False
@@ -49,13 +54,9 @@ except Exception as e:
 
 if USE_SQLALCHEMY:
     try:
-        from .models import Annotation, init_db, get_session
-        # initialize DB lazily
-        try:
-            init_db()
-            USE_DB = True
-        except Exception as e:
-            USE_DB = False
+        from .models import Annotation, get_session
+        # tables are created by models.configure_engine() when the app starts
+        USE_DB = True
     except Exception as e:
         USE_DB = False
 else:
@@ -65,6 +66,11 @@ else:
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 ANN_SERVICE = None  # Initialize later to avoid import issues
 
+
+def _project_root():
+    """The app's PROJECT_ROOT (price cache, archive, price table), or this checkout's"""
+    return Path(current_app.config.get('PROJECT_ROOT') or PROJECT_ROOT)
+
 def get_annotations_service():
     """Lazy initialization of annotations service"""
     global ANN_SERVICE
@@ -128,31 +134,33 @@ class ElpriserAPI(MethodView):
             missing.append('day')
         if missing:
             return jsonify({"error": "Missing required fields", "missing": missing}), 422
-
-        # Use the ElpriserService to fetch/parse
         try:
-            from .elpriser_api import ElpriserAPI as APIClass
-        except Exception:
-            from elpriser_api import ElpriserAPI as APIClass
-        api = APIClass(year=year, month=month, day=day, prisklass=prisklass)
-        priser = api.fetch_prices()
+            from datetime import date as _date
+            _date(int(year), int(month), int(day))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid date", "year": year, "month": month, "day": day}), 422
+
+        # Use the ElpriserService to fetch/parse; the price cache is checked
+        # first so a repeat lookup for the same date/prisklass never goes upstream
+        project_root = _project_root()
+        try:
+            parsed = ElpriserService.get_parsed(project_root, year, month, day, prisklass, strict=True)
+        except ValueError:
+            return jsonify({"error": "Invalid prisklass", "allowed": ALLOWED_PRISKLASSER}), 422
+        except PricesUnavailable as exc:
+            # 422 when the date isn't published, 503 when upstream is down / breaker open
+            return jsonify({"error": "Failed to fetch elpriser data", "detail": str(exc)}), exc.status
 
-        if not priser:
+        if not parsed:
             return jsonify({"error": "Failed to fetch elpriser data"}), 422
 
-        # persist raw payload
-        current_app.logger.debug('fetch_elpriser raw priser: %s', repr(priser)[:1000])
-        json_handler = JsonHandler('elpriser_data.json')
-        json_handler.write_json(priser)
-
-        labels, values, summary = ElpriserService.parse_raw_payload(priser)
+        series, labels, values, summary = parsed
+        current_app.logger.debug('fetch_elpriser parsed %s: %d slots', prisklass, len(values))
 
-        # if caller requested debug, include the raw persisted payload as well
+        # if caller requested debug, include the raw cached payload as well
         payload = {"message": "Elpriser data fetched and stored successfully", "prisklass": prisklass, "labels": labels, "values": values, "summary": summary}
         if request.args.get('debug') in ('1', 'true', 'yes'):
-            project_root = Path(__file__).resolve().parents[1]
-            raw = ElpriserService.load_persisted(project_root)
-            payload['raw_persisted'] = raw
+            payload['raw_persisted'] = series.to_payload() if series is not None else ElpriserService.load_cached(project_root, year, month, day, prisklass)
 
         # set last_search cookie so the UI (server-side) can prefill next time
         try:
@@ -202,9 +210,12 @@ class ElpriserView(MethodView):
         except Exception:
             pass
         
-        # Load elpriser data
-        project_root = Path(__file__).resolve().parents[1]
-        raw = ElpriserService.load_persisted(project_root)
+        # Load elpriser data for the requested date/area (price table, then cache)
+        project_root = _project_root()
+        try:
+            parsed = ElpriserService.get_day(project_root, year, month, day, area)
+        except ValueError:
+            parsed = None
         # read server-side last_search cookie (if present) to prefill the UI
         last_search = None
         try:
@@ -218,7 +229,7 @@ class ElpriserView(MethodView):
             except Exception:
                 last_search = None
 
-        if not raw:
+        if not parsed:
             return render_template('elpriser.html', 
                                  labels=[], 
                                  values=[], 
@@ -228,7 +239,7 @@ class ElpriserView(MethodView):
                                  area=area,
                                  last_search=last_search)
         
-        labels, values, summary = ElpriserService.parse_raw_payload(raw)
+        _, labels, values, summary = parsed
         
         # Fetch annotations for this date and area
         annotations = get_annotations_service().list(date=date_str, area=area)
@@ -243,11 +254,55 @@ class ElpriserView(MethodView):
                              last_search=last_search)
 
 class ElpriserDataView(MethodView):
-    """Serve the persisted elpriser_data.json"""
+    """Serve a cached elpriser payload (or the legacy elpriser_data.json)"""
 
     def get(self):
-        """Serve the persisted elpriser_data.json from project root."""
-        project_root = Path(__file__).resolve().parents[1]
+        """Serve the payload for ?year=&month=&day=&prisklass= or ?from=&to=.
+
+        Prices come from the price table, then the price cache. Without a
+        date the most recently cached payload is served, and the legacy
+        elpriser_data.json in the project root is the last fallback.
+        """
+        project_root = _project_root()
+        year = request.args.get('year')
+        month = request.args.get('month')
+        day = request.args.get('day')
+        prisklass = (request.args.get('prisklass') or request.args.get('area') or 'SE3').upper()
+        if request.args.get('from') or request.args.get('to'):
+            if prisklass not in ALLOWED_PRISKLASSER:
+                return jsonify({"error": "Invalid prisklass", "allowed": ALLOWED_PRISKLASSER}), 422
+            try:
+                start, end = _parse_date_range()
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 422
+            if (end - start).days + 1 > MAX_RANGE_DAYS:
+                return jsonify({"error": f"Date range is limited to {MAX_RANGE_DAYS} days"}), 422
+            # archive, then price table, then price cache; nothing is fetched
+            rows = [row for chunk in ElpriserService.iter_stored(project_root, prisklass, start, end)
+                    for row in chunk.to_payload()]
+            if not rows:
+                return jsonify({"error": "No stored elpriser data for that date range/prisklass"}), 404
+            return jsonify(rows), 200
+        if year and month and day:
+            from datetime import date as _date
+            try:
+                series = ElpriserService.stored_series(project_root, prisklass, _date(int(year), int(month), int(day)))
+            except (TypeError, ValueError):
+                series = None
+            if series is not None and len(series):
+                return jsonify(series.to_payload()), 200
+            cached = ElpriserService.load_cached(project_root, year, month, day, prisklass)
+            if cached is None:
+                return jsonify({"error": "No cached elpriser data for that date/prisklass"}), 404
+            return jsonify(cached), 200
+
+        cache = ElpriserService.cache_for(project_root)
+        latest = cache.latest_key()
+        if latest:
+            cached = cache.get(latest)
+            if cached is not None:
+                return jsonify(cached), 200
+
         json_path = project_root / 'elpriser_data.json'
         if not json_path.exists():
             return jsonify({"error": "elpriser_data.json not found"}), 404
@@ -261,9 +316,216 @@ class ElpriserDataView(MethodView):
             return jsonify({"error": "Failed to read elpriser_data.json", "detail": str(exc)}), 500
 
 
+def _parse_date_range(default_days=1):
+    """Read ?from=&to= (YYYY-MM-DD, inclusive) or a single ?date=.
+
+    ``to`` defaults to today and ``from`` to ``default_days`` days ending at
+    ``to``. Raises ValueError on malformed or reversed dates.
+    """
+    from datetime import date as _date, timedelta
+
+    def parse(name):
+        value = request.args.get(name) or request.args.get('date')
+        if not value:
+            return None
+        try:
+            return _date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"{name if request.args.get(name) else 'date'} must be a date (YYYY-MM-DD)") from None
+
+    end = parse('to') or _date.today()
+    start = parse('from') or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ValueError('from must not be after to')
+    return start, end
+
+
+class RollupsAPI(MethodView):
+    """Resampled price statistics (mean, median, percentiles, std) per period"""
+
+    def get(self):
+        """GET /api/rollups?zone=SE3&period=day&from=YYYY-MM-DD&to=YYYY-MM-DD
+
+        Covers the last 365 days by default. Only days already in the price
+        cache are included.
+        """
+        zone = (request.args.get('zone') or request.args.get('prisklass') or 'SE3').upper()
+        period = request.args.get('period', 'day')
+        if zone not in ALLOWED_PRISKLASSER:
+            return jsonify({"error": "Invalid zone", "allowed": ALLOWED_PRISKLASSER}), 422
+        try:
+            start, end = _parse_date_range(default_days=365)
+            rows = ElpriserService.rollups(_project_root(), zone, start, end, period=period)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 422
+        return jsonify({"zone": zone, "period": period, "from": start.isoformat(), "to": end.isoformat(),
+                        "unit": "öre/kWh", "rows": rows}), 200
+
+
+class CheapestWindowAPI(MethodView):
+    """Cheapest contiguous N-slot windows, e.g. when to run the dishwasher"""
+
+    def get(self):
+        """GET /api/cheapest_window?zone=SE3&date=YYYY-MM-DD&slots=8&k=3
+
+        ``from``/``to`` select a range instead of one ``date`` (default today).
+        Days missing from the cache are fetched from upstream, up to
+        ElpriserService.MAX_FETCH_DAYS and none after tomorrow.
+        """
+        zone = (request.args.get('zone') or request.args.get('prisklass') or 'SE3').upper()
+        if zone not in ALLOWED_PRISKLASSER:
+            return jsonify({"error": "Invalid zone", "allowed": ALLOWED_PRISKLASSER}), 422
+        try:
+            start, end = _parse_date_range()
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 422
+        try:
+            slots = int(request.args.get('slots', 4))
+            k = int(request.args.get('k', 1))
+        except ValueError:
+            return jsonify({"error": "slots and k must be whole numbers"}), 422
+        if (end - start).days + 1 > MAX_RANGE_DAYS:
+            return jsonify({"error": f"Date range is limited to {MAX_RANGE_DAYS} days"}), 422
+        if slots < 1 or not 1 <= k <= 24:
+            return jsonify({"error": "slots must be >= 1 and k between 1 and 24"}), 422
+
+        series = ElpriserService.series_between(_project_root(), zone, start, end)
+        if not len(series):
+            return jsonify({"error": "No price data for that date range"}), 404
+        windows = ElpriserService.cheapest_windows(series, slots, k=k)
+        return jsonify({"zone": zone, "from": start.isoformat(), "to": end.isoformat(), "slots": slots,
+                        "unit": "öre/kWh", "cheapest": windows[0] if windows else None,
+                        "windows": windows}), 200
+
+
+class CompareZonesAPI(MethodView):
+    """All price zones side by side with per-slot spreads and a ranking"""
+
+    def get(self):
+        """GET /api/compare_zones?from=YYYY-MM-DD&to=YYYY-MM-DD&zones=SE1,SE4
+
+        Defaults to today and all four zones. Days missing from the cache
+        are fetched from upstream, a bounded number and none after tomorrow
+        (see ElpriserService.compare_zones).
+        """
+        zones = [z.strip().upper() for z in request.args.get('zones', '').split(',') if z.strip()]
+        zones = zones or ALLOWED_PRISKLASSER
+        if any(z not in ALLOWED_PRISKLASSER for z in zones):
+            return jsonify({"error": "Invalid zone", "allowed": ALLOWED_PRISKLASSER}), 422
+        try:
+            start, end = _parse_date_range()
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 422
+        if (end - start).days + 1 > MAX_RANGE_DAYS:
+            return jsonify({"error": f"Date range is limited to {MAX_RANGE_DAYS} days"}), 422
+
+        result = ElpriserService.compare_zones(_project_root(), start, end, zones=zones)
+        if not result['time_start']:
+            return jsonify({"error": "No price data for that date range"}), 404
+        return jsonify(dict(result, **{"from": start.isoformat(), "to": end.isoformat(), "unit": "öre/kWh"})), 200
+
+
+def _gzip_stream(chunks, level=6):
+    """Gzip a stream of byte chunks on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ExportPricesAPI(MethodView):
+    """Stream stored prices for a zone and date range as CSV or NDJSON"""
+
+    FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+    COLUMNS = ('time_start', 'time_end', 'SEK_per_kWh', 'EUR_per_kWh', 'EXR')
+    # exports are streamed, so longer than MAX_RANGE_DAYS, but every day is
+    # still a store/cache/archive lookup
+    MAX_DAYS = 5 * 366
+
+    def get(self):
+        """GET /export/prices?zone=SE3&from=YYYY-MM-DD&to=YYYY-MM-DD&format=csv|ndjson
+
+        Rows are generated a month at a time while the response is being
+        sent, so memory use doesn't depend on the length of the range.
+        Only stored days are exported; nothing is fetched upstream. Sent
+        gzip-compressed when the client accepts it.
+        """
+        zone = (request.args.get('zone') or request.args.get('prisklass') or 'SE3').upper()
+        fmt = request.args.get('format', 'csv').lower()
+        if zone not in ALLOWED_PRISKLASSER:
+            return jsonify({"error": "Invalid zone", "allowed": ALLOWED_PRISKLASSER}), 422
+        if fmt not in self.FORMATS:
+            return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 422
+        try:
+            start, end = _parse_date_range()
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 422
+        if (end - start).days + 1 > self.MAX_DAYS:
+            return jsonify({"error": f"Date range is limited to {self.MAX_DAYS} days"}), 422
+
+        project_root = _project_root()
+        chunks = ElpriserService.iter_stored(project_root, zone, start, end)
+        body = self._csv(chunks, zone) if fmt == 'csv' else self._ndjson(chunks, zone)
+        headers = {
+            'Content-Disposition': f'attachment; filename="prices_{zone}_{start}_{end}.{fmt}"',
+            'Vary': 'Accept-Encoding',
+            'X-Accel-Buffering': 'no',
+        }
+        if 'gzip' in request.accept_encodings:
+            body = _gzip_stream(body)
+            headers['Content-Encoding'] = 'gzip'
+        return Response(stream_with_context(body), mimetype=self.FORMATS[fmt], headers=headers)
+
+    def _rows(self, series):
+        # missing EUR/EXR values are NaN in the series; export them as empty/null
+        for row in series.to_payload():
+            yield [None if v != v else v for v in (row[c] for c in self.COLUMNS)]
+
+    def _csv(self, chunks, zone):
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        writer.writerow(('zone',) + self.COLUMNS)
+        for series in chunks:
+            writer.writerows([zone] + row for row in self._rows(series))
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode('utf-8')
+
+    def _ndjson(self, chunks, zone):
+        keys = ('zone',) + self.COLUMNS
+        for series in chunks:
+            yield ''.join(json.dumps(dict(zip(keys, [zone] + row)), separators=(',', ':')) + '\n'
+                          for row in self._rows(series)).encode('utf-8')
+
+
 class AnnotationsAPI(MethodView):
     """API for managing annotations"""
 
+    MAX_LIMIT = 500
+
+    @staticmethod
+    def _encode_cursor(after):
+        return base64.urlsafe_b64encode(json.dumps(list(after)).encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """(created_at, id) from a cursor made by _encode_cursor; ValueError if it isn't one."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            created_at, ann_id = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError('invalid cursor')
+        if not isinstance(ann_id, str) or not (created_at is None or isinstance(created_at, str)):
+            raise ValueError('invalid cursor')
+        if created_at is not None:
+            from datetime import datetime
+            datetime.fromisoformat(created_at.rstrip('Z'))  # ValueError: not a timestamp
+        return created_at, ann_id
+
     def get(self):
         """Fetch annotations"""
         # accept date as single param or year/month/day triple
@@ -290,11 +552,38 @@ class AnnotationsAPI(MethodView):
             # Fallback: do not use user_id unless explicit consent available
             user_id = None
 
-        if mine and user_id:
+        if not mine:
+            user_id = None
+
+        # keyset pagination: ?limit=N[&cursor=...][&fields=id,text,...]
+        if not any(k in request.args for k in ('limit', 'cursor', 'fields')):
             items = get_annotations_service().list(date=date, area=area, user_id=user_id)
-        else:
-            items = get_annotations_service().list(date=date, area=area)
-        return jsonify({'annotations': items}), 200
+            return jsonify({'annotations': items}), 200
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 422
+        if not 1 <= limit <= self.MAX_LIMIT:
+            return jsonify({'error': f"limit must be between 1 and {self.MAX_LIMIT}"}), 422
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = self._decode_cursor(request.args['cursor'])
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 422
+        fields = None
+        if request.args.get('fields'):
+            fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+            unknown = sorted(set(fields) - set(AnnotationsService.FIELDS))
+            if unknown:
+                return jsonify({'error': 'Unknown fields', 'unknown': unknown,
+                                'allowed': list(AnnotationsService.FIELDS)}), 422
+        items, next_after = get_annotations_service().page(date=date, area=area, user_id=user_id, limit=limit,
+                                                           after=after, fields=fields)
+        return jsonify({
+            'annotations': items,
+            'next_cursor': self._encode_cursor(next_after) if next_after else None,
+        }), 200
 
     def post(self):
         """Create a new annotation"""
@@ -334,6 +623,42 @@ class AnnotationsAPI(MethodView):
         return jsonify({'annotation': ann}), 201
 
 
+class AnnotationStreamAPI(MethodView):
+    """Server-sent events for annotation changes (create, vote, moderate)"""
+
+    HEARTBEAT_SECONDS = 15
+
+    def get(self):
+        """Stream events for ?date=&area= (both optional) until the client disconnects"""
+        date = request.args.get('date') or None
+        area = request.args.get('prisklass') or request.args.get('area') or None
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+        sub = get_annotations_service().events.subscribe(date=date, area=area, last_event_id=last_event_id)
+        heartbeat = self.HEARTBEAT_SECONDS
+
+        def generate():
+            try:
+                # reconnect after 5 s if the connection drops
+                yield 'retry: 5000\n\n'
+                while not sub.closed:
+                    event = sub.get(timeout=heartbeat)
+                    if event is None:
+                        # comment line; keeps proxies from closing an idle connection
+                        yield ': keepalive\n\n'
+                        continue
+                    data = json.dumps(event['annotation'], separators=(',', ':'))
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+            finally:
+                sub.close()
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 class AnnotationVoteAPI(MethodView):
     """API for voting on annotations"""
 
@@ -375,8 +700,13 @@ route_blueprint.add_url_rule('/DeleteExample', view_func=ExampleAPI.as_view('del
 route_blueprint.add_url_rule('/fetch_elpriser', view_func=ElpriserAPI.as_view('fetch_elpriser'))
 route_blueprint.add_url_rule('/elpriser', view_func=ElpriserView.as_view('elpriser_view'))
 route_blueprint.add_url_rule('/elpriser_data.json', view_func=ElpriserDataView.as_view('serve_elpriser_json'))
+route_blueprint.add_url_rule('/api/rollups', view_func=RollupsAPI.as_view('rollups'))
+route_blueprint.add_url_rule('/api/cheapest_window', view_func=CheapestWindowAPI.as_view('cheapest_window'))
+route_blueprint.add_url_rule('/api/compare_zones', view_func=CompareZonesAPI.as_view('compare_zones'))
+route_blueprint.add_url_rule('/export/prices', view_func=ExportPricesAPI.as_view('export_prices'))
 
 route_blueprint.add_url_rule('/annotations', view_func=AnnotationsAPI.as_view('annotations'))
+route_blueprint.add_url_rule('/annotations/stream', view_func=AnnotationStreamAPI.as_view('annotation_stream'))
 route_blueprint.add_url_rule('/annotations/<ann_id>/vote', view_func=AnnotationVoteAPI.as_view('vote_annotation'))
 route_blueprint.add_url_rule('/annotations/<ann_id>/moderate', view_func=AnnotationModerateAPI.as_view('moderate_annotation'))
 
@@ -458,7 +788,7 @@ def admin_cookie_records():
 @require_admin
 def admin_dashboard():
     """Admin dashboard route — delegate data collection to helper to keep route small."""
-    project_root = Path(__file__).resolve().parents[1]
+    project_root = _project_root()
     data = get_admin_dashboard_data(project_root=project_root, limit=200)
     return render_template('admin.html', **data)
 
@@ -0,0 +1,282 @@
+# Shared HTTP client for all outbound (upstream) API calls
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULTS = {
+    'UPSTREAM_CONNECT_TIMEOUT': 3.05,
+    'UPSTREAM_READ_TIMEOUT': 10.0,
+    'UPSTREAM_MAX_RETRIES': 3,
+    'UPSTREAM_BACKOFF_BASE': 0.25,
+    'UPSTREAM_BACKOFF_MAX': 4.0,
+    'UPSTREAM_MAX_CONCURRENCY': 8,
+    'UPSTREAM_POOL_SIZE': 10,
+    'UPSTREAM_BREAKER_THRESHOLD': 5,
+    'UPSTREAM_BREAKER_RESET_SECONDS': 30.0,
+}
+
+
+class UpstreamBusy(requests.RequestException):
+    """Raised when no concurrency slot frees up within the connect+read timeout."""
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    closed    -- calls go through; ``threshold`` consecutive failures open it
+    open      -- calls fail fast until ``reset_timeout`` seconds have passed
+    half_open -- one probe call is let through; success closes the breaker,
+                 failure opens it again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host, threshold=5, reset_timeout=30.0):
+        self.host = host
+        self.threshold = int(threshold)
+        self.reset_timeout = float(reset_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def cancel(self):
+        """Give back a half-open probe slot without recording an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self):
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def snapshot(self):
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                'host': self.host,
+                'state': self.state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'retry_in': round(retry_in, 1),
+            }
+
+
+class UpstreamClient:
+    """Pooled keep-alive HTTP client with timeouts, retry/backoff, a concurrency cap
+    and a circuit breaker per upstream host.
+
+    One instance is shared per process (see get_client()); the underlying
+    requests.Session is rebuilt after a fork so worker processes never share
+    sockets with their parent.
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, max_concurrency=None, pool_size=None,
+                 breaker_threshold=None, breaker_reset=None):
+        self.connect_timeout = float(connect_timeout if connect_timeout is not None else DEFAULTS['UPSTREAM_CONNECT_TIMEOUT'])
+        self.read_timeout = float(read_timeout if read_timeout is not None else DEFAULTS['UPSTREAM_READ_TIMEOUT'])
+        self.max_retries = int(max_retries if max_retries is not None else DEFAULTS['UPSTREAM_MAX_RETRIES'])
+        self.backoff_base = float(backoff_base if backoff_base is not None else DEFAULTS['UPSTREAM_BACKOFF_BASE'])
+        self.backoff_max = float(backoff_max if backoff_max is not None else DEFAULTS['UPSTREAM_BACKOFF_MAX'])
+        self.max_concurrency = int(max_concurrency or DEFAULTS['UPSTREAM_MAX_CONCURRENCY'])
+        self.pool_size = int(pool_size or DEFAULTS['UPSTREAM_POOL_SIZE'])
+        self.breaker_threshold = int(breaker_threshold or DEFAULTS['UPSTREAM_BREAKER_THRESHOLD'])
+        self.breaker_reset = float(breaker_reset if breaker_reset is not None else DEFAULTS['UPSTREAM_BREAKER_RESET_SECONDS'])
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._session = None
+        self._pid = None
+        self._session_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a client from a Flask config mapping (or any dict-like object)."""
+        def _get(name):
+            return config.get(name, DEFAULTS[name]) if config is not None else DEFAULTS[name]
+        return cls(
+            connect_timeout=_get('UPSTREAM_CONNECT_TIMEOUT'),
+            read_timeout=_get('UPSTREAM_READ_TIMEOUT'),
+            max_retries=_get('UPSTREAM_MAX_RETRIES'),
+            backoff_base=_get('UPSTREAM_BACKOFF_BASE'),
+            backoff_max=_get('UPSTREAM_BACKOFF_MAX'),
+            max_concurrency=_get('UPSTREAM_MAX_CONCURRENCY'),
+            pool_size=_get('UPSTREAM_POOL_SIZE'),
+            breaker_threshold=_get('UPSTREAM_BREAKER_THRESHOLD'),
+            breaker_reset=_get('UPSTREAM_BREAKER_RESET_SECONDS'),
+        )
+
+    @property
+    def session(self):
+        """Return the keep-alive session for the current process."""
+        pid = os.getpid()
+        with self._session_lock:
+            if self._session is None or self._pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session, self._pid = session, pid
+            return self._session
+
+    def backoff(self, attempt):
+        """Return the sleep before retry ``attempt`` (full-jitter exponential backoff)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def breaker_for(self, url):
+        """Return the CircuitBreaker for the host of ``url``."""
+        host = urlsplit(url).netloc
+        with self._breakers_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, self.breaker_threshold, self.breaker_reset)
+            return breaker
+
+    def breaker_states(self):
+        """Return a snapshot of every host's circuit breaker."""
+        with self._breakers_lock:
+            breakers = list(self._breakers.values())
+        return [b.snapshot() for b in breakers]
+
+    def get(self, url, **kwargs):
+        """GET ``url`` and return the Response.
+
+        Connection errors, timeouts and RETRY_STATUSES are retried up to
+        max_retries times; after that the last retryable response is returned
+        or the last exception raised. Any other status is returned as-is.
+
+        Each call is guarded by the host's circuit breaker: while it is open,
+        CircuitOpenError is raised without touching the network.
+        """
+        breaker = self.breaker_for(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {breaker.host}; retry in {breaker.retry_in():.0f}s")
+        try:
+            response = self._get_with_retries(url, **kwargs)
+        except UpstreamBusy:
+            breaker.cancel()
+            raise
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.cancel()
+            raise
+        if response.status_code in RETRY_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _get_with_retries(self, url, **kwargs):
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        attempt = 0
+        while True:
+            if not self._slots.acquire(timeout=self.connect_timeout + self.read_timeout):
+                raise UpstreamBusy(f"Upstream concurrency limit ({self.max_concurrency}) reached for {url}")
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            finally:
+                self._slots.release()
+
+            if response is not None and (response.status_code not in RETRY_STATUSES or attempt >= self.max_retries):
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def get_json(self, url, **kwargs):
+        """GET ``url``, raise for non-2xx status and return the decoded JSON body."""
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure(config=None):
+    """(Re)create the process-wide client from a config mapping."""
+    global _client
+    with _client_lock:
+        _client = UpstreamClient.from_config(config)
+        return _client
+
+
+def get_client():
+    """Return the process-wide UpstreamClient, creating it on first use.
+
+    The active Flask app config is used when called inside an app context,
+    otherwise the class-level settings from config.get_config().
+    """
+    global _client
+    if _client is not None:
+        return _client
+    config = None
+    try:
+        from flask import current_app
+        config = current_app.config
+    except (ImportError, RuntimeError):
+        try:
+            from .config import get_config
+        except ImportError:
+            from config import get_config
+        cfg_class = get_config()
+        config = {name: getattr(cfg_class, name) for name in DEFAULTS if hasattr(cfg_class, name)}
+    with _client_lock:
+        if _client is None:
+            _client = UpstreamClient.from_config(config)
+        return _client
@@ -0,0 +1,170 @@
+"""Add the annotation indexes and import annotations.json into SQLite.
+
+Creates the composite indexes on annotations (date, area, status) and
+(user_id, created_at) if the database predates them, then bulk-imports the
+JSON annotations (the ``annotations.json`` snapshot plus its event log, if
+any) in chunked transactions. Annotations whose id is already in the
+database are skipped, so the tool can be re-run safely.
+
+    python -m application.migrate_annotations
+    python -m application.migrate_annotations --json backup/annotations.json --chunk-size 5000
+    python -m application.migrate_annotations --indexes-only --db sqlite:////srv/elpriser/annotations.db
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+
+try:
+    # prefer package-relative import when running as a package
+    from . import models
+    from .services.annotation_repository import AnnotationRepository
+except ImportError:
+    # fallback for direct script execution
+    import models
+    from services.annotation_repository import AnnotationRepository
+
+Annotation = models.Annotation
+
+DAY_QUERY = "SELECT id FROM annotations WHERE date = :date AND area = :area"
+
+
+def ensure_indexes(engine):
+    """Create the annotations table and any of its indexes that are missing; return their names."""
+    table = Annotation.__table__
+    with engine.begin() as conn:
+        existing = {row[1] for row in conn.execute(text("PRAGMA index_list('annotations')"))}
+        if not existing and not engine.dialect.has_table(conn, table.name):
+            # a new table comes with its indexes
+            table.create(conn)
+            return sorted(index.name for index in table.indexes)
+        created = []
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name not in existing:
+                index.create(conn)
+                created.append(index.name)
+        if created:
+            # refresh planner statistics so the new indexes get used
+            conn.execute(text('ANALYZE annotations'))
+    return created
+
+
+def read_annotations(path: Path):
+    """Return the JSON backend's annotations: the snapshot plus any logged changes."""
+    repo = AnnotationRepository(path)
+    if repo.log_path.exists():
+        return repo.all()
+    with path.open('r', encoding='utf-8') as fh:
+        data = json.load(fh)
+    return data if isinstance(data, list) else []
+
+
+def _parse_created(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).rstrip('Z'))
+    except ValueError:
+        return None
+
+
+def to_row(item):
+    """Map a JSON annotation to an annotations row, or None if it lacks required fields."""
+    if not isinstance(item, dict) or not all(item.get(k) for k in ('id', 'date', 'area', 'text')):
+        return None
+    return {
+        'id': str(item['id']),
+        'user_id': item.get('user_id'),
+        'date': item['date'],
+        'area': item['area'],
+        'text': item['text'],
+        'author': item.get('author') or 'anonymous',
+        'created_at': _parse_created(item.get('created_at')),
+        'likes': int(item.get('likes') or 0),
+        'dislikes': int(item.get('dislikes') or 0),
+        'status': item.get('status') or 'active',
+    }
+
+
+def import_annotations(engine, items, chunk_size=1000):
+    """Insert ``items`` in transactions of ``chunk_size`` rows; return counts.
+
+    Duplicate ids in the input keep their last occurrence (the JSON file is
+    append-ordered); ids already in the database are left untouched.
+    """
+    rows = {}
+    stats = {'read': 0, 'invalid': 0, 'duplicates': 0, 'inserted': 0, 'existing': 0}
+    for item in items:
+        stats['read'] += 1
+        row = to_row(item)
+        if row is None:
+            stats['invalid'] += 1
+            continue
+        if row['id'] in rows:
+            stats['duplicates'] += 1
+            del rows[row['id']]
+        rows[row['id']] = row
+    stmt = insert(Annotation.__table__).on_conflict_do_nothing(index_elements=['id'])
+    batch = list(rows.values())
+    for start in range(0, len(batch), chunk_size):
+        chunk = batch[start:start + chunk_size]
+        with engine.begin() as conn:
+            inserted = conn.execute(stmt, chunk).rowcount
+        stats['inserted'] += inserted
+        stats['existing'] += len(chunk) - inserted
+    return stats
+
+
+def explain_day_query(engine):
+    """SQLite's plan for listing one day's annotations (should use an index)."""
+    with engine.connect() as conn:
+        plan = conn.execute(text('EXPLAIN QUERY PLAN ' + DAY_QUERY), {'date': '2025-01-01', 'area': 'SE3'})
+        return '; '.join(row[-1] for row in plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', type=Path, default=models.PROJECT_ROOT / 'annotations.json',
+                        help='annotations.json to import (default: the project root one)')
+    parser.add_argument('--db', default=models.DATABASE_URI, help='database URI (default: annotations.db)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='rows per transaction')
+    parser.add_argument('--indexes-only', action='store_true', help="add the indexes but don't import")
+    args = parser.parse_args()
+
+    engine = models.make_engine(args.db)
+    t0 = time.perf_counter()
+    created = ensure_indexes(engine)
+    t_index = time.perf_counter() - t0
+    print(f"indexes: {', '.join(created) if created else 'already present'} ({t_index:.2f} s)")
+
+    if not args.indexes_only:
+        if not args.json.exists():
+            print(f"error: {args.json} not found", file=sys.stderr)
+            return 1
+        t0 = time.perf_counter()
+        try:
+            items = read_annotations(args.json)
+        except (OSError, ValueError) as exc:
+            print(f"error: can't read {args.json}: {exc}", file=sys.stderr)
+            return 1
+        t_read = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        stats = import_annotations(engine, items, chunk_size=max(1, args.chunk_size))
+        t_import = time.perf_counter() - t0
+        rate = stats['inserted'] / t_import if t_import > 0 else 0
+        print(f"read {stats['read']} annotations in {t_read:.2f} s; inserted {stats['inserted']} in "
+              f"{t_import:.2f} s ({rate:.0f} rows/s), {stats['existing']} already in the database, "
+              f"{stats['duplicates']} duplicate ids, {stats['invalid']} missing id/date/area/text")
+
+    print(f"day listing plan: {explain_day_query(engine)}")
+    engine.dispose()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
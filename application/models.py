@@ -1,16 +1,30 @@
+import os
 from datetime import datetime
 from pathlib import Path
-from sqlalchemy import (Column, Integer, String, DateTime, Text)
-from sqlalchemy import create_engine
+from sqlalchemy import (Column, Integer, String, DateTime, Text, Float, Index)
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 Base = declarative_base()
 
 
 class Annotation(Base):
     __tablename__ = 'annotations'
-    
+    # listing a day (optionally per area and status) and a user's annotations
+    # stay index lookups however large the table gets; the (..., created_at, id)
+    # indexes also give GET /annotations its page order, so a keyset page
+    # reads only its own rows. Existing databases get them from
+    # application/migrate_annotations.py
+    __table_args__ = (
+        Index('ix_annotations_date_area_status', 'date', 'area', 'status'),
+        Index('ix_annotations_user_created', 'user_id', 'created_at'),
+        Index('ix_annotations_date_area_created', 'date', 'area', 'created_at', 'id'),
+        Index('ix_annotations_date_created', 'date', 'created_at', 'id'),
+    )
+
     id = Column(String, primary_key=True)
     # link anonymous annotations to cookie-based user id when present
     user_id = Column(String, nullable=True, index=True)
@@ -40,17 +54,181 @@ class CookieRecord(Base):
     annotations_count = Column(Integer, default=0)
 
 
+class Price(Base):
+    """One price slot. The (zone, time_start) primary key doubles as the
+    index for range scans; without a rowid SQLite stores the rows in key
+    order, so a zone's history is read sequentially."""
+    __tablename__ = 'prices'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    zone = Column(String(3), primary_key=True)
+    # epoch seconds (UTC); utc_offset keeps the local offset for the ISO strings
+    time_start = Column(Integer, primary_key=True, autoincrement=False)
+    time_end = Column(Integer, nullable=False)
+    utc_offset = Column(Integer, nullable=False, default=0)
+    sek_per_kwh = Column(Float, nullable=False)
+    eur_per_kwh = Column(Float, nullable=True)
+    exr = Column(Float, nullable=True)
+
+
 # Set database path to project root
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATABASE_URI = f'sqlite:///{PROJECT_ROOT / "annotations.db"}'
 
-engine = create_engine(DATABASE_URI, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Applied to every new SQLite connection. WAL lets readers run while one
+# writer commits; synchronous=NORMAL is durable in WAL mode except for the
+# last commits before a power loss; busy_timeout makes a blocked writer wait
+# instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'cache_size': -20000,  # KiB, i.e. 20 MB of page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# defaults for make_engine(); FlaskApp passes the SQLALCHEMY_POOL_* settings from the config
+POOL_OPTIONS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': -1,
+}
+
+
+def _apply_pragmas(pragmas, in_memory):
+    def on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                if name == 'journal_mode' and in_memory:
+                    continue  # in-memory databases can't use WAL
+                cur.execute(f"PRAGMA {name}={value}")
+        finally:
+            cur.close()
+    return on_connect
+
+
+def is_memory_url(url):
+    """True for an in-memory SQLite URL, private (``:memory:``) or shared (``mode=memory``)."""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory')
+
+
+# open connections that keep shared-cache memory databases alive, by engine
+_keepalive = {}
+
+
+def make_engine(uri, echo=False, pragmas=None, **options):
+    """Create an engine for ``uri``; SQLite connections get ``pragmas`` (default SQLITE_PRAGMAS).
+
+    Pool options default to POOL_OPTIONS. A shared-cache in-memory URI
+    (``sqlite:///file:name?mode=memory&cache=shared&uri=true``) gets a
+    QueuePool of connections usable from any thread, which all see the same
+    database; it lives as long as one connection to it is open, so one is
+    kept open until dispose_engine(). A private ``:memory:`` database exists
+    only inside its connection, so that one connection is shared
+    (StaticPool) and pool options are ignored.
+    """
+    url = make_url(uri)
+    in_memory = is_memory_url(url)
+    shared_memory = in_memory and url.query.get('mode') == 'memory'
+    if in_memory and not shared_memory:
+        options = {k: v for k, v in options.items() if k not in POOL_OPTIONS}
+        options.setdefault('poolclass', StaticPool)
+    else:
+        options = {**POOL_OPTIONS, **options}
+        options.setdefault('poolclass', QueuePool)
+    if in_memory:
+        options['connect_args'] = {**options.get('connect_args', {}), 'check_same_thread': False}
+    new_engine = create_engine(url, echo=echo, **options)
+    if url.get_backend_name() == 'sqlite':
+        pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+        event.listen(new_engine, 'connect', _apply_pragmas(pragmas, in_memory))
+        if shared_memory:
+            _keepalive[new_engine] = new_engine.raw_connection()
+    return new_engine
+
+
+def dispose_engine(old_engine):
+    """Close ``old_engine``'s pooled connections and let its in-memory database go.
+
+    A shared-cache memory database disappears once its last connection
+    closes, so init_db() creates the tables again if the engine is reused.
+    """
+    keepalive = _keepalive.pop(old_engine, None)
+    if keepalive is not None:
+        keepalive.close()
+    old_engine.dispose()
+    _initialized.discard(old_engine)
+
+
+# built on first use (get_engine) or from the app config (configure_engine),
+# so importing this module never opens, let alone writes, a database
+engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=None)
+# one session per thread (per request under Flask) until remove_session()
+Session = scoped_session(SessionLocal)
+
+_initialized = set()
+
+
+def get_engine():
+    """The app engine; without a FlaskApp (scripts, benchmarks) the project's annotations.db."""
+    if engine is None:
+        bind_engine(make_engine(DATABASE_URI))
+    return engine
 
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Create missing tables; runs once per engine."""
+    current = get_engine()
+    if current in _initialized:
+        return
+    Base.metadata.create_all(bind=current)
+    _initialized.add(current)
+
+
+def bind_engine(new_engine):
+    """Make ``new_engine`` the app database: sessions and init_db() use it from now on."""
+    global engine
+    Session.remove()
+    engine = new_engine
+    SessionLocal.configure(bind=new_engine)
+    return new_engine
+
+
+def configure_engine(config):
+    """Build the app engine from a Flask config and bind it (see FlaskApp).
+
+    Reads SQLALCHEMY_DATABASE_URI (default: annotations.db in the project
+    root), SQLALCHEMY_ECHO and SQLALCHEMY_POOL_SIZE / _MAX_OVERFLOW /
+    _TIMEOUT / _RECYCLE, then creates any missing tables.
+    """
+    options = {}
+    for key, option in (('SQLALCHEMY_POOL_SIZE', 'pool_size'), ('SQLALCHEMY_MAX_OVERFLOW', 'max_overflow'),
+                        ('SQLALCHEMY_POOL_TIMEOUT', 'pool_timeout'), ('SQLALCHEMY_POOL_RECYCLE', 'pool_recycle')):
+        if config.get(key) is not None:
+            options[option] = config[key]
+    # release the old engine first: a new keepalive on the same shared-cache
+    # name would otherwise attach to (and preserve) the old in-memory database
+    Session.remove()
+    if engine is not None:
+        dispose_engine(engine)
+    bind_engine(make_engine(config.get('SQLALCHEMY_DATABASE_URI') or DATABASE_URI,
+                            echo=bool(config.get('SQLALCHEMY_ECHO')), **options))
+    init_db()
+    return engine
 
 
 def get_session():
-    return SessionLocal()
+    """Return the current thread's session; FlaskApp removes it at the end of each request."""
+    if SessionLocal.kw.get('bind') is None:
+        get_engine()
+    return Session()
+
+
+def remove_session(exc=None):
+    """Close the current thread's session and return its connection to the pool."""
+    Session.remove()
@@ -1,37 +1,54 @@
 # pandas_test.py
 import pandas as pd
 import plotly.express as px
-import requests
 from datetime import date, timedelta
+from pathlib import Path
+
+try:
+    from .services.elpriser_service import ElpriserService
+    from .services.price_series import PriceSeries
+except ImportError:
+    from services.elpriser_service import ElpriserService
+    from services.price_series import PriceSeries
 
 zones = ['SE1','SE2','SE3','SE4']
-base_url = "https://www.elprisetjustnu.se/api/v1/prices"
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+def _to_frame(data, zone, label):
+    # build the frame straight from the PriceSeries columns instead of a list of dicts
+    series = PriceSeries.from_payload(data, zone=zone)
+    df = pd.DataFrame({
+        'time_start': pd.to_datetime(series.start, unit='s', utc=True).tz_convert('Europe/Stockholm'),
+        'SEK_per_kWh': series.sek,
+    })
+    df['zone'] = zone
+    df['day'] = label
+    return df
 
-def fetch_prices(day, label):
+def fetch_days(days, project_root=PROJECT_ROOT):
+    """Fetch all zones for every day in ``days`` ({date: label}) in one concurrent batch."""
+    pairs = [(day, zone) for day in days for zone in zones]
     dfs = []
-    for zone in zones:
-        url = f"{base_url}/{day.year}/{day.month:02d}-{day.day:02d}_{zone}.json"
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            df = pd.DataFrame(data)
-            df['time_start'] = pd.to_datetime(df['time_start'])
-            df['SEK_per_kWh'] = df['SEK_per_kWh'].astype(float)
-            df['zone'] = zone
-            df['day'] = label
-            dfs.append(df)
-    return pd.concat(dfs)
+    for day, zone, data in ElpriserService.fetch_many(project_root, pairs):
+        if data:
+            dfs.append(_to_frame(data, zone, days[day]))
+    # results arrive in completion order; restore a stable order for plotting
+    return pd.concat(dfs).sort_values(['day', 'zone', 'time_start'], kind='stable')
 
-def build_chart():
+def fetch_prices(day, label, project_root=PROJECT_ROOT):
+    return fetch_days({day: label}, project_root=project_root)
+
+def build_chart(project_root=PROJECT_ROOT):
     today = date.today()
     three_weeks_ago = today - timedelta(weeks=3)
     tomorrow = today + timedelta(days=1)
 
-    df_past = fetch_prices(three_weeks_ago, '3 veckor sedan')
-    df_today = fetch_prices(today, 'Idag')
-    df_tomorrow = fetch_prices(tomorrow, 'Imorgon')
-
-    combined_df = pd.concat([df_past, df_today, df_tomorrow])
+    # all 12 (day, zone) downloads run concurrently instead of one at a time
+    combined_df = fetch_days({
+        three_weeks_ago: '3 veckor sedan',
+        today: 'Idag',
+        tomorrow: 'Imorgon',
+    }, project_root=project_root)
 
     fig = px.line(
         combined_df,
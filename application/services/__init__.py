@@ -1,3 +1,4 @@
 # services package
 from .elpriser_service import ElpriserService
 from .annotations_service import AnnotationsService
+from .price_series import PriceSeries
@@ -0,0 +1,119 @@
+from collections import deque
+import itertools
+import threading
+
+
+class Subscription:
+    """One subscriber's queue of events, filtered by date and area (None matches any).
+
+    Holds at most ``maxsize`` events; when a slow consumer falls behind the
+    oldest are dropped and counted in ``dropped``, so one stuck client
+    can't grow memory without bound.
+    """
+
+    def __init__(self, hub, date=None, area=None, maxsize=100):
+        self.hub = hub
+        self.date = date
+        self.area = area
+        self.key = (date, area)
+        self.dropped = 0
+        self.closed = False
+        self._events = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+
+    def _put(self, event):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Next event, or None after ``timeout`` seconds (or once closed) without one."""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        self.hub._remove(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventHub:
+    """In-process publish/subscribe for annotation changes.
+
+    AnnotationsService publishes ``create``, ``vote`` and ``moderate``
+    events; GET /annotations/stream subscribes with a date/area filter.
+    Subscriptions are grouped by their (date, area) filter, so publishing
+    touches only the groups that can match (at most four) instead of every
+    subscriber. Events get increasing ids, and the last ``history`` are
+    kept so a reconnecting client can catch up (see subscribe()).
+
+    Only subscribers in the same process see an event; with several
+    worker processes each one streams the changes it made itself.
+    """
+
+    def __init__(self, history=1000):
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, date=None, area=None, last_event_id=None, maxsize=100):
+        """Return a Subscription; with ``last_event_id`` it starts with the missed events still in history."""
+        sub = Subscription(self, date=date or None, area=area or None, maxsize=maxsize)
+        with self._lock:
+            self._groups.setdefault(sub.key, set()).add(sub)
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id and self._matches(sub, event):
+                        sub._put(event)
+        return sub
+
+    @staticmethod
+    def _matches(sub, event):
+        ann = event['annotation']
+        return (sub.date is None or sub.date == ann.get('date')) and \
+            (sub.area is None or sub.area == ann.get('area'))
+
+    def _remove(self, sub):
+        with self._lock:
+            group = self._groups.get(sub.key)
+            if group is not None:
+                group.discard(sub)
+                if not group:
+                    del self._groups[sub.key]
+
+    def publish(self, kind, annotation):
+        """Deliver an event to every matching subscriber; returns how many got it."""
+        if not annotation:
+            return 0
+        date, area = annotation.get('date'), annotation.get('area')
+        with self._lock:
+            event = {'id': next(self._ids), 'type': kind, 'annotation': dict(annotation)}
+            self._history.append(event)
+            self.published += 1
+            targets = []
+            for key in {(date, area), (date, None), (None, area), (None, None)}:
+                targets.extend(self._groups.get(key, ()))
+        for sub in targets:
+            sub._put(event)
+        return len(targets)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(group) for group in self._groups.values())
+
+
+# the hub AnnotationsService publishes to unless given another one
+hub = EventHub()
@@ -0,0 +1,363 @@
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _read_at(fd, offset, size):
+    """Read ``size`` bytes at ``offset`` (os.pread is Unix-only); appends don't use the file position."""
+    os.lseek(fd, offset, os.SEEK_SET)
+    chunks = []
+    while size > 0:
+        chunk = os.read(fd, size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class AnnotationRepository:
+    """In-memory, indexed copy of the JSON annotations.
+
+    State is a snapshot (``annotations.json``, a plain list as before) plus
+    an append-only event log next to it (``annotations.log.jsonl``). Every
+    create/vote/moderate appends one line holding the op and the resulting
+    annotation, so a write is an O(1) append instead of rewriting the whole
+    file, and replaying a line twice is harmless. compact() folds the log
+    into a new snapshot (written to a temp file and renamed into place) and
+    empties the log; LogCompactor does that periodically in the background.
+
+    Annotations are kept in a dict by id (in file order) with secondary
+    indexes on (date, area), date and user_id, so list() touches only the
+    matching annotations and get() is a dict lookup. The snapshot is read
+    once and re-read only when its mtime or size changes; lines appended to
+    the log by other processes are replayed on the next call. An flock on
+    the log serializes writers across processes (readers share it), so
+    concurrent votes are never lost. One repository is shared per file
+    (see for_path()).
+
+    Returned annotations are copies; change them through update().
+    """
+
+    LOG_SUFFIX = '.log.jsonl'
+    # fsync every append; a vote survives a crash once update() returns
+    FSYNC = True
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.stem + self.LOG_SUFFIX)
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._log_fd = None
+        self._log_offset = 0
+        self.pending_events = 0
+        self._reset([])
+
+    @classmethod
+    def for_path(cls, path: Path):
+        """Return the process-wide repository for ``path``."""
+        key = Path(path).resolve()
+        with cls._instances_lock:
+            repo = cls._instances.get(key)
+            if repo is None:
+                repo = cls._instances[key] = cls(key)
+            return repo
+
+    def _file_stamp(self):
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _reset(self, items):
+        self._by_id = {}
+        self._by_date_area = {}
+        self._by_date = {}
+        self._by_user = {}
+        for item in items:
+            if isinstance(item, dict) and item.get('id') is not None:
+                self._index(item)
+
+    def _index(self, item):
+        ann_id = item['id']
+        self._by_id[ann_id] = item
+        self._by_date_area.setdefault((item.get('date'), item.get('area')), []).append(ann_id)
+        self._by_date.setdefault(item.get('date'), []).append(ann_id)
+        if item.get('user_id'):
+            self._by_user.setdefault(item['user_id'], []).append(ann_id)
+
+    def _put(self, item):
+        """Insert ``item`` or overwrite the stored annotation with the same id."""
+        found = self._by_id.get(item['id'])
+        if found is None:
+            self._index(item)
+            return
+        if (found.get('date'), found.get('area'), found.get('user_id')) == \
+                (item.get('date'), item.get('area'), item.get('user_id')):
+            found.clear()
+            found.update(item)
+            return
+        # an indexed field changed: rebuild the indexes, keeping file order
+        self._by_id[item['id']] = item
+        self._reset(list(self._by_id.values()))
+
+    # -- event log ------------------------------------------------------
+
+    def _fd(self):
+        if self._log_fd is None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            # O_BINARY: on Windows a text-mode fd would translate newlines and skew offsets
+            flags = os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+            self._log_fd = os.open(self.log_path, flags, 0o644)
+        return self._log_fd
+
+    @contextmanager
+    def _flock(self, exclusive=False):
+        """Hold the cross-process lock on the log (shared for reads)."""
+        fd = self._fd()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield fd
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _replay(self, fd):
+        """Apply log lines appended since we last looked; return the log size."""
+        size = os.fstat(fd).st_size
+        if size <= self._log_offset:
+            return size
+        data = _read_at(fd, self._log_offset, size - self._log_offset)
+        # a crash mid-append can leave a partial last line; stop before it
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                event = json.loads(line)
+                item = event['annotation']
+                if isinstance(item, dict) and item.get('id') is not None:
+                    self._put(item)
+                    self.pending_events += 1
+            except (ValueError, KeyError, TypeError):
+                logger.warning('Skipping unreadable line in %s', self.log_path)
+        self._log_offset += end
+        return size
+
+    def _sync(self, fd):
+        """Reload the snapshot if it changed, then replay new log lines.
+
+        Must be called with the log locked. A changed snapshot means it was
+        edited or compacted by someone else, so the log is replayed from the
+        start on top of it.
+        """
+        stamp = self._file_stamp()
+        if stamp != self._stamp or os.fstat(fd).st_size < self._log_offset:
+            items = []
+            if stamp is not None:
+                try:
+                    with self.path.open('r', encoding='utf-8') as fh:
+                        data = json.load(fh)
+                    items = data if isinstance(data, list) else []
+                except Exception:
+                    items = []
+            self._reset(items)
+            self._stamp = stamp
+            self._log_offset = 0
+            self.pending_events = 0
+        return self._replay(fd)
+
+    def _append(self, op, item, **details):
+        """Sync, apply and log one event; called with the log locked exclusively."""
+        fd = self._log_fd
+        if fcntl is None:
+            # nothing locks other processes out, so what follows our offset can
+            # be their complete events: apply them, keep our change on top, and
+            # below drop only a trailing fragment without a newline
+            mine = dict(item)
+            self._replay(fd)
+            self._put(mine)
+            item = self._by_id[mine['id']]
+        if os.fstat(fd).st_size > self._log_offset:
+            # with the lock held, only a crashed writer leaves bytes we didn't replay
+            os.ftruncate(fd, self._log_offset)
+        line = json.dumps({'op': op, 'id': item['id'], **details, 'annotation': item},
+                          ensure_ascii=False) + '\n'
+        data = line.encode('utf-8')
+        os.write(fd, data)
+        if self.FSYNC:
+            os.fsync(fd)
+        self._log_offset += len(data)
+        self.pending_events += 1
+
+    def _write_snapshot(self):
+        """Write every annotation to the snapshot via a temp file and rename."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix='.tmp-annotations-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                json.dump(list(self._by_id.values()), fh, ensure_ascii=False, indent=2)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._stamp = self._file_stamp()
+
+    def _fold(self, fd):
+        """Snapshot the current state and empty the log (log locked exclusively).
+
+        If we crash between the rename and the truncate, the old log is
+        replayed over a snapshot that already contains it, which changes
+        nothing since each line holds a whole annotation.
+        """
+        self._write_snapshot()
+        os.ftruncate(fd, 0)
+        os.fsync(fd)
+        self._log_offset = 0
+        self.pending_events = 0
+
+    # -- public API ------------------------------------------------------
+
+    def all(self):
+        with self._lock, self._flock() as fd:
+            self._sync(fd)
+            return [dict(a) for a in self._by_id.values()]
+
+    def get(self, ann_id):
+        with self._lock, self._flock() as fd:
+            self._sync(fd)
+            found = self._by_id.get(ann_id)
+            return dict(found) if found is not None else None
+
+    def list(self, date=None, area=None, user_id=None):
+        """Annotations matching every given filter, in file order."""
+        with self._lock, self._flock() as fd:
+            self._sync(fd)
+            ids = self._by_id.keys()
+            if date and area:
+                ids = self._by_date_area.get((date, area), [])
+            elif date:
+                ids = self._by_date.get(date, [])
+            elif user_id:
+                ids = self._by_user.get(user_id, [])
+            found = []
+            for ann_id in ids:
+                a = self._by_id[ann_id]
+                if (area and a.get('area') != area) or (user_id and a.get('user_id') != user_id):
+                    continue
+                found.append(dict(a))
+            return found
+
+    def add(self, ann):
+        """Store a new annotation and append a ``create`` event."""
+        with self._lock, self._flock(exclusive=True) as fd:
+            self._sync(fd)
+            item = dict(ann)
+            self._put(item)
+            self._append('create', item)
+            return dict(item)
+
+    def update(self, ann_id, change, op='update', **details):
+        """Apply ``change(annotation)`` and log it as ``op``; return a copy or None if missing.
+
+        ``details`` (e.g. ``vote='like'``) are recorded in the log line.
+        """
+        with self._lock, self._flock(exclusive=True) as fd:
+            self._sync(fd)
+            found = self._by_id.get(ann_id)
+            if found is None:
+                return None
+            change(found)
+            self._append(op, found, **details)
+            return dict(found)
+
+    def compact(self, min_events=0):
+        """Fold the log into the snapshot; return the number of events folded.
+
+        Does nothing (and returns 0) if fewer than ``min_events`` are pending.
+        """
+        with self._lock, self._flock(exclusive=True) as fd:
+            self._sync(fd)
+            folded = self.pending_events
+            if folded == 0 or folded < min_events:
+                return 0
+            self._fold(fd)
+            return folded
+
+    def replace_all(self, items):
+        """Replace every annotation (used by AnnotationsService._save)."""
+        with self._lock, self._flock(exclusive=True) as fd:
+            self._sync(fd)
+            self._reset([dict(a) for a in items])
+            try:
+                self._fold(fd)
+            except Exception:
+                return False
+            return True
+
+
+class LogCompactor:
+    """Background thread that folds an AnnotationRepository's event log into its snapshot.
+
+    Every ``interval`` seconds it compacts if at least ``min_events`` events
+    are pending. Compaction takes the log's exclusive lock, so several
+    worker processes can run one safely.
+    """
+
+    def __init__(self, repo: AnnotationRepository, interval=300, min_events=500):
+        self.repo = repo
+        self.interval = interval
+        self.min_events = min_events
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, project_root: Path):
+        return cls(
+            AnnotationRepository.for_path(Path(project_root) / 'annotations.json'),
+            interval=config.get('ANNOTATIONS_COMPACT_INTERVAL_SECONDS', 300),
+            min_events=config.get('ANNOTATIONS_COMPACT_MIN_EVENTS', 500),
+        )
+
+    def run_once(self):
+        return self.repo.compact(min_events=self.min_events)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                folded = self.run_once()
+                if folded:
+                    logger.info('Compacted %d annotation events into %s', folded, self.repo.path)
+            except Exception:
+                logger.exception('Annotation log compaction failed')
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='annotations-compactor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
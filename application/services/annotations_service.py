@@ -1,11 +1,16 @@
 from pathlib import Path
-import json
 import uuid
 from datetime import datetime
 
+from . import annotation_events
+from .annotation_repository import AnnotationRepository
+from .vote_buffer import VoteBuffer
+
 # Try to import DB models
 USE_SQLALCHEMY = False
 try:
+    from sqlalchemy import Integer, and_, bindparam, case, func, or_, select, tuple_, update
+    from sqlalchemy.exc import SQLAlchemyError
     from ..models import Annotation, get_session
     USE_SQLALCHEMY = True
 except ImportError as e:
@@ -17,32 +22,59 @@ class AnnotationsService:
     Supports both JSON-file and SQLite backends. Uses SQLite if available and configured.
     """
 
-    def __init__(self, project_root: Path, use_db: bool = False):
+    # dislikes at which an annotation is flagged / hidden
+    WARN_DISLIKES = 3
+    REMOVE_DISLIKES = 5
+    # what page(fields=...) can select ('hour' is only stored by the JSON backend)
+    FIELDS = ('id', 'date', 'area', 'text', 'author', 'hour', 'created_at', 'likes', 'dislikes', 'status', 'user_id')
+
+    def __init__(self, project_root: Path, use_db: bool = False, events=None):
         self.project_root = project_root
         self.path = project_root / 'annotations.json'
         self.use_db = use_db and USE_SQLALCHEMY
+        # shared, indexed copy of the JSON snapshot + event log (fallback only)
+        self.repo = AnnotationRepository.for_path(self.path)
+        # set by enable_vote_buffer()
+        self.vote_buffer = None
+        # changes are published here for GET /annotations/stream
+        self.events = events if events is not None else annotation_events.hub
 
     def _load(self):
         """Load from JSON file (fallback only)"""
-        if not self.path.exists():
-            return []
-        try:
-            with self.path.open('r', encoding='utf-8') as fh:
-                data = json.load(fh)
-                return data if isinstance(data, list) else []
-        except Exception:
-            return []
+        return self.repo.all()
 
     def _save(self, items):
         """Save to JSON file (fallback only)"""
-        try:
-            with self.path.open('w', encoding='utf-8') as fh:
-                json.dump(items, fh, ensure_ascii=False, indent=2)
-            return True
-        except Exception:
-            return False
+        return self.repo.replace_all(items)
+
+    @staticmethod
+    def _apply_vote(found, vote):
+        if vote == 'like':
+            found['likes'] = int(found.get('likes', 0)) + 1
+        else:
+            found['dislikes'] = int(found.get('dislikes', 0)) + 1
+        found['status'] = AnnotationsService._status_after_vote(found.get('status'), int(found.get('dislikes', 0)))
+
+    @classmethod
+    def _status_after_vote(cls, status, dislikes):
+        if dislikes >= cls.REMOVE_DISLIKES:
+            return 'removed'
+        if dislikes >= cls.WARN_DISLIKES:
+            return 'warning'
+        if status in ('warning', 'removed'):
+            return 'active'
+        return status
+
+    @staticmethod
+    def _apply_moderation(found, action):
+        if action == 'remove':
+            found['status'] = 'removed'
+        elif action == 'warn':
+            found['status'] = 'warning'
+        else:
+            found['status'] = 'active'
 
-    def list(self, date=None, area=None, user_id=None):
+    def list(self, date=None, area=None, user_id=None, status=None):
         """List annotations with optional filters.
 
         If user_id is supplied, only annotations created by that user_id are returned.
@@ -55,10 +87,19 @@ class AnnotationsService:
                     q = q.filter(Annotation.date == date)
                 if area:
                     q = q.filter(Annotation.area == area)
+                if status:
+                    q = q.filter(Annotation.status == status)
                 if user_id:
                     q = q.filter(Annotation.user_id == user_id)
-                rows = q.all()
-                return [{
+                pending = {}
+                if self.vote_buffer is None:
+                    rows = q.all()
+                else:
+                    # read the rows and the unwritten votes without a flush in between
+                    with self.vote_buffer.paused():
+                        rows = q.all()
+                        pending = self.vote_buffer.pending()
+                return [self._merge_pending({
                     'id': r.id,
                     'date': r.date,
                     'area': r.area,
@@ -69,28 +110,109 @@ class AnnotationsService:
                     'dislikes': r.dislikes,
                     'status': r.status,
                     'user_id': getattr(r, 'user_id', None),
-                } for r in rows]
+                }, *pending.get(r.id, (0, 0))) for r in rows]
             except Exception:
                 # Fallback to JSON if DB fails
-                items = self._load()
-                if date:
-                    items = [a for a in items if a.get('date') == date]
-                if area:
-                    items = [a for a in items if a.get('area') == area]
-                if user_id:
-                    items = [a for a in items if a.get('user_id') == user_id]
-                return items
+                pass
+        items = self.repo.list(date=date, area=area, user_id=user_id)
+        if status:
+            items = [a for a in items if a.get('status') == status]
+        return items
+
+    def page(self, date=None, area=None, user_id=None, status=None, limit=50, after=None, fields=None):
+        """One page of list() results in (created_at, id) order.
+
+        ``after`` is the (created_at, id) of the last annotation on the
+        previous page. Returns (items, next_after); next_after is None on the
+        last page. ``fields`` limits each item to those keys (see FIELDS),
+        and on the DB backend only those columns are selected. The DB query
+        is a range scan on a (date[, area], created_at, id) index, so a page
+        costs the same however many annotations the date has.
+        """
+        fields = tuple(fields or self.FIELDS)
+        if self.use_db:
+            try:
+                return self._page_db(date, area, user_id, status, limit, after, fields)
+            except SQLAlchemyError:
+                # Fallback to JSON if DB fails; a malformed ``after`` still raises
+                pass
+        items = self.repo.list(date=date, area=area, user_id=user_id)
+        if status:
+            items = [a for a in items if a.get('status') == status]
+        items.sort(key=lambda a: (a.get('created_at') or '', a['id']))
+        if after is not None:
+            start = (after[0] or '', after[1])
+            items = [a for a in items if (a.get('created_at') or '', a['id']) > start]
+        next_after = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_after = (items[-1].get('created_at'), items[-1]['id'])
+        return [{f: a.get(f) for f in fields} for a in items], next_after
+
+    def _page_db(self, date, area, user_id, status, limit, after, fields):
+        wanted = set(fields) | {'id', 'created_at'}
+        if self.vote_buffer is not None and wanted & {'likes', 'dislikes', 'status'}:
+            # pending votes change all three
+            wanted |= {'likes', 'dislikes', 'status'}
+        q = select(*[getattr(Annotation, f) for f in self.FIELDS if f in wanted and f != 'hour'])
+        if date:
+            q = q.where(Annotation.date == date)
+        if area:
+            q = q.where(Annotation.area == area)
+        if status:
+            q = q.where(Annotation.status == status)
+        if user_id:
+            q = q.where(Annotation.user_id == user_id)
+        if after is not None:
+            created = datetime.fromisoformat(after[0].rstrip('Z')) if after[0] else None
+            if created is None:
+                # rows without created_at sort first; continue among them by id
+                q = q.where(or_(and_(Annotation.created_at.is_(None), Annotation.id > after[1]),
+                                Annotation.created_at.isnot(None)))
+            else:
+                q = q.where(tuple_(Annotation.created_at, Annotation.id) > tuple_(created, after[1]))
+        q = q.order_by(Annotation.created_at, Annotation.id).limit(limit + 1)
+
+        sess = get_session()
+        pending = {}
+        if self.vote_buffer is None:
+            rows = sess.execute(q).all()
         else:
-            items = self._load()
-            if date:
-                items = [a for a in items if a.get('date') == date]
-            if area:
-                items = [a for a in items if a.get('area') == area]
-            if user_id:
-                items = [a for a in items if a.get('user_id') == user_id]
-            return items
+            with self.vote_buffer.paused():
+                rows = sess.execute(q).all()
+                pending = self.vote_buffer.pending()
+        items = []
+        for r in rows[:limit]:
+            item = dict(r._mapping)
+            item['created_at'] = item['created_at'].isoformat() if item['created_at'] else None
+            if r.id in pending:
+                self._merge_pending(item, *pending[r.id])
+            items.append(item)
+        next_after = (items[-1]['created_at'], items[-1]['id']) if len(rows) > limit else None
+        return [{f: item.get(f) for f in fields} for item in items], next_after
+
+    def _publish(self, kind, ann):
+        if ann:
+            try:
+                self.events.publish(kind, ann)
+            except Exception:
+                # streaming is best effort; never fail the write because of it
+                pass
+        return ann
 
     def create(self, date, area, text, author='anonymous', hour=None, user_id=None):
+        """Create a new annotation and publish a ``create`` event"""
+        return self._publish('create', self._create(date, area, text, author=author, hour=hour, user_id=user_id))
+
+    def vote(self, ann_id, vote):
+        """Vote on an annotation and publish a ``vote`` event"""
+        return self._publish('vote', self._vote(ann_id, vote))
+
+    def moderate(self, ann_id, action):
+        """Moderate an annotation and publish a ``moderate`` event"""
+        return self._publish('moderate', self._moderate(ann_id, action))
+
+    def _create(self, date, area, text, author='anonymous', hour=None, user_id=None):
         """Create a new annotation.
 
         Adds optional user_id (UUID from cookie) to the stored annotation. Works
@@ -147,75 +269,136 @@ class AnnotationsService:
             'status': 'active',
             'user_id': user_id
         }
-        items = self._load()
-        items.append(ann)
-        self._save(items)
-        return ann
+        return self.repo.add(ann)
 
-    def vote(self, ann_id, vote):
+    _vote_statements = {}
+
+    @classmethod
+    def _vote_statement(cls, returning):
+        """A single UPDATE that adds votes and recomputes the status.
+
+        The increments (``:d_likes``, ``:d_dislikes``) and the thresholds
+        are evaluated by the database against the row as it is when the
+        UPDATE runs, so concurrent votes can't overwrite each other the way
+        a read-modify-write in Python can. Built once and bound on execute.
+        """
+        stmt = cls._vote_statements.get(returning)
+        if stmt is not None:
+            return stmt
+        dislikes = func.coalesce(Annotation.dislikes, 0) + bindparam('d_dislikes', type_=Integer)
+        stmt = update(Annotation.__table__).where(Annotation.id == bindparam('ann_id')).values(
+            likes=func.coalesce(Annotation.likes, 0) + bindparam('d_likes', type_=Integer),
+            dislikes=dislikes,
+            status=case(
+                (dislikes >= cls.REMOVE_DISLIKES, 'removed'),
+                (dislikes >= cls.WARN_DISLIKES, 'warning'),
+                (or_(Annotation.status == 'warning', Annotation.status == 'removed'), 'active'),
+                else_=Annotation.status,
+            ),
+        )
+        if returning:
+            stmt = stmt.returning(*cls._vote_columns())
+        cls._vote_statements[returning] = stmt
+        return stmt
+
+    @staticmethod
+    def _vote_columns():
+        return (Annotation.id, Annotation.date, Annotation.area, Annotation.text, Annotation.author,
+                Annotation.created_at, Annotation.likes, Annotation.dislikes, Annotation.status)
+
+    @staticmethod
+    def _vote_row(row):
+        return {
+            'id': row.id,
+            'date': row.date,
+            'area': row.area,
+            'text': row.text,
+            'author': row.author,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'likes': row.likes,
+            'dislikes': row.dislikes,
+            'status': row.status,
+        }
+
+    def enable_vote_buffer(self, interval_ms=500, max_votes=1000):
+        """Buffer DB votes in memory and write them in batches (see VoteBuffer).
+
+        Does nothing on the JSON backend. Call vote_buffer.stop() on shutdown.
+        """
+        if self.use_db and self.vote_buffer is None:
+            self.vote_buffer = VoteBuffer(self._write_votes, interval_ms=interval_ms,
+                                          max_votes=max_votes).start()
+        return self.vote_buffer
+
+    def _write_votes(self, deltas):
+        """Apply {ann_id: (likes, dislikes)} in one transaction."""
+        sess = get_session()
+        try:
+            sess.connection().execute(self._vote_statement(False), [
+                {'ann_id': ann_id, 'd_likes': likes, 'd_dislikes': dislikes}
+                for ann_id, (likes, dislikes) in deltas.items()
+            ])
+            sess.commit()
+        finally:
+            sess.close()
+
+    @classmethod
+    def _merge_pending(cls, item, likes, dislikes):
+        """Add votes that are still in the buffer to an annotation read from the DB."""
+        if likes or dislikes:
+            item['likes'] = int(item.get('likes') or 0) + likes
+            item['dislikes'] = int(item.get('dislikes') or 0) + dislikes
+            item['status'] = cls._status_after_vote(item.get('status'), item['dislikes'])
+        return item
+
+    def _buffered_vote(self, ann_id, vote):
+        sess = get_session()
+        try:
+            # no flush can land between reading the row and counting the vote
+            with self.vote_buffer.paused():
+                row = sess.execute(select(*self._vote_columns()).where(Annotation.id == ann_id)).one_or_none()
+                if row is None:
+                    return None
+                likes, dislikes = self.vote_buffer.add(ann_id, vote)
+        finally:
+            sess.close()
+        return self._merge_pending(self._vote_row(row), likes, dislikes)
+
+    def _vote(self, ann_id, vote):
         """Vote on an annotation"""
         if self.use_db:
             try:
+                if self.vote_buffer is not None:
+                    return self._buffered_vote(ann_id, vote)
                 sess = get_session()
-                a = sess.query(Annotation).filter(Annotation.id == ann_id).one_or_none()
-                if not a:
-                    return None
-                if vote == 'like':
-                    a.likes += 1
-                else:
-                    a.dislikes += 1
-                d = a.dislikes
-                if d >= 5:
-                    a.status = 'removed'
-                elif d >= 3:
-                    a.status = 'warning'
-                else:
-                    if a.status in ('warning', 'removed') and d < 3:
-                        a.status = 'active'
-                sess.commit()
-                return {
-                    'id': a.id,
-                    'date': a.date,
-                    'area': a.area,
-                    'text': a.text,
-                    'author': a.author,
-                    'created_at': a.created_at.isoformat() if a.created_at else None,
-                    'likes': a.likes,
-                    'dislikes': a.dislikes,
-                    'status': a.status,
-                }
+                try:
+                    conn = sess.connection()
+                    params = {'ann_id': ann_id, 'd_likes': int(vote == 'like'), 'd_dislikes': int(vote != 'like')}
+                    if conn.dialect.update_returning:
+                        # SQLite >= 3.35: one statement, no follow-up read
+                        row = conn.execute(self._vote_statement(True), params).one_or_none()
+                    else:
+                        # read back inside the same transaction, before anyone else can write
+                        conn.execute(self._vote_statement(False), params)
+                        row = conn.execute(select(*self._vote_columns()).where(Annotation.id == ann_id)).one_or_none()
+                    sess.commit()
+                finally:
+                    sess.close()
+                return self._vote_row(row) if row is not None else None
             except Exception:
                 # Fallback to JSON
                 pass
-        
+
         # JSON fallback
-        items = self._load()
-        found = None
-        for a in items:
-            if a.get('id') == ann_id:
-                found = a
-                break
-        if not found:
-            return None
-        if vote == 'like':
-            found['likes'] = int(found.get('likes', 0)) + 1
-        else:
-            found['dislikes'] = int(found.get('dislikes', 0)) + 1
-        d = int(found.get('dislikes', 0))
-        if d >= 5:
-            found['status'] = 'removed'
-        elif d >= 3:
-            found['status'] = 'warning'
-        else:
-            if found.get('status') in ('warning', 'removed') and d < 3:
-                found['status'] = 'active'
-        self._save(items)
-        return found
+        return self.repo.update(ann_id, lambda found: self._apply_vote(found, vote), op='vote', vote=vote)
 
-    def moderate(self, ann_id, action):
+    def _moderate(self, ann_id, action):
         """Moderate an annotation"""
         if self.use_db:
             try:
+                if self.vote_buffer is not None:
+                    # earlier votes must not be applied on top of the moderation
+                    self.vote_buffer.flush()
                 sess = get_session()
                 a = sess.query(Annotation).filter(Annotation.id == ann_id).one_or_none()
                 if not a:
@@ -243,19 +426,5 @@ class AnnotationsService:
                 pass
         
         # JSON fallback
-        items = self._load()
-        found = None
-        for a in items:
-            if a.get('id') == ann_id:
-                found = a
-                break
-        if not found:
-            return None
-        if action == 'remove':
-            found['status'] = 'removed'
-        elif action == 'warn':
-            found['status'] = 'warning'
-        else:
-            found['status'] = 'active'
-        self._save(items)
-        return found
+        return self.repo.update(ann_id, lambda found: self._apply_moderation(found, action),
+                                op='moderate', action=action)
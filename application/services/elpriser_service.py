@@ -1,25 +1,109 @@
 from pathlib import Path
+import hashlib
 import json
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date, timedelta
+
+import numpy as np
+
+from .memo import LRUMemo
+from .price_archive import PriceArchive
+from .price_cache import PriceCache
+from .price_series import LOCAL_TZ, PriceSeries, align_series, format_iso_times, parse_iso_times, round2
+from .rollups import PERIODS, RollupStore, resample
+from .singleflight import SingleFlight
+
+# the SQLite price store is optional, like the annotations DB backend
+try:
+    from .price_store import PriceStore
+except ImportError:
+    PriceStore = None
+
+
+def _json_floats(values):
+    """Round to 2 decimals and turn NaN into None, for JSON responses."""
+    return [None if v != v else v for v in round2(values).tolist()]
+
 
 class ElpriserService:
     """Service responsible for fetching and parsing elpriser payloads.
 
     Public methods:
     - parse_raw_payload(payload) -> (labels, values, summary)
+    - parse_series(series) -> (labels, values, summary) for a PriceSeries
     - load_persisted(path) -> payload (reads elpriser_data.json)
+    - get_prices(project_root, year, month, day, prisklass) -> payload (cache first, then upstream)
+    - load_cached(project_root, year, month, day, prisklass) -> payload or None (cache only)
+    - get_series(project_root, year, month, day, prisklass) -> PriceSeries or None
+    - get_parsed(project_root, year, month, day, prisklass) -> (series, labels, values, summary) or None, memoized
+    - fetch_range(project_root, start, end, zones) -> yields (day, zone, payload) as downloads finish
+    - resample(series, period) -> hourly/daily/weekly/monthly mean, median, percentiles, std
+    - rollups(project_root, zone, start, end, period) -> rollup rows for cached days (day/month persisted)
+    - series_between(project_root, zone, start, end) -> one PriceSeries for a date range (archive, then cache)
+    - archive_for(project_root) -> the memory-mapped PriceArchive, or None if none was built
+    - iter_stored(project_root, zone, start, end) -> PriceSeries chunks from archive/price table/cache, no fetching
+    - cheapest_windows(series, slots, k) -> the k cheapest non-overlapping windows of N slots
+    - compare_zones(project_root, start, end, zones) -> zones aligned per slot with spreads and ranking
+    - stored_series(project_root, zone, start, end) -> PriceSeries from the SQLite price table
+    - get_day(project_root, year, month, day, prisklass) -> (series, labels, values, summary), store first
+    - upstream_stats() -> fetch/coalescing counters, circuit breakers, negative cache size
     """
 
+    CACHE_DIRNAME = 'price_cache'
+    # built offline by tools/build_price_archive.py; used when present
+    ARCHIVE_DIRNAME = 'price_archive'
+    ZONES = ('SE1', 'SE2', 'SE3', 'SE4')
+    DEFAULT_MAX_WORKERS = 8
+    # most days one request may download; the rest of a range is served from
+    # the archive/cache only, so one GET can't fan out into hundreds of fetches
+    MAX_FETCH_DAYS = 31
+    _caches = {}
+    _caches_lock = threading.Lock()
+    _rollups = {}
+    _stores = {}
+    _archives = {}
+    # concurrent get_prices() calls for the same cache key share one download
+    _flights = SingleFlight()
+    # parsed (series, labels, values, summary) keyed by the cached payload's sha256
+    MEMO_SIZE = 256
+    _memo = LRUMemo(MEMO_SIZE)
+
+    # Fallback keys probed (in order) for the timestamp and price of each item
+    TIME_KEYS = ('time_start', 'time', 'start', 'date', 't', 'hour')
+    PRICE_KEYS = ('SEK_per_kWh', 'price', 'value', 'spot_price', 'SpotPrice')
+
     @staticmethod
-    def parse_raw_payload(priser):
+    def _payload_items(priser):
         # Normalize possible payload shapes into a list of items
         if isinstance(priser, dict) and 'data' in priser and isinstance(priser['data'], list):
-            items = priser['data']
+            return priser['data']
         elif isinstance(priser, list):
-            items = priser
+            return priser
+        else:
+            return priser.get('hours', []) if isinstance(priser, dict) else []
+
+    @classmethod
+    def parse_raw_payload(cls, priser):
+        """Return (labels, values, summary) for a raw payload.
+
+        Uniform payloads (the upstream format) take the vectorized
+        parse_arrays() path; anything else is parsed item by item. Both give
+        identical results.
+        """
+        items = cls._payload_items(priser)
+        parsed = cls.parse_arrays(items)
+        if parsed is None:
+            labels, values = cls._parse_items(items)
+            values_arr = np.asarray(values, dtype=np.float64)
         else:
-            items = priser.get('hours', []) if isinstance(priser, dict) else []
+            _, labels, values_arr = parsed
+            values = values_arr.tolist()
+        return labels, values, cls.summarize(values_arr)
 
+    @classmethod
+    def _parse_items(cls, items):
+        """Item-by-item parser; handles any payload shape."""
         labels = []
         values = []
         for idx, item in enumerate(items):
@@ -51,15 +135,121 @@ class ElpriserService:
             if val is not None:
                 labels.append(label)
                 values.append(round(val, 2))
+        return labels, values
 
-        summary = {'avg': None, 'min': None, 'max': None}
-        if values:
-            summary = {
-                'avg': round(sum(values) / len(values), 2),
-                'min': round(min(values), 2),
-                'max': round(max(values), 2),
-            }
-        return labels, values, summary
+    @staticmethod
+    def summarize(values):
+        """Return {'avg', 'min', 'max'} for an array of öre/kWh values."""
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return {'avg': None, 'min': None, 'max': None}
+        # cumsum adds left to right like sum(), so the average matches it bit for bit
+        total = float(np.cumsum(values)[-1])
+        return {
+            'avg': round(total / values.size, 2),
+            'min': round(float(values.min()), 2),
+            'max': round(float(values.max()), 2),
+        }
+
+    @classmethod
+    def _detect_columns(cls, items):
+        """Detect the time/price keys once; return (time_key, price_key, later_price_keys) or None.
+
+        Only payloads where every item is a dict with the same keys qualify,
+        and no key earlier in the fallback chain may be present, so a single
+        key lookup per item gives the same answer as probing the whole chain.
+        """
+        if not items or type(items[0]) is not dict:
+            return None
+        first = items[0]
+        keys = first.keys()
+        time_key = next((k for k in cls.TIME_KEYS if first.get(k)), None)
+        price_key = next((k for k in cls.PRICE_KEYS if first.get(k)), None)
+        if time_key is None or price_key is None:
+            return None
+        if any(k in keys for k in cls.TIME_KEYS[:cls.TIME_KEYS.index(time_key)]):
+            return None
+        if any(k in keys for k in cls.PRICE_KEYS[:cls.PRICE_KEYS.index(price_key)]):
+            return None
+        for item in items:
+            if type(item) is not dict or item.keys() != keys:
+                return None
+        later = [k for k in cls.PRICE_KEYS[cls.PRICE_KEYS.index(price_key) + 1:] if k in keys]
+        return time_key, price_key, later
+
+    @classmethod
+    def parse_arrays(cls, items):
+        """Vectorized parse of a uniform payload.
+
+        Returns (epoch seconds int64 array, labels, öre/kWh float64 array) or
+        None when the payload needs the item-by-item parser.
+        """
+        cols = cls._detect_columns(items)
+        if cols is None:
+            return None
+        time_key, price_key, later_price_keys = cols
+        times = [item[time_key] for item in items]
+        prices = [item[price_key] for item in items]
+
+        if not all(times):
+            return None
+        keep = None
+        if not all(prices):
+            # a falsy price would fall through to the next key in the chain
+            if later_price_keys:
+                return None
+            keep = np.fromiter((bool(p) for p in prices), dtype=bool, count=len(prices))
+        if not {type(p) for p in prices} <= {float, int}:
+            return None
+
+        parsed_times = parse_iso_times(times)
+        if parsed_times is None:
+            return None
+        epoch, _, labels = parsed_times
+        values = round2(np.asarray(prices, dtype=np.float64) * 100.0)
+        if keep is not None:
+            epoch, values = epoch[keep], values[keep]
+            labels = [label for label, k in zip(labels, keep) if k]
+        return epoch, labels, values
+
+    @classmethod
+    def parse_series(cls, series: PriceSeries):
+        """Return (labels, values, summary) for a PriceSeries.
+
+        Gives the same result as parse_raw_payload() on the payload the series
+        was built from (zero-priced slots are skipped there, so they are here).
+        """
+        keep = (series.sek != 0) & ~np.isnan(series.sek)
+        labels = series.labels()
+        if not keep.all():
+            labels = [label for label, k in zip(labels, keep.tolist()) if k]
+        values = round2(series.sek[keep] * 100.0)
+        return labels, values.tolist(), cls.summarize(values)
+
+    @staticmethod
+    def to_series(payload, zone=None):
+        """Return a PriceSeries for ``payload``, or None if it isn't in the upstream shape."""
+        if not payload:
+            return None
+        try:
+            return PriceSeries.from_payload(payload, zone=zone)
+        except ValueError:
+            return None
+
+    @classmethod
+    def _parse_for_memo(cls, payload, zone=None):
+        if not payload:
+            return None
+        series = cls.to_series(payload, zone=zone)
+        if series is not None:
+            labels, values, summary = cls.parse_series(series)
+        else:
+            labels, values, summary = cls.parse_raw_payload(payload)
+        return series, labels, values, summary
+
+    @classmethod
+    def memo_stats(cls):
+        return cls._memo.stats()
 
     @staticmethod
     def load_persisted(project_root: Path):
@@ -71,3 +261,545 @@ class ElpriserService:
                 return json.load(fh)
         except Exception:
             return None
+
+    @classmethod
+    def cache_for(cls, project_root: Path) -> PriceCache:
+        """Return the process-wide PriceCache for ``project_root``."""
+        root = Path(project_root) / cls.CACHE_DIRNAME
+        with cls._caches_lock:
+            cache = cls._caches.get(root)
+            if cache is None:
+                cache = cls._caches[root] = PriceCache(root)
+            return cache
+
+    @classmethod
+    def load_cached(cls, project_root: Path, year, month, day, prisklass):
+        """Return the cached payload for a date/prisklass without touching upstream."""
+        try:
+            key = PriceCache.make_key(year, month, day, prisklass)
+        except (TypeError, ValueError):
+            return None
+        return cls.cache_for(project_root).get(key)
+
+    @classmethod
+    def get_parsed(cls, project_root: Path, year, month, day, prisklass, strict=False):
+        """Return (series, labels, values, summary) for a date/prisklass, or None.
+
+        Parsed results are memoized per content hash of the cached payload, so
+        repeat views skip the decompress/json.load/parse work entirely. When
+        /fetch_elpriser stores a different payload for a key its hash changes
+        and the next lookup parses the new one. ``strict`` is passed on to
+        get_prices() for cache misses. The returned lists are shared; don't
+        mutate them.
+        """
+        try:
+            from ..elpriser_api import ElpriserAPI
+        except (ImportError, ValueError):
+            from elpriser_api import ElpriserAPI
+
+        api = ElpriserAPI(year=year, month=month, day=day, prisklass=prisklass)
+        key = PriceCache.make_key(api.year, api.month, api.day, api.prisklass)
+        cache = cls.cache_for(project_root)
+        entry = cache.entry(key)
+        if entry is None:
+            payload = cls.get_prices(project_root, year, month, day, prisklass, strict=strict)
+            entry = cache.entry(key)
+            if entry is None:
+                # fetched but not cached (e.g. disk full): parse without memoizing
+                return cls._parse_for_memo(payload, zone=api.prisklass)
+        return cls._memo_parsed(cache, entry['sha256'], api.prisklass)
+
+    @classmethod
+    def _memo_parsed(cls, cache, digest, zone):
+        return cls._memo.get_or_compute(
+            ('sha256', digest, zone),
+            lambda: cls._parse_for_memo(cache.load(digest), zone=zone),
+        )
+
+    @classmethod
+    def get_series(cls, project_root: Path, year, month, day, prisklass, strict=False):
+        """Like get_prices() but returns a PriceSeries (None on failure)."""
+        return cls.to_series(cls.get_prices(project_root, year, month, day, prisklass, strict=strict),
+                             zone=str(prisklass).upper())
+
+    @classmethod
+    def get_prices(cls, project_root: Path, year, month, day, prisklass, strict=False):
+        """Return the payload for a date/prisklass, fetching upstream only on a cache miss.
+
+        Concurrent callers missing the cache for the same key wait on a single
+        in-flight download and share its result. If the upstream fetch fails
+        None is returned, or with ``strict=True`` the PricesUnavailable /
+        PricesNotPublished error is raised. Failures and incomplete days
+        (see PriceCache.is_complete_day()) never reach the price cache.
+        """
+        try:
+            from ..elpriser_api import ElpriserAPI, PricesUnavailable
+        except (ImportError, ValueError):
+            from elpriser_api import ElpriserAPI, PricesUnavailable
+
+        api = ElpriserAPI(year=year, month=month, day=day, prisklass=prisklass)
+        key = PriceCache.make_key(api.year, api.month, api.day, api.prisklass)
+        cache = cls.cache_for(project_root)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            return cls._flights.do((str(cache.root), key), cls._fetch_and_store, api, cache, key)
+        except PricesUnavailable:
+            if strict:
+                raise
+            return None
+
+    @classmethod
+    def _fetch_and_store(cls, api, cache, key):
+        # another flight may have filled the cache between our miss and now
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        priser = api.fetch_prices()
+        if priser and not PriceCache.is_complete_day(key, priser):
+            # cache entries never expire, so a partial or malformed day is served but not kept
+            return priser
+        if priser:
+            cache.put(key, priser)
+            try:
+                # parses through the memo, so the view that asked for this day gets a hit
+                cls._rollup_store(cache).add_day(key)
+            except Exception:
+                # rollups are derived data; reads rebuild a missing day
+                pass
+            cls._ingest(cache.root.parent, cls.to_series(priser, zone=api.prisklass))
+        elif getattr(api, 'error', None) is not None:
+            raise api.error
+        return priser
+
+    @classmethod
+    def _rollup_store(cls, cache: PriceCache) -> RollupStore:
+        with cls._caches_lock:
+            store = cls._rollups.get(cache.root)
+            if store is None:
+                def load_series(digest, zone):
+                    parsed = cls._memo_parsed(cache, digest, zone)
+                    return parsed[0] if parsed else None
+                store = cls._rollups[cache.root] = RollupStore(cache, load_series=load_series)
+            return store
+
+    @classmethod
+    def price_store(cls, project_root: Path):
+        """Return the PriceStore for ``project_root``, or None without SQLAlchemy.
+
+        The table lives in the app database (models.get_engine()) for the app's own
+        project root and in ``<project_root>/annotations.db`` otherwise.
+        """
+        if PriceStore is None:
+            return None
+        root = Path(project_root).resolve()
+        try:
+            from .. import models
+        except (ImportError, ValueError):
+            import models
+        app_root = root == Path(models.PROJECT_ROOT).resolve()
+        with cls._caches_lock:
+            store = cls._stores.get(root)
+            # FlaskApp may have swapped the app engine since (models.configure_engine)
+            if store is None or (app_root and store.engine is not models.get_engine()):
+                engine = models.get_engine() if app_root else models.make_engine(f"sqlite:///{root / 'annotations.db'}")
+                store = cls._stores[root] = PriceStore(engine).create()
+            return store
+
+    @classmethod
+    def _ingest(cls, project_root: Path, series):
+        """Write ``series`` to the price store; the cache stays the source of truth."""
+        if series is None or not len(series):
+            return
+        try:
+            store = cls.price_store(project_root)
+            if store is not None:
+                store.upsert_series(series)
+        except Exception:
+            pass
+
+    @classmethod
+    def stored_series(cls, project_root: Path, zone, start: date, end: date = None):
+        """Return the stored slots of ``zone`` for the local days in [start, end].
+
+        Empty if nothing is stored, the database can't be read or SQLAlchemy
+        is missing; nothing is fetched.
+        """
+        zone = str(zone).upper()
+        try:
+            store = cls.price_store(project_root)
+            if store is not None:
+                return store.series_for_days(zone, start, end)
+        except Exception:
+            pass
+        return PriceSeries.empty(zone)
+
+    @classmethod
+    def get_day(cls, project_root: Path, year, month, day, prisklass):
+        """Return (series, labels, values, summary) for one day, or None.
+
+        Reads the price table first; the parse is memoized by the stored
+        slots' content. Days that aren't stored yet go through get_parsed()
+        (cache, then upstream). A download is written to the table as it is
+        cached; a day that was already cached (before the table existed, or
+        with an in-memory database since the last restart) is written here.
+        """
+        zone = str(prisklass).upper()
+        if zone not in cls.ZONES:
+            raise ValueError(f"Unknown zone {zone!r}")
+        try:
+            day_date = date(int(year), int(month), int(day))
+        except (TypeError, ValueError):
+            day_date = None
+        if day_date is not None:
+            series = cls.stored_series(project_root, zone, day_date)
+            if len(series):
+                return cls._parse_stored(series)
+        key = PriceCache.make_key(year, month, day, zone)
+        was_cached = cls.cache_for(project_root).entry(key) is not None
+        parsed = cls.get_parsed(project_root, year, month, day, zone)
+        if parsed and was_cached:
+            cls._ingest(project_root, parsed[0])
+        return parsed
+
+    @classmethod
+    def _parse_stored(cls, series):
+        digest = hashlib.sha256(b''.join(
+            getattr(series, f).tobytes() for f in ('start', 'end', 'offset', 'sek'))).hexdigest()
+        return cls._memo.get_or_compute(('stored', series.zone, digest),
+                                        lambda: (series,) + cls.parse_series(series))
+
+    @staticmethod
+    def resample(series: PriceSeries, period):
+        """Aggregate a series to 'hour', 'day', 'week' or 'month' rows (see rollups.resample)."""
+        return resample(series, period)
+
+    @classmethod
+    def rollups(cls, project_root: Path, zone, start: date, end: date, period='day'):
+        """Return rollup rows for the cached days of ``zone`` in [start, end].
+
+        Daily and monthly rows come from the persisted RollupStore, so a
+        year-long chart reads ~365 (or 12) rows instead of every raw slot.
+        Hourly and weekly rows are resampled from the cached series. Days
+        that aren't cached are left out; nothing is fetched upstream.
+        """
+        zone = str(zone).upper()
+        if zone not in cls.ZONES:
+            raise ValueError(f"Unknown zone {zone!r}")
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period {period!r}; expected one of {', '.join(PERIODS)}")
+        cache = cls.cache_for(project_root)
+        store = cls._rollup_store(cache)
+        if period == 'day':
+            return store.daily(zone, start.isoformat(), end.isoformat())
+        if period == 'month':
+            return store.monthly(zone, start.isoformat(), end.isoformat())
+        if period == 'week':
+            # widen to whole weeks so the first and last buckets are complete
+            start = start - timedelta(days=start.weekday())
+            end = end + timedelta(days=6 - end.weekday())
+        return resample(cls.series_between(project_root, zone, start, end, fetch=False), period)
+
+    @classmethod
+    def series_between(cls, project_root: Path, zone, start: date, end: date, fetch=True):
+        """Return one PriceSeries for ``zone`` covering the days in [start, end].
+
+        With ``fetch`` up to MAX_FETCH_DAYS of the days missing from the
+        cache are downloaded first (see _fetch_missing()); days that still
+        aren't available are left out, so the series may have gaps. Parsed
+        days come from the memo.
+        """
+        zone = str(zone).upper()
+        if zone not in cls.ZONES:
+            raise ValueError(f"Unknown zone {zone!r}")
+        archive = cls.archive_for(project_root)
+        archived = archive.zone(zone) if archive is not None else None
+        if archived is not None and archived.covers(start, end):
+            # one slice of the memory map, no copy
+            return archived.series(start, end)
+
+        cache = cls.cache_for(project_root)
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        if fetch:
+            cls._fetch_missing(project_root, [(d, zone) for d in days])
+        parts = []
+        for d in days:
+            if archived is not None:
+                part = archived.series(d)
+                if len(part):
+                    parts.append(part)
+                    continue
+            entry = cache.entry(PriceCache.make_key(d.year, d.month, d.day, zone))
+            parsed = cls._memo_parsed(cache, entry['sha256'], zone) if entry else None
+            if parsed and parsed[0] is not None:
+                parts.append(parsed[0])
+        return PriceSeries.concat(parts, zone=zone)
+
+    @classmethod
+    def iter_stored(cls, project_root: Path, zone, start: date, end: date, chunk_days=31):
+        """Yield the stored slots of ``zone`` for [start, end] as PriceSeries chunks, oldest first.
+
+        Each chunk covers at most ``chunk_days`` days, so callers streaming a
+        long range hold one chunk at a time. A day comes from the archive,
+        else the price table, else the price cache; nothing is fetched.
+        """
+        zone = str(zone).upper()
+        if zone not in cls.ZONES:
+            raise ValueError(f"Unknown zone {zone!r}")
+        archive = cls.archive_for(project_root)
+        archived = archive.zone(zone) if archive is not None else None
+        cache = cls.cache_for(project_root)
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(end, chunk_start + timedelta(days=chunk_days - 1))
+            if archived is not None and archived.covers(chunk_start, chunk_end):
+                yield archived.series(chunk_start, chunk_end)
+                chunk_start = chunk_end + timedelta(days=1)
+                continue
+            stored = cls.stored_series(project_root, zone, chunk_start, chunk_end)
+            local_days = (stored.start + stored.offset) // 86400
+            parts = []
+            for i in range((chunk_end - chunk_start).days + 1):
+                d = chunk_start + timedelta(days=i)
+                part = archived.series(d) if archived is not None else None
+                if part is None or not len(part):
+                    number = (d - date(1970, 1, 1)).days
+                    lo, hi = np.searchsorted(local_days, [number, number + 1])
+                    part = stored[int(lo):int(hi)]
+                if not len(part):
+                    entry = cache.entry(PriceCache.make_key(d.year, d.month, d.day, zone))
+                    parsed = cls._memo_parsed(cache, entry['sha256'], zone) if entry else None
+                    part = parsed[0] if parsed and parsed[0] is not None else None
+                if part is not None and len(part):
+                    parts.append(part)
+            if parts:
+                yield PriceSeries.concat(parts, zone=zone)
+            chunk_start = chunk_end + timedelta(days=1)
+
+    @classmethod
+    def archive_for(cls, project_root: Path):
+        """Return the PriceArchive under ``project_root``, or None if it hasn't been built."""
+        root = Path(project_root) / cls.ARCHIVE_DIRNAME
+        if not root.is_dir():
+            return None
+        with cls._caches_lock:
+            archive = cls._archives.get(root)
+            if archive is None:
+                archive = cls._archives[root] = PriceArchive(root)
+            return archive
+
+    @staticmethod
+    def last_published_day():
+        """Tomorrow in Stockholm: upstream has no prices for any later day."""
+        return datetime.now(LOCAL_TZ).date() + timedelta(days=1)
+
+    @classmethod
+    def _fetch_missing(cls, project_root: Path, pairs, max_days=None):
+        """Download the (day, zone) pairs that aren't archived or cached yet, in one concurrent batch.
+
+        Days after last_published_day() are skipped, and only the latest
+        ``max_days`` days with something missing (default MAX_FETCH_DAYS)
+        are downloaded.
+        """
+        cache = cls.cache_for(project_root)
+        archive = cls.archive_for(project_root)
+        last = cls.last_published_day()
+        missing = [(d, z) for d, z in pairs
+                   if d <= last
+                   and cache.entry(PriceCache.make_key(d.year, d.month, d.day, z)) is None
+                   and (archive is None or not archive.zone(z).covers(d))]
+        wanted = set(sorted({d for d, _ in missing}, reverse=True)[:max_days or cls.MAX_FETCH_DAYS])
+        missing = [(d, z) for d, z in missing if d in wanted]
+        if not missing:
+            return
+        try:
+            from ..http_client import get_client
+        except (ImportError, ValueError):
+            from http_client import get_client
+        for _ in cls.fetch_many(project_root, missing, max_workers=get_client().max_concurrency):
+            pass
+
+    @classmethod
+    def compare_zones(cls, project_root: Path, start: date, end: date, zones=None):
+        """Compare zones slot by slot over the days in [start, end].
+
+        All zones are aligned on one time axis and every statistic is
+        computed on the resulting zones x slots matrix at once. Returns a
+        JSON-ready dict: ``time_start`` (ISO), ``prices`` per zone, per-slot
+        ``spread`` (most minus least expensive zone), ``daily`` spread stats
+        with each zone's daily mean, and ``ranking`` (cheapest zone first).
+        Prices are öre/kWh; missing slots are None. Missing days are fetched,
+        at most MAX_FETCH_DAYS downloads in all (so fewer days the more zones
+        are compared); the rest comes from the archive and cache only.
+        """
+        zones = [str(z).upper() for z in (zones or cls.ZONES)]
+        unknown = [z for z in zones if z not in cls.ZONES]
+        if unknown:
+            raise ValueError(f"Unknown zone {unknown[0]!r}")
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        cls._fetch_missing(project_root, [(d, z) for d in days for z in zones],
+                           max_days=max(1, cls.MAX_FETCH_DAYS // len(zones)))
+        series = [cls.series_between(project_root, z, start, end, fetch=False) for z in zones]
+        times, offset, sek = align_series(series)
+        prices = sek * 100.0
+
+        present = ~np.isnan(prices)
+        compared = present.sum(axis=0) >= 2
+        spread = np.where(compared, np.max(np.where(present, prices, -np.inf), axis=0)
+                          - np.min(np.where(present, prices, np.inf), axis=0), np.nan)
+        cheapest = np.argmin(np.where(present, prices, np.inf), axis=0)
+        cheapest_counts = np.bincount(cheapest[compared], minlength=len(zones))
+        totals = np.where(present, prices, 0.0)
+
+        # per local day; the aligned times are sorted, so each day is one run
+        local_days = (times + offset) // 86400
+        daily = []
+        if times.size:
+            starts = np.flatnonzero(np.r_[True, local_days[1:] != local_days[:-1]])
+            day_sums = np.add.reduceat(totals, starts, axis=1)
+            day_counts = np.add.reduceat(present, starts, axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                day_means = day_sums / day_counts
+                spread_counts = np.add.reduceat(compared, starts)
+                mean_spread = np.add.reduceat(np.where(compared, spread, 0.0), starts) / spread_counts
+            max_spread = np.fmax.reduceat(spread, starts)
+            min_spread = np.fmin.reduceat(spread, starts)
+            labels = local_days[starts].astype('datetime64[D]').astype(str).tolist()
+            columns = [_json_floats(a) for a in (mean_spread, min_spread, max_spread)]
+            zone_means = [_json_floats(row) for row in day_means]
+            for i, label in enumerate(labels):
+                daily.append({
+                    'date': label,
+                    'mean_spread': columns[0][i],
+                    'min_spread': columns[1][i],
+                    'max_spread': columns[2][i],
+                    'zone_means': {z: zone_means[j][i] for j, z in enumerate(zones)},
+                })
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = totals.sum(axis=1) / present.sum(axis=1)
+        mean_values = _json_floats(means)
+        ranking = sorted(
+            ({'zone': z, 'mean': mean_values[j], 'cheapest_slots': int(cheapest_counts[j])}
+             for j, z in enumerate(zones)),
+            key=lambda r: (r['mean'] is None, r['mean']),
+        )
+        return {
+            'zones': zones,
+            'time_start': format_iso_times(times, offset),
+            'prices': {z: _json_floats(prices[j]) for j, z in enumerate(zones)},
+            'spread': _json_floats(spread),
+            'daily': daily,
+            'ranking': ranking,
+        }
+
+    @staticmethod
+    def cheapest_windows(series: PriceSeries, slots, k=1):
+        """Return the ``k`` cheapest non-overlapping windows of ``slots`` consecutive slots.
+
+        One cumulative sum gives the mean of every window in O(n); a window
+        may not span a gap in the data (a missing day) or a slot without a
+        price. Windows are picked greedily, cheapest first, and each pick
+        rules out the windows overlapping it, so a query is O(k*n). Returns
+        dicts with ``start``/``end`` (ISO), ``slots`` and the window's
+        ``mean``/``min``/``max`` in öre/kWh, cheapest first.
+        """
+        slots = int(slots)
+        if slots < 1:
+            raise ValueError('slots must be at least 1')
+        n = len(series)
+        if n < slots or k < 1:
+            return []
+        prices = series.sek * 100.0
+        missing = np.isnan(prices)
+        gap = np.r_[False, series.start[1:] != series.end[:-1]]
+        csum = np.r_[0.0, np.cumsum(np.where(missing, 0.0, prices))]
+        cmissing = np.r_[0, np.cumsum(missing)]
+        cgap = np.r_[0, np.cumsum(gap)]
+        # window i covers slots i .. i+slots-1; a gap at j means j doesn't follow j-1
+        ok = (cmissing[slots:] == cmissing[:-slots]) & (cgap[slots:] == cgap[1:n - slots + 2])
+        means = np.where(ok, (csum[slots:] - csum[:-slots]) / slots, np.inf)
+
+        picks = []
+        for _ in range(k):
+            i = int(np.argmin(means))
+            if not np.isfinite(means[i]):
+                break
+            picks.append(i)
+            means[max(0, i - slots + 1):i + slots] = np.inf
+        if not picks:
+            return []
+        idx = np.asarray(picks)
+        last = idx + slots - 1
+        starts = format_iso_times(series.start[idx], series.offset[idx])
+        ends = format_iso_times(series.end[last], series.offset[last])
+        windows = []
+        for j, i in enumerate(picks):
+            window = prices[i:i + slots]
+            stats = round2([window.mean(), window.min(), window.max()]).tolist()
+            windows.append({'start': starts[j], 'end': ends[j], 'slots': slots,
+                            'mean': stats[0], 'min': stats[1], 'max': stats[2]})
+        return windows
+
+    @classmethod
+    def upstream_stats(cls):
+        """Return fetch counters, circuit breaker states and the negative cache size."""
+        try:
+            from ..elpriser_api import ElpriserAPI
+            from ..http_client import get_client
+        except (ImportError, ValueError):
+            from elpriser_api import ElpriserAPI
+            from http_client import get_client
+        stats = cls._flights.stats()
+        stats['breakers'] = get_client().breaker_states()
+        stats['negative_cached'] = ElpriserAPI.negative_cache_size()
+        stats['memo'] = cls.memo_stats()
+        return stats
+
+    @classmethod
+    def fetch_many(cls, project_root: Path, pairs, max_workers=None):
+        """Fetch many (day, zone) pairs concurrently on a bounded thread pool.
+
+        Yields ``(day, zone, payload)`` in completion order, so callers can
+        start using the first results while the rest are still downloading.
+        ``payload`` is None for pairs that could not be fetched. Every fetch
+        goes through get_prices(), so cached days are returned without I/O.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return
+        workers = max(1, min(max_workers or cls.DEFAULT_MAX_WORKERS, len(pairs)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='elpriser-fetch')
+        try:
+            futures = {
+                executor.submit(cls.get_prices, project_root, d.year, d.month, d.day, zone): (d, zone)
+                for d, zone in pairs
+            }
+            for future in as_completed(futures):
+                d, zone = futures[future]
+                try:
+                    payload = future.result()
+                except Exception:
+                    payload = None
+                yield d, zone, payload
+        finally:
+            # drop queued downloads if the consumer stopped iterating early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def fetch_range(cls, project_root: Path, start: date, end: date, zones=None, max_workers=None):
+        """Fetch every day in [start, end] for each zone; see fetch_many().
+
+        The default worker count matches the upstream client's concurrency cap.
+        """
+        zones = list(zones or cls.ZONES)
+        if max_workers is None:
+            try:
+                from ..http_client import get_client
+            except (ImportError, ValueError):
+                from http_client import get_client
+            max_workers = get_client().max_concurrency
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        return cls.fetch_many(project_root, ((d, z) for d in days for z in zones), max_workers=max_workers)
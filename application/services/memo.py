@@ -0,0 +1,66 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUMemo:
+    """Bounded, thread-safe LRU memo with hit/miss/eviction counters.
+
+    Keys must change whenever the underlying data changes (a content hash,
+    or a file's mtime and size), so entries never need explicit invalidation;
+    stale ones simply age out.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, self._MISSING)
+            if value is self._MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the memoized value for ``key``, calling ``compute()`` on a miss.
+
+        None results are not memoized.
+        """
+        value = self.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,149 @@
+from pathlib import Path
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from .elpriser_service import ElpriserService
+from .price_cache import PriceCache
+from .price_series import LOCAL_TZ
+
+logger = logging.getLogger(__name__)
+
+
+class FileLease:
+    """Cross-process lease backed by an exclusively created lock file.
+
+    Only one process can hold the lease at a time. A lease whose file is older
+    than ``ttl`` seconds is treated as abandoned (its holder crashed) and can
+    be taken over.
+    """
+
+    def __init__(self, path: Path, ttl: float):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.token = None
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        token = f"{os.getpid()}:{uuid.uuid4()}"
+        for _ in range(2):
+            try:
+                fd = os.open(str(self.path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - self.path.stat().st_mtime
+                except OSError:
+                    continue
+                if age < self.ttl:
+                    return False
+                # stale lease: remove it and try once more
+                try:
+                    os.unlink(str(self.path))
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                fh.write(token)
+            self.token = token
+            return True
+        return False
+
+    def release(self):
+        if self.token is None:
+            return
+        try:
+            if self.path.read_text(encoding='utf-8') == self.token:
+                os.unlink(str(self.path))
+        except OSError:
+            pass
+        self.token = None
+
+
+class PrefetchScheduler:
+    """Background thread that keeps today's and tomorrow's prices in the cache.
+
+    Every ``interval`` seconds it makes sure today's payload is cached for all
+    zones and, once the upstream publication window has opened
+    (``publish_hour`` Stockholm time), polls for tomorrow's payloads until they
+    are cached. A FileLease in the cache directory ensures only one worker
+    process prefetches at a time.
+    """
+
+    LEASE_NAME = 'prefetch.lease'
+
+    def __init__(self, project_root: Path, zones=None, publish_hour=13, interval=600, initial_delay=5):
+        self.project_root = Path(project_root)
+        self.zones = list(zones or ElpriserService.ZONES)
+        self.publish_hour = publish_hour
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.lease = FileLease(ElpriserService.cache_for(self.project_root).root / self.LEASE_NAME,
+                               ttl=max(interval, 60))
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, project_root: Path):
+        return cls(
+            project_root,
+            zones=config.get('ALLOWED_PRISKLASSER'),
+            publish_hour=config.get('PREFETCH_PUBLISH_HOUR', 13),
+            interval=config.get('PREFETCH_INTERVAL_SECONDS', 600),
+            initial_delay=config.get('PREFETCH_INITIAL_DELAY', 5),
+        )
+
+    def due(self, now=None):
+        """Return the (day, zone) pairs that should be fetched at ``now`` (default: now in Stockholm)."""
+        now = now or datetime.now(LOCAL_TZ)
+        days = [now.date()]
+        if now.hour >= self.publish_hour:
+            days.append(now.date() + timedelta(days=1))
+        cache = ElpriserService.cache_for(self.project_root)
+        return [
+            (d, zone) for d in days for zone in self.zones
+            if cache.entry(PriceCache.make_key(d.year, d.month, d.day, zone)) is None
+        ]
+
+    def run_once(self, now=None):
+        """Fetch everything that is due; return the list of (day, zone) pairs now cached.
+
+        Returns None if another process holds the prefetch lease.
+        """
+        if not self.lease.acquire():
+            return None
+        try:
+            fetched = []
+            for d, zone, payload in ElpriserService.fetch_many(self.project_root, self.due(now)):
+                if payload:
+                    fetched.append((d, zone))
+            return fetched
+        finally:
+            self.lease.release()
+
+    def _run(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while True:
+            try:
+                fetched = self.run_once()
+                if fetched:
+                    logger.info('Prefetched elpriser for %s', ', '.join(f"{d}_{z}" for d, z in fetched))
+            except Exception:
+                logger.exception('Elpriser prefetch failed')
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='elpriser-prefetch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,161 @@
+from datetime import date
+from pathlib import Path
+import os
+import threading
+
+import numpy as np
+
+from .price_series import PriceSeries
+
+MAGIC = b'ELPA'
+VERSION = 1
+HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('record_size', '<u4'), ('reserved', '<u4')])
+# one price slot; 48 bytes, every field naturally aligned
+RECORD = np.dtype([('start', '<i8'), ('end', '<i8'), ('offset', '<i4'), ('pad', '<i4'),
+                   ('sek', '<f8'), ('eur', '<f8'), ('exr', '<f8')])
+# one day: local date as days since 1970-01-01, its first record and record count
+DAY = np.dtype([('day', '<i4'), ('count', '<i4'), ('first', '<i8')])
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_number(d: date):
+    return (d - _EPOCH).days
+
+
+class ArchiveError(ValueError):
+    """Raised for a corrupt archive or an out-of-order append."""
+
+
+class ZoneArchive:
+    """Append-only binary price history for one zone.
+
+    ``<ZONE>.bin`` is a 16-byte header followed by fixed-width RECORDs in
+    time order; ``<ZONE>.idx`` is a DAY entry per archived day. Both are
+    memory-mapped, so a date range is two binary searches in the day index
+    and a slice of the record map: the PriceSeries returned by series()
+    are views into the mapping and copy nothing.
+
+    Records are appended before the day index, so a crash mid-append
+    leaves records the index doesn't know about; they are ignored and
+    overwritten by the next append.
+    """
+
+    def __init__(self, root: Path, zone):
+        self.zone = zone
+        self.data_path = Path(root) / f"{zone}.bin"
+        self.index_path = Path(root) / f"{zone}.idx"
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._records = np.zeros(0, dtype=RECORD)
+        self._days = np.zeros(0, dtype=DAY)
+
+    def _map(self):
+        """(Re)map the files when they changed on disk; return (records, days)."""
+        try:
+            stamp = (self.data_path.stat().st_size, self.index_path.stat().st_size,
+                     self.index_path.stat().st_mtime_ns)
+        except OSError:
+            return np.zeros(0, dtype=RECORD), np.zeros(0, dtype=DAY)
+        with self._lock:
+            if stamp != self._stamp:
+                header = np.fromfile(self.data_path, dtype=HEADER, count=1)
+                if header.size != 1 or header[0]['magic'] != MAGIC or header[0]['record_size'] != RECORD.itemsize:
+                    raise ArchiveError(f"{self.data_path} is not a version {VERSION} price archive")
+                n_days = stamp[1] // DAY.itemsize
+                days = (np.memmap(self.index_path, dtype=DAY, mode='r', shape=(n_days,))
+                        if n_days else np.zeros(0, dtype=DAY))
+                n_records = int(days['first'][-1] + days['count'][-1]) if n_days else 0
+                if HEADER.itemsize + n_records * RECORD.itemsize > stamp[0]:
+                    raise ArchiveError(f"{self.index_path} points past the end of {self.data_path}")
+                records = (np.memmap(self.data_path, dtype=RECORD, mode='r', offset=HEADER.itemsize,
+                                     shape=(n_records,)) if n_records else np.zeros(0, dtype=RECORD))
+                self._records, self._days, self._stamp = records, days, stamp
+            return self._records, self._days
+
+    def __len__(self):
+        return int(self._map()[0].shape[0])
+
+    def days(self):
+        """Archived days, oldest first."""
+        return [date.fromordinal(_EPOCH.toordinal() + int(d)) for d in self._map()[1]['day']]
+
+    def last_day(self):
+        days = self._map()[1]
+        return date.fromordinal(_EPOCH.toordinal() + int(days['day'][-1])) if days.size else None
+
+    def _slice(self, start: date, end: date):
+        records, days = self._map()
+        lo = int(np.searchsorted(days['day'], _day_number(start), side='left'))
+        hi = int(np.searchsorted(days['day'], _day_number(end), side='right'))
+        if lo >= hi:
+            return records[0:0], 0
+        first = int(days['first'][lo])
+        last = int(days['first'][hi - 1] + days['count'][hi - 1])
+        return records[first:last], hi - lo
+
+    def series(self, start: date, end: date = None):
+        """Return the archived slots for the days in [start, end] as a zero-copy PriceSeries."""
+        records, _ = self._slice(start, end or start)
+        return PriceSeries(records['start'], records['end'], records['offset'],
+                           records['sek'], records['eur'], records['exr'], zone=self.zone)
+
+    def covers(self, start: date, end: date = None):
+        """True if every day in [start, end] is archived."""
+        end = end or start
+        return self._slice(start, end)[1] == (end - start).days + 1
+
+    def append_day(self, day: date, series: PriceSeries):
+        """Append one day's slots; days must be appended in increasing order."""
+        if not len(series):
+            return 0
+        _, days = self._map()
+        number = _day_number(day)
+        if days.size and number <= int(days['day'][-1]):
+            raise ArchiveError(f"{self.zone}: {day} is not after the last archived day {self.last_day()}")
+        first = int(days['first'][-1] + days['count'][-1]) if days.size else 0
+
+        block = np.zeros(len(series), dtype=RECORD)
+        block['start'], block['end'], block['offset'] = series.start, series.end, series.offset
+        block['sek'], block['eur'], block['exr'] = series.sek, series.eur, series.exr
+        entry = np.array([(number, len(series), first)], dtype=DAY)
+
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'r+b' if self.data_path.exists() else 'w+b'
+        with open(self.data_path, mode) as fh:
+            if mode == 'w+b':
+                np.array([(MAGIC, VERSION, RECORD.itemsize, 0)], dtype=HEADER).tofile(fh)
+            # drop any tail left by an interrupted append
+            fh.seek(HEADER.itemsize + first * RECORD.itemsize)
+            fh.truncate()
+            block.tofile(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        with open(self.index_path, 'ab') as fh:
+            entry.tofile(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        return len(series)
+
+
+class PriceArchive:
+    """Per-zone ZoneArchives under one directory (``price_archive/`` by default)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._zones = {}
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return self.root.is_dir()
+
+    def zone(self, zone) -> ZoneArchive:
+        zone = str(zone).upper()
+        with self._lock:
+            archive = self._zones.get(zone)
+            if archive is None:
+                archive = self._zones[zone] = ZoneArchive(self.root, zone)
+            return archive
+
+    def series(self, zone, start: date, end: date = None):
+        return self.zone(zone).series(start, end)
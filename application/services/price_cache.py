@@ -0,0 +1,191 @@
+from contextlib import contextmanager
+from pathlib import Path
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialized
+    fcntl = None
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write ``data`` to a temp file next to ``path`` and move it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class PriceCache:
+    """On-disk, content-addressed cache for elpriser payloads.
+
+    Each payload is stored gzip-compressed under ``objects/<sha256>.json.gz``
+    where the hash is taken over the canonical JSON encoding, so identical
+    payloads share one blob. ``index.json`` maps ``YYYY-MM-DD_<prisklass>`` to
+    the blob hash. Published spot prices never change, so entries never expire.
+
+    Every file is written to a temp file and moved into place with
+    ``os.replace`` so concurrent readers never see a half-written file.
+    Updates to the index hold an flock on ``index.lock``, so worker
+    processes (and the prefetcher) don't overwrite each other's entries.
+    """
+
+    INDEX_NAME = 'index.json'
+    LOCK_NAME = 'index.lock'
+    # a day has 23, 24 or 25 hours; upstream sends hourly or quarter-hour slots
+    DAY_HOURS = (23, 24, 25)
+    SLOTS_PER_HOUR = (1, 4)
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.index_path = self.root / self.INDEX_NAME
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_mtime = None
+
+    @staticmethod
+    def make_key(year, month, day, prisklass):
+        """Return the index key for a (date, prisklass) pair."""
+        return f"{int(year):04d}-{int(month):02d}-{int(day):02d}_{prisklass.upper()}"
+
+    @classmethod
+    def is_complete_day(cls, key, payload):
+        """True if ``payload`` holds every slot of the day named by ``key``.
+
+        Entries never expire, so only whole days in the upstream shape are
+        worth caching: slots with a numeric ``SEK_per_kWh``, each ending where
+        the next starts, from local midnight to the next one.
+        """
+        if not isinstance(payload, list) or not payload:
+            return False
+        try:
+            starts = [datetime.fromisoformat(item['time_start']) for item in payload]
+            ends = [datetime.fromisoformat(item['time_end']) for item in payload]
+            if not all(isinstance(item['SEK_per_kWh'], (int, float)) for item in payload):
+                return False
+            if any(end != start for end, start in zip(ends, starts[1:])):
+                return False
+            hours = (ends[-1] - starts[0]).total_seconds() / 3600
+        except (KeyError, TypeError, ValueError):
+            return False
+        first, last = starts[0], ends[-1]
+        return (first.date().isoformat() == str(key)[:10]
+                and (first.hour, first.minute, last.hour, last.minute) == (0, 0, 0, 0)
+                and hours in cls.DAY_HOURS
+                and len(payload) in [int(hours) * n for n in cls.SLOTS_PER_HOUR])
+
+    def _atomic_write(self, path: Path, data: bytes):
+        atomic_write(path, data)
+
+    @contextmanager
+    def _index_lock(self):
+        """Serialize index updates across threads and processes."""
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.root / self.LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                # closing the fd releases the flock
+                os.close(fd)
+
+    def _load_index(self):
+        """Return the index, re-reading it only when another process changed it."""
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except OSError:
+            self._index, self._index_mtime = {}, None
+            return self._index
+        if self._index is None or mtime != self._index_mtime:
+            try:
+                with self.index_path.open('r', encoding='utf-8') as fh:
+                    data = json.load(fh)
+                self._index = data if isinstance(data, dict) else {}
+            except Exception:
+                self._index = {}
+            self._index_mtime = mtime
+        return self._index
+
+    def _object_path(self, digest):
+        return self.objects / f"{digest}.json.gz"
+
+    def entry(self, key):
+        """Return the index entry (sha256, slots, fetched_at) for ``key`` or None."""
+        with self._lock:
+            return self._load_index().get(key)
+
+    def load(self, digest):
+        """Return the payload stored under content hash ``digest`` or None."""
+        try:
+            with gzip.open(self._object_path(digest), 'rt', encoding='utf-8') as fh:
+                return json.load(fh)
+        except Exception:
+            return None
+
+    def get(self, key):
+        """Return the cached payload for ``key`` or None on a miss."""
+        entry = self.entry(key)
+        if not entry:
+            return None
+        return self.load(entry['sha256'])
+
+    def put(self, key, payload):
+        """Store ``payload`` under ``key`` and return its content hash."""
+        blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(blob).hexdigest()
+        obj = self._object_path(digest)
+        if not obj.exists():
+            # mtime=0 keeps the compressed bytes deterministic for a given payload
+            self._atomic_write(obj, gzip.compress(blob, mtime=0))
+
+        with self._index_lock():
+            # re-read under the lock; another process may have added entries
+            self._index = None
+            index = dict(self._load_index())
+            index[key] = {
+                'sha256': digest,
+                'slots': len(payload) if isinstance(payload, list) else None,
+                'fetched_at': datetime.utcnow().isoformat() + 'Z',
+            }
+            self._atomic_write(self.index_path, json.dumps(index, ensure_ascii=False, indent=2).encode('utf-8'))
+            self._index = index
+            try:
+                self._index_mtime = self.index_path.stat().st_mtime_ns
+            except OSError:
+                self._index_mtime = None
+        return digest
+
+    def entries(self):
+        """Return a snapshot of the whole index (key -> entry)."""
+        with self._lock:
+            return dict(self._load_index())
+
+    def keys(self):
+        """Return all cached keys."""
+        with self._lock:
+            return list(self._load_index().keys())
+
+    def latest_key(self):
+        """Return the most recently stored key, or None if the cache is empty."""
+        with self._lock:
+            index = self._load_index()
+            if not index:
+                return None
+            return max(index, key=lambda k: index[k].get('fetched_at') or '')
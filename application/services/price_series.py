@@ -0,0 +1,300 @@
+from datetime import datetime
+import json
+
+import numpy as np
+
+try:
+    from zoneinfo import ZoneInfo
+    # every price zone (SE1-SE4) publishes in Swedish local time
+    LOCAL_TZ = ZoneInfo('Europe/Stockholm')
+except Exception:  # no tz database (e.g. Windows without the tzdata package)
+    LOCAL_TZ = None
+
+
+def parse_iso_times(times):
+    """Parse fixed-layout ISO timestamps in one pass.
+
+    Accepts 'YYYY-MM-DDTHH:MM:SS' with an optional '+HH:MM'/'-HH:MM' offset
+    (all strings the same length). Returns (epoch seconds int64, UTC offset
+    seconds int32, 'HH:MM' local labels) or None if any string doesn't fit.
+    """
+    arr = np.asarray(times)
+    if arr.dtype.kind != 'U' or arr.ndim != 1:
+        return None
+    width = arr.dtype.itemsize // 4
+    if width not in (19, 25) or not (np.char.str_len(arr) == width).all():
+        return None
+    codes = arr.view(np.uint32).reshape(arr.size, width)
+    digit_cols = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+    seps = {4: '-', 7: '-', 10: 'T', 13: ':', 16: ':'}
+    if width == 25:
+        digit_cols += [20, 21, 23, 24]
+        seps[22] = ':'
+    digits = codes[:, digit_cols].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+    for col, ch in seps.items():
+        if (codes[:, col] != ord(ch)).any():
+            return None
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    second = digits[:, 12] * 10 + digits[:, 13]
+    if (hour > 23).any() or (minute > 59).any() or (second > 59).any():
+        return None
+    try:
+        local = arr.astype('U19').astype('datetime64[s]')
+    except ValueError:
+        return None
+    epoch = local.astype(np.int64)
+    offset = np.zeros(arr.size, dtype=np.int32)
+    if width == 25:
+        sign = codes[:, 19]
+        if not ((sign == ord('+')) | (sign == ord('-'))).all():
+            return None
+        off_h = digits[:, 14] * 10 + digits[:, 15]
+        off_m = digits[:, 16] * 10 + digits[:, 17]
+        if (off_h > 23).any() or (off_m > 59).any():
+            return None
+        offset = ((off_h * 3600 + off_m * 60) * np.where(sign == ord('-'), -1, 1)).astype(np.int32)
+        epoch = epoch - offset
+    labels = np.ascontiguousarray(arr.view('U1').reshape(arr.size, width)[:, 11:16]).view('U5').ravel().tolist()
+    return epoch, offset, labels
+
+
+def round2(values):
+    """Round an array to 2 decimals exactly like Python's round(x, 2).
+
+    np.round may differ from round() when x*100 lies within float error of a
+    .5 boundary, so those few elements are re-rounded with round().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100.0
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def format_iso_times(epoch, offset):
+    """Inverse of parse_iso_times: ISO strings with their local UTC offset."""
+    if not len(epoch):
+        return []
+    local = (epoch + offset).astype('datetime64[s]').astype('U19')
+    sign = np.where(offset < 0, '-', '+')
+    mins = np.abs(offset.astype(np.int64)) // 60
+    hh = np.char.zfill((mins // 60).astype('U2'), 2)
+    mm = np.char.zfill((mins % 60).astype('U2'), 2)
+    return np.char.add(np.char.add(np.char.add(np.char.add(local, sign), hh), ':'), mm).tolist()
+
+
+def json_values(values):
+    """List of floats with NaN (a missing EUR price or rate) as None, which JSON can encode."""
+    return [None if v != v else v for v in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def _local_offset(epoch):
+    return int(datetime.fromtimestamp(int(epoch), LOCAL_TZ).utcoffset().total_seconds())
+
+
+def align_series(series_list):
+    """Align several series on the union of their slot start times.
+
+    Returns (start int64, offset int32, sek float64 matrix with one row per
+    series); slots a series doesn't have are NaN. Only start times are
+    compared, so series of different resolution aren't resampled.
+    """
+    series_list = list(series_list)
+    non_empty = [s for s in series_list if len(s)]
+    if not non_empty:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), np.full((len(series_list), 0), np.nan)
+    all_start = np.concatenate([s.start for s in non_empty])
+    all_offset = np.concatenate([s.offset for s in non_empty])
+    start, first = np.unique(all_start, return_index=True)
+    matrix = np.full((len(series_list), start.size), np.nan)
+    for row, s in enumerate(series_list):
+        if len(s):
+            matrix[row, np.searchsorted(start, s.start)] = s.sek
+    return start, all_offset[first], matrix
+
+
+class PriceSeries:
+    """Column-oriented price data for one zone.
+
+    Timestamps are int64 epoch seconds (``start``/``end``) with the local UTC
+    offset kept per slot (``offset``) so the upstream ISO strings can be
+    rebuilt exactly; prices are float64 columns. Slicing returns views that
+    share the underlying arrays, and a slot lookup by timestamp is O(1).
+    """
+
+    __slots__ = ('zone', 'start', 'end', 'offset', 'sek', 'eur', 'exr', '_step', '_index')
+
+    def __init__(self, start, end, offset, sek, eur, exr, zone=None):
+        self.zone = zone
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.offset = np.asarray(offset, dtype=np.int32)
+        self.sek = np.asarray(sek, dtype=np.float64)
+        self.eur = np.asarray(eur, dtype=np.float64)
+        self.exr = np.asarray(exr, dtype=np.float64)
+        self._step = None
+        self._index = None
+
+    @classmethod
+    def empty(cls, zone=None):
+        z = np.zeros(0)
+        return cls(z, z, z, z, z, z, zone=zone)
+
+    @classmethod
+    def from_payload(cls, payload, zone=None):
+        """Build a series from an upstream payload (list of slot dicts).
+
+        Raises ValueError if the payload isn't in the upstream shape.
+        """
+        if isinstance(payload, dict):
+            payload = payload.get('data') or payload.get('hours') or []
+        if not payload:
+            return cls.empty(zone)
+        try:
+            starts = [item['time_start'] for item in payload]
+            ends = [item['time_end'] for item in payload]
+            sek = np.array([item['SEK_per_kWh'] for item in payload], dtype=np.float64)
+            eur = np.array([item.get('EUR_per_kWh', np.nan) for item in payload], dtype=np.float64)
+            exr = np.array([item.get('EXR', np.nan) for item in payload], dtype=np.float64)
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"Not an elpriser payload: {exc}") from exc
+
+        parsed_start = parse_iso_times(starts)
+        parsed_end = parse_iso_times(ends)
+        if parsed_start is None or parsed_end is None:
+            start, offset = cls._parse_times_slow(starts)
+            end, _ = cls._parse_times_slow(ends)
+        else:
+            start, offset, _ = parsed_start
+            end = parsed_end[0]
+        return cls(start, end, offset, sek, eur, exr, zone=zone)
+
+    @staticmethod
+    def _parse_times_slow(times):
+        epoch = np.empty(len(times), dtype=np.int64)
+        offset = np.empty(len(times), dtype=np.int32)
+        for i, t in enumerate(times):
+            dt = datetime.fromisoformat(t)
+            off = dt.utcoffset()
+            off_s = int(off.total_seconds()) if off is not None else 0
+            epoch[i] = int((dt.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()) - off_s
+            offset[i] = off_s
+        return epoch, offset
+
+    @classmethod
+    def concat(cls, series, zone=None):
+        """Concatenate several series (e.g. consecutive days) into one."""
+        series = [s for s in series if len(s)]
+        if not series:
+            return cls.empty(zone)
+        return cls(*(np.concatenate([getattr(s, f) for s in series])
+                     for f in ('start', 'end', 'offset', 'sek', 'eur', 'exr')),
+                   zone=zone if zone is not None else series[0].zone)
+
+    def __len__(self):
+        return int(self.start.size)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError('PriceSeries only supports slicing; use at() for a single slot')
+        # basic slicing of numpy arrays returns views, so this copies nothing
+        return PriceSeries(self.start[key], self.end[key], self.offset[key],
+                           self.sek[key], self.eur[key], self.exr[key], zone=self.zone)
+
+    def __repr__(self):
+        return f"<PriceSeries zone={self.zone} slots={len(self)}>"
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, f).nbytes for f in ('start', 'end', 'offset', 'sek', 'eur', 'exr'))
+
+    def between(self, t0, t1):
+        """Return the slots starting in [t0, t1) (epoch seconds) as a view."""
+        lo = int(np.searchsorted(self.start, t0, side='left'))
+        hi = int(np.searchsorted(self.start, t1, side='left'))
+        return self[lo:hi]
+
+    def index_of(self, ts):
+        """Return the index of the slot starting at epoch second ``ts`` or None."""
+        n = len(self)
+        if not n:
+            return None
+        if self._step is None:
+            steps = np.diff(self.start)
+            self._step = int(steps[0]) if steps.size and (steps == steps[0]).all() and steps[0] > 0 else 0
+        ts = int(ts)
+        if self._step or n == 1:
+            i, rem = divmod(ts - int(self.start[0]), self._step or 1)
+            return i if rem == 0 and 0 <= i < n and int(self.start[i]) == ts else None
+        if self._index is None:
+            self._index = {t: i for i, t in enumerate(self.start.tolist())}
+        return self._index.get(ts)
+
+    def at(self, ts):
+        """Return the slot starting at ``ts`` as an upstream-style dict, or None."""
+        i = self.index_of(ts)
+        return None if i is None else self[i:i + 1].to_payload()[0]
+
+    def labels(self):
+        """Local 'HH:MM' label for every slot."""
+        if not len(self):
+            return []
+        minutes = ((self.start + self.offset) // 60) % 1440
+        hh = np.char.zfill((minutes // 60).astype('U2'), 2)
+        mm = np.char.zfill((minutes % 60).astype('U2'), 2)
+        return np.char.add(np.char.add(hh, ':'), mm).tolist()
+
+    def end_offsets(self):
+        """UTC offset of every slot's end time.
+
+        A slot ending where the next one starts takes that slot's offset, so
+        DST changes inside the data come out as upstream writes them. Other
+        ends (the last slot, a slot before a gap) get the Swedish offset at
+        the end time itself when the slot is in Swedish local time, and the
+        slot's own offset otherwise.
+        """
+        offsets = self.offset.copy()
+        if not len(self):
+            return offsets
+        follows = self.end[:-1] == self.start[1:]
+        offsets[:-1][follows] = self.offset[1:][follows]
+        if LOCAL_TZ is not None:
+            for i in np.flatnonzero(np.r_[~follows, True]).tolist():
+                if _local_offset(self.start[i]) == self.offset[i]:
+                    offsets[i] = _local_offset(self.end[i])
+        return offsets
+
+    def to_payload(self):
+        """Return the slots in the upstream list-of-dicts shape (missing prices as None)."""
+        starts = format_iso_times(self.start, self.offset)
+        ends = format_iso_times(self.end, self.end_offsets())
+        return [
+            {'SEK_per_kWh': s, 'EUR_per_kWh': e, 'EXR': x, 'time_start': ts, 'time_end': te}
+            for s, e, x, ts, te in zip(json_values(self.sek), json_values(self.eur), json_values(self.exr),
+                                       starts, ends)
+        ]
+
+    def to_dict(self):
+        """Column-oriented, JSON-ready representation (see from_dict()); missing prices are None."""
+        return {
+            'zone': self.zone,
+            'start': self.start.tolist(),
+            'end': self.end.tolist(),
+            'offset': self.offset.tolist(),
+            'SEK_per_kWh': json_values(self.sek),
+            'EUR_per_kWh': json_values(self.eur),
+            'EXR': json_values(self.exr),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['start'], data['end'], data['offset'], data['SEK_per_kWh'],
+                   data['EUR_per_kWh'], data['EXR'], zone=data.get('zone'))
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(',', ':'))
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import select
+
+from .price_series import PriceSeries
+
+try:
+    from ..models import Price
+except (ImportError, ValueError):
+    from models import Price
+
+STOCKHOLM = ZoneInfo('Europe/Stockholm')
+
+
+def day_bounds(start: date, end: date = None):
+    """Return epoch seconds [local midnight of start, local midnight after end)."""
+    end = end or start
+    t0 = datetime(start.year, start.month, start.day, tzinfo=STOCKHOLM)
+    after = end + timedelta(days=1)
+    t1 = datetime(after.year, after.month, after.day, tzinfo=STOCKHOLM)
+    return int(t0.timestamp()), int(t1.timestamp())
+
+
+class PriceStore:
+    """Price slots in the ``prices`` table, keyed by (zone, time_start).
+
+    Slots are written with batched INSERT ... ON CONFLICT DO UPDATE
+    statements (one executemany per batch), so re-ingesting a day just
+    overwrites it. Range reads go straight to NumPy arrays and come back as
+    a PriceSeries without building ORM objects.
+    """
+
+    BATCH_SIZE = 5000
+    RANGE_SQL = ('SELECT time_start, time_end, utc_offset, sek_per_kwh, eur_per_kwh, exr FROM prices '
+                 'WHERE zone = ? AND time_start >= ? AND time_start < ? ORDER BY time_start')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.table = Price.__table__
+        if engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        self._insert = insert
+
+    def create(self):
+        self.table.create(bind=self.engine, checkfirst=True)
+        return self
+
+    def upsert_series(self, series: PriceSeries, zone=None):
+        """Insert or update every slot of ``series``; return the number of rows written."""
+        zone = zone or series.zone
+        if not zone:
+            raise ValueError('series has no zone')
+        n = len(series)
+        if not n:
+            return 0
+        columns = zip(series.start.tolist(), series.end.tolist(), series.offset.tolist(),
+                      series.sek.tolist(), series.eur.tolist(), series.exr.tolist())
+        rows = [
+            {'zone': zone, 'time_start': s, 'time_end': e, 'utc_offset': o,
+             'sek_per_kwh': sek, 'eur_per_kwh': None if eur != eur else eur, 'exr': None if exr != exr else exr}
+            for s, e, o, sek, eur, exr in columns
+        ]
+        stmt = self._insert(self.table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['zone', 'time_start'],
+            set_={c: stmt.excluded[c] for c in ('time_end', 'utc_offset', 'sek_per_kwh', 'eur_per_kwh', 'exr')},
+        )
+        with self.engine.begin() as conn:
+            for i in range(0, n, self.BATCH_SIZE):
+                conn.execute(stmt, rows[i:i + self.BATCH_SIZE])
+        return n
+
+    def series(self, zone, t0, t1):
+        """Return the slots of ``zone`` starting in [t0, t1) (epoch seconds) as a PriceSeries."""
+        with self.engine.connect() as conn:
+            if self.engine.dialect.name == 'sqlite':
+                # the sqlite3 cursor hands back plain tuples, about twice as fast
+                # as going through Row objects for a year of slots
+                rows = conn.connection.driver_connection.execute(self.RANGE_SQL, (zone, int(t0), int(t1))).fetchall()
+            else:
+                t = self.table.c
+                query = (select(t.time_start, t.time_end, t.utc_offset, t.sek_per_kwh, t.eur_per_kwh, t.exr)
+                         .where(t.zone == zone, t.time_start >= int(t0), t.time_start < int(t1))
+                         .order_by(t.time_start))
+                rows = [tuple(r) for r in conn.execute(query)]
+        if not rows:
+            return PriceSeries.empty(zone)
+        # NULL becomes NaN; epoch seconds are exact in float64
+        arr = np.array(rows, dtype=np.float64)
+        return PriceSeries(arr[:, 0].astype(np.int64), arr[:, 1].astype(np.int64), arr[:, 2].astype(np.int32),
+                           arr[:, 3], arr[:, 4], arr[:, 5], zone=zone)
+
+    def series_for_days(self, zone, start: date, end: date = None):
+        """Return the slots of ``zone`` for the local days in [start, end]."""
+        return self.series(zone, *day_bounds(start, end))
@@ -0,0 +1,255 @@
+from pathlib import Path
+import hashlib
+import json
+import threading
+
+import numpy as np
+
+from .price_cache import PriceCache, atomic_write
+from .price_series import PriceSeries, format_iso_times, round2
+
+PERIODS = ('hour', 'day', 'week', 'month')
+PERCENTILES = (10, 25, 75, 90)
+STAT_KEYS = ('mean', 'median') + tuple(f'p{q}' for q in PERCENTILES) + ('min', 'max', 'std')
+
+
+def bucket_keys(series: PriceSeries, period):
+    """Return an int64 bucket key per slot of ``series`` for ``period``.
+
+    Hours are bucketed in UTC (Swedish offsets are whole hours, so they line
+    up with local hours and the repeated hour on the autumn DST day stays
+    two buckets). Days, weeks (starting Monday) and months follow local time.
+    """
+    if period == 'hour':
+        return series.start // 3600 * 3600
+    local_days = (series.start + series.offset) // 86400
+    if period == 'day':
+        return local_days
+    if period == 'week':
+        # 1970-01-01 was a Thursday
+        return local_days - (local_days + 3) % 7
+    if period == 'month':
+        return local_days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"Unknown period {period!r}; expected one of {', '.join(PERIODS)}")
+
+
+def _bucket_labels(period, keys, first_start, first_offset):
+    if period == 'hour':
+        return format_iso_times(first_start, first_offset)
+    if period == 'month':
+        return keys.astype('datetime64[M]').astype(str).tolist()
+    return keys.astype('datetime64[D]').astype(str).tolist()
+
+
+def aggregate(keys, values, percentiles=PERCENTILES):
+    """Grouped stats of ``values`` per distinct ``keys`` in one sort.
+
+    Returns (unique keys, first index of each group in the input, counts,
+    {stat: array}). Percentiles interpolate linearly like np.percentile;
+    ``std`` is the population standard deviation (the volatility measure).
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if not keys.size:
+        empty = np.zeros(0)
+        return keys, keys, keys, {name: empty for name in STAT_KEYS}
+    order = np.lexsort((values, keys))
+    k = keys[order]
+    v = values[order]
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    counts = np.diff(np.r_[starts, k.size])
+    means = np.add.reduceat(v, starts) / counts
+    var = np.add.reduceat((v - np.repeat(means, counts)) ** 2, starts) / counts
+
+    def percentile(q):
+        pos = starts + (counts - 1) * (q / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        return v[lo] + (v[hi] - v[lo]) * (pos - lo)
+
+    stats = {'mean': means, 'median': percentile(50)}
+    for q in percentiles:
+        stats[f'p{q}'] = percentile(q)
+    stats['min'] = v[starts]
+    stats['max'] = v[starts + counts - 1]
+    stats['std'] = np.sqrt(var)
+    # the first slot of each group in input (time) order, for labels
+    first = np.minimum.reduceat(order, starts)
+    return k[starts], first, counts, stats
+
+
+def resample(series: PriceSeries, period):
+    """Aggregate a series to ``period`` buckets.
+
+    Returns one dict per bucket, oldest first: ``period`` (label), ``start``
+    (epoch seconds of the first slot), ``slots`` and the STAT_KEYS in
+    öre/kWh rounded to 2 decimals. Slots without a price are skipped.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {', '.join(PERIODS)}")
+    keep = ~np.isnan(series.sek)
+    start = series.start[keep]
+    offset = series.offset[keep]
+    keys = bucket_keys(series, period)[keep]
+    uniq, first, counts, stats = aggregate(keys, series.sek[keep] * 100.0)
+    labels = _bucket_labels(period, uniq, start[first], offset[first])
+    columns = {name: round2(arr).tolist() for name, arr in stats.items()}
+    starts = start[first].tolist()
+    rows = []
+    for i, label in enumerate(labels):
+        row = {'period': label, 'start': starts[i], 'slots': int(counts[i])}
+        for name in STAT_KEYS:
+            row[name] = columns[name][i]
+        rows.append(row)
+    return rows
+
+
+def _public(row):
+    return {k: v for k, v in row.items() if k not in ('sha256', 'source')}
+
+
+class RollupStore:
+    """Persisted daily and monthly rollups per zone, kept next to the price cache.
+
+    ``<cache root>/rollups/<ZONE>.json`` holds ``{"daily": {date: row},
+    "monthly": {YYYY-MM: row}}``. Each daily row records the sha256 of the
+    payload it was computed from and each monthly row a hash over its days'
+    hashes, so a day is recomputed only when its payload changes and a month
+    only when one of its days does. add_day() is called as payloads are
+    stored; reads also pick up days that reached the cache some other way
+    (another process, an older cache), so the rollups heal themselves.
+    """
+
+    DIRNAME = 'rollups'
+
+    def __init__(self, cache: PriceCache, load_series=None):
+        self.cache = cache
+        self.root = Path(cache.root) / self.DIRNAME
+        self._load_series = load_series or self._default_load_series
+        self._lock = threading.RLock()
+        self._zones = {}
+
+    def _default_load_series(self, digest, zone):
+        payload = self.cache.load(digest)
+        if not payload:
+            return None
+        try:
+            return PriceSeries.from_payload(payload, zone=zone)
+        except ValueError:
+            return None
+
+    def _path(self, zone):
+        return self.root / f"{zone}.json"
+
+    def _load(self, zone):
+        """Return the zone's rollups, re-reading the file when another process changed it."""
+        path = self._path(zone)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = self._zones.get(zone)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        data = {'daily': {}, 'monthly': {}}
+        if mtime is not None:
+            try:
+                with path.open('r', encoding='utf-8') as fh:
+                    loaded = json.load(fh)
+                data['daily'].update(loaded.get('daily') or {})
+                data['monthly'].update(loaded.get('monthly') or {})
+            except Exception:
+                pass
+        self._zones[zone] = (mtime, data)
+        return data
+
+    def _save(self, zone, data):
+        path = self._path(zone)
+        atomic_write(path, json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+        self._zones[zone] = (path.stat().st_mtime_ns, data)
+
+    def _day_row(self, day, digest, zone, series=None):
+        if series is None:
+            series = self._load_series(digest, zone)
+        if series is None:
+            return None
+        rows = [r for r in resample(series, 'day') if r['period'] == day]
+        if not rows:
+            return None
+        return dict(rows[0], sha256=digest)
+
+    def _sync(self, zone, data, only=None):
+        """Compute daily rows for cached days of ``zone`` that are missing or stale."""
+        suffix = f"_{zone}"
+        changed = False
+        for key, entry in self.cache.entries().items():
+            if not key.endswith(suffix):
+                continue
+            day = key[:-len(suffix)]
+            if only is not None and not only(day):
+                continue
+            row = data['daily'].get(day)
+            if row is not None and row.get('sha256') == entry.get('sha256'):
+                continue
+            row = self._day_row(day, entry['sha256'], zone)
+            if row is not None:
+                data['daily'][day] = row
+                changed = True
+        return changed
+
+    def add_day(self, key, series=None):
+        """Update the daily rollup for cache ``key`` (e.g. '2025-10-01_SE3')."""
+        entry = self.cache.entry(key)
+        if not entry:
+            return None
+        day, zone = key.rsplit('_', 1)
+        with self._lock:
+            data = self._load(zone)
+            row = data['daily'].get(day)
+            if row is not None and row.get('sha256') == entry['sha256']:
+                return _public(row)
+            row = self._day_row(day, entry['sha256'], zone, series=series)
+            if row is None:
+                return None
+            data['daily'][day] = row
+            self._save(zone, data)
+            return _public(row)
+
+    def daily(self, zone, start, end):
+        """Return the daily rows for cached days in [start, end] (ISO dates), oldest first."""
+        start, end = str(start), str(end)
+        with self._lock:
+            data = self._load(zone)
+            if self._sync(zone, data, only=lambda d: start <= d <= end):
+                self._save(zone, data)
+            return [_public(data['daily'][d]) for d in sorted(data['daily']) if start <= d <= end]
+
+    def monthly(self, zone, start, end):
+        """Return the monthly rows for months in [start, end] (YYYY-MM), oldest first.
+
+        A month covers the cached days in it, so the current month grows as
+        new days arrive.
+        """
+        start, end = str(start)[:7], str(end)[:7]
+        with self._lock:
+            data = self._load(zone)
+            changed = self._sync(zone, data, only=lambda d: start <= d[:7] <= end)
+            by_month = {}
+            for day in sorted(data['daily']):
+                if start <= day[:7] <= end:
+                    by_month.setdefault(day[:7], []).append(day)
+            for month, days in by_month.items():
+                digests = [data['daily'][d]['sha256'] for d in days]
+                source = hashlib.sha256(','.join(digests).encode('ascii')).hexdigest()
+                row = data['monthly'].get(month)
+                if row is not None and row.get('source') == source:
+                    continue
+                parts = [self._load_series(digest, zone) for digest in digests]
+                series = PriceSeries.concat([p for p in parts if p is not None], zone=zone)
+                rows = resample(series, 'month')
+                if rows:
+                    data['monthly'][month] = dict(rows[0], source=source)
+                    changed = True
+            if changed:
+                self._save(zone, data)
+            return [_public(data['monthly'][m]) for m in sorted(data['monthly']) if start <= m <= end]
@@ -0,0 +1,104 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class VoteBuffer:
+    """Collects votes in memory and writes them in batches.
+
+    Votes are summed per annotation id as (likes, dislikes) deltas and
+    handed to ``flush_fn(deltas)`` every ``interval_ms`` milliseconds, or
+    sooner once ``max_votes`` are pending, so a burst of votes becomes one
+    transaction instead of one commit per click. pending() lets readers
+    merge votes that haven't been written yet. If ``flush_fn`` raises, the
+    deltas are put back and retried on the next flush.
+
+    Call stop() on shutdown; it writes whatever is still pending.
+    """
+
+    def __init__(self, flush_fn, interval_ms=500, max_votes=1000):
+        self.flush_fn = flush_fn
+        self.interval = interval_ms / 1000.0
+        self.max_votes = max_votes
+        self._lock = threading.Lock()
+        # serializes flush_fn calls so batches are written in order
+        self._flush_lock = threading.Lock()
+        self._deltas = {}
+        self._count = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.flushed_votes = 0
+
+    def add(self, ann_id, vote):
+        """Count one vote; returns the (likes, dislikes) now pending for ``ann_id``."""
+        with self._lock:
+            delta = self._deltas.setdefault(ann_id, [0, 0])
+            delta[0 if vote == 'like' else 1] += 1
+            self._count += 1
+            if self._count >= self.max_votes:
+                self._wake.set()
+            return tuple(delta)
+
+    def pending(self, ann_id=None):
+        """(likes, dislikes) not yet written for ``ann_id``, or a dict of all of them."""
+        with self._lock:
+            if ann_id is None:
+                return {k: tuple(v) for k, v in self._deltas.items()}
+            return tuple(self._deltas.get(ann_id, (0, 0)))
+
+    def paused(self):
+        """Context manager that holds off flushes, e.g. while a DB read and pending() must agree."""
+        return self._flush_lock
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+    def flush(self):
+        """Write every pending vote now; returns the number of votes written."""
+        with self._flush_lock:
+            with self._lock:
+                deltas, count = self._deltas, self._count
+                self._deltas, self._count = {}, 0
+            if not deltas:
+                return 0
+            try:
+                self.flush_fn(deltas)
+            except Exception:
+                with self._lock:
+                    for ann_id, (likes, dislikes) in deltas.items():
+                        delta = self._deltas.setdefault(ann_id, [0, 0])
+                        delta[0] += likes
+                        delta[1] += dislikes
+                    self._count += count
+                raise
+            self.flushes += 1
+            self.flushed_votes += count
+            return count
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing buffered votes failed')
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the flusher thread and write what is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
@@ -4,17 +4,80 @@ document.addEventListener('DOMContentLoaded', () => {
   const toggle = document.getElementById('toggleAnnotations');
   const closeBtn = document.getElementById('closeAnnotations');
 
+  let stream = null;
+  // id -> {data, item} for the annotations currently listed
+  const shown = new Map();
+  let list = null;
+  // an event arrived while the list was loading, so the response may predate it
+  let missed = false;
+
   function openSidebar() {
     sidebar.classList.add('open');
     loadAnnotations();
   }
-  function closeSidebar() { sidebar.classList.remove('open'); }
+  function closeSidebar() {
+    sidebar.classList.remove('open');
+    if (stream) { stream.close(); stream = null; }
+  }
+
+  // apply changes to annotations for the shown date/area as they arrive;
+  // each event carries the annotation, so the list is only refetched when
+  // events came in before it had loaded
+  function watchAnnotations(qs) {
+    if (stream) stream.close();
+    stream = null;
+    if (!window.EventSource) return;
+    stream = new EventSource('/annotations/stream' + qs);
+    ['create', 'vote', 'moderate'].forEach(kind => stream.addEventListener(kind, applyEvent));
+  }
+
+  function applyEvent(e) {
+    let a;
+    try { a = JSON.parse(e.data); } catch (err) { return; }
+    if (!a || !a.id) return;
+    if (!list) { missed = true; return; }
+    const entry = shown.get(a.id);
+    if (entry) {
+      Object.assign(entry.data, a);
+      renderItem(entry.item, entry.data);
+    } else if (e.type === 'create') {
+      addItem(a);
+    }
+  }
+
+  function renderItem(item, a) {
+    const title = document.createElement('div');
+    title.className = 'fw-bold';
+    title.textContent = `${a.author || 'anonymous'} ${a.hour ? '('+a.hour+')' : ''}`;
+    const text = document.createElement('div');
+    text.textContent = a.text || '';
+    const meta = document.createElement('div');
+    meta.className = 'small text-muted';
+    meta.textContent = `${a.created_at || ''} • 👍 ${a.likes||0} 👎 ${a.dislikes||0}`;
+    item.replaceChildren(title, text, meta);
+  }
+
+  function addItem(a) {
+    if (!shown.size) {
+      content.innerHTML = '';
+      content.appendChild(list);
+    }
+    const item = document.createElement('div');
+    item.className = 'list-group-item';
+    const data = Object.assign({}, a);
+    renderItem(item, data);
+    shown.set(data.id, {data, item});
+    list.appendChild(item);
+  }
 
   toggle && toggle.addEventListener('click', openSidebar);
   closeBtn && closeBtn.addEventListener('click', closeSidebar);
 
   async function loadAnnotations() {
     content.innerHTML = '<div class="text-muted small">Loading annotations...</div>';
+    shown.clear();
+    list = null;
+    missed = false;
     try {
       // get current date/area from page inputs if they exist
       const dateInput = document.getElementById('fetchDate');
@@ -26,6 +89,7 @@ document.addEventListener('DOMContentLoaded', () => {
         return;
       }
       const qs = `?date=${encodeURIComponent(date)}&prisklass=${encodeURIComponent(area)}`;
+      if (!stream || stream.url.indexOf(qs) === -1) watchAnnotations(qs);
       const res = await fetch('/annotations' + qs);
       if (!res.ok) {
         content.innerHTML = '<div class="text-danger small">Failed to load annotations</div>';
@@ -33,31 +97,15 @@ document.addEventListener('DOMContentLoaded', () => {
       }
       const j = await res.json();
       const anns = j.annotations || [];
-      if (!anns.length) {
-        content.innerHTML = '<div class="text-muted small">No annotations for selected date/area.</div>';
-        return;
-      }
       // render list
-      const list = document.createElement('div');
+      list = document.createElement('div');
       list.className = 'list-group';
-      anns.forEach(a => {
-        const item = document.createElement('div');
-        item.className = 'list-group-item';
-        const title = document.createElement('div');
-        title.className = 'fw-bold';
-        title.textContent = `${a.author || 'anonymous'} ${a.hour ? '('+a.hour+')' : ''}`;
-        const text = document.createElement('div');
-        text.textContent = a.text || '';
-        const meta = document.createElement('div');
-        meta.className = 'small text-muted';
-        meta.textContent = `${a.created_at || ''} • 👍 ${a.likes||0} 👎 ${a.dislikes||0}`;
-        item.appendChild(title);
-        item.appendChild(text);
-        item.appendChild(meta);
-        list.appendChild(item);
-      });
-      content.innerHTML = '';
-      content.appendChild(list);
+      if (anns.length) {
+        anns.forEach(addItem);
+      } else {
+        content.innerHTML = '<div class="text-muted small">No annotations for selected date/area.</div>';
+      }
+      if (missed) loadAnnotations();
     } catch (e) {
       console.error('Annotations load failed', e);
       content.innerHTML = '<div class="text-danger small">Error loading annotations</div>';
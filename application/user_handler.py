@@ -1,11 +1,13 @@
-import requests
+try:
+    from .http_client import get_client
+except ImportError:
+    from http_client import get_client
 # application/user_handler.py, ta user by ip, returnera elområde crosscheck elpris i generella området. 
 def get_location_and_elarea(user_ip=None):
     """ Get geolocation and electricity area based on IP address."""
 
     url = f"https://ipwho.is/{user_ip}" if user_ip else "https://ipwho.is/"
-    resp = requests.get(url)
-    data = resp.json()
+    data = get_client().get(url).json()
 
     if not data.get("success"):
         raise ValueError(f"Lookup failed: {data.get('message')}")
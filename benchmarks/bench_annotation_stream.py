@@ -0,0 +1,103 @@
+"""Benchmark: how many /annotations/stream subscribers one worker can hold.
+
+Each subscriber is a thread blocked on its Subscription, as it is behind
+a streaming response in a threaded server. For each subscriber count the
+benchmark publishes votes through the EventHub and reports publish time,
+delivery latency (publish to get()) and memory per subscriber. A quarter
+of the subscribers watch the annotation's date and area, a quarter watch
+the date only and half watch other dates, so fanout is filtered like in
+production:
+
+    python benchmarks/bench_annotation_stream.py [--subscribers 100,500,1000,2000] [--events 200]
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from application.services.annotation_events import EventHub
+
+
+def run(n_subscribers, n_events, rate):
+    hub = EventHub()
+    latencies = []
+    lock = threading.Lock()
+    stop = threading.Event()
+    ready = threading.Barrier(n_subscribers + 1)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    def subscriber(i):
+        if i % 4 == 0:
+            sub = hub.subscribe(date='2025-10-01', area='SE3')
+        elif i % 4 == 1:
+            sub = hub.subscribe(date='2025-10-01')
+        else:
+            sub = hub.subscribe(date=f"2025-11-{i % 28 + 1:02d}")
+        ready.wait()
+        with sub:
+            while not stop.is_set():
+                event = sub.get(timeout=0.5)
+                if event is not None:
+                    elapsed = time.perf_counter() - event['annotation']['sent']
+                    with lock:
+                        latencies.append(elapsed)
+
+    threads = [threading.Thread(target=subscriber, args=(i,), daemon=True) for i in range(n_subscribers)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    after = tracemalloc.take_snapshot()
+    per_sub = sum(s.size_diff for s in after.compare_to(before, 'filename')) / n_subscribers
+    tracemalloc.stop()
+
+    publish_times = []
+    for i in range(n_events):
+        t0 = time.perf_counter()
+        hub.publish('vote', {'id': 'a1', 'date': '2025-10-01', 'area': 'SE3', 'likes': i, 'sent': t0})
+        publish_times.append(time.perf_counter() - t0)
+        time.sleep(1 / rate)
+    expected = n_events * (n_subscribers // 4 + (n_subscribers + 2) // 4)
+    deadline = time.time() + 10
+    while len(latencies) < expected and time.time() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    lat = sorted(latencies)
+    return {
+        'delivered': len(lat),
+        'expected': expected,
+        'publish_ms': statistics.mean(publish_times) * 1000,
+        'p50_ms': lat[len(lat) // 2] * 1000 if lat else 0,
+        'p99_ms': lat[int(len(lat) * 0.99) - 1] * 1000 if lat else 0,
+        'kib_per_sub': per_sub / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', default='100,500,1000,2000', help='comma-separated subscriber counts')
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=100, help='events per second')
+    args = parser.parse_args()
+
+    # streaming threads mostly sleep; a small stack lets thousands fit
+    threading.stack_size(256 * 1024)
+    print(f"{args.events} vote events at {args.rate:.0f}/s")
+    print(f"{'subscribers':>11}{'delivered':>12}{'publish ms':>12}{'p50 ms':>9}{'p99 ms':>9}{'KiB/sub':>9}")
+    for n in (int(x) for x in args.subscribers.split(',')):
+        r = run(n, args.events, args.rate)
+        print(f"{n:>11}{r['delivered']:>7}/{r['expected']:<6}{r['publish_ms']:>10.3f}"
+              f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['kib_per_sub']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
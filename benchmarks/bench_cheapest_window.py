@@ -0,0 +1,74 @@
+"""Benchmark: cheapest-window search over a multi-month price series.
+
+Compares a naive scan that sums every window, a pure-Python running sum
+and ElpriserService.cheapest_windows() on quarter-hour data generated by
+the local fake price API (no internet access needed):
+
+    python benchmarks/bench_cheapest_window.py [--months 6] [--k 5]
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from application.services.elpriser_service import ElpriserService
+from application.services.price_series import PriceSeries
+from tools.fake_elpriser_server import generate_day
+
+
+def naive(prices, slots):
+    best, best_i = None, None
+    for i in range(len(prices) - slots + 1):
+        mean = sum(prices[i:i + slots]) / slots
+        if best is None or mean < best:
+            best, best_i = mean, i
+    return best_i
+
+
+def running_sum(prices, slots):
+    total = sum(prices[:slots])
+    best, best_i = total, 0
+    for i in range(slots, len(prices)):
+        total += prices[i] - prices[i - slots]
+        if total < best:
+            best, best_i = total, i - slots + 1
+    return best_i
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    start = date(2025, 10, 1)
+    days = [start + timedelta(days=i) for i in range(args.months * 30)]
+    series = PriceSeries.concat([PriceSeries.from_payload(generate_day(d, 'SE3')) for d in days], zone='SE3')
+    prices = (series.sek * 100.0).tolist()
+    print(f"{len(days)} days, {len(series)} slots, top-{args.k} for the vectorized search")
+    print(f"{'slots':>6}{'naive ms':>12}{'running ms':>12}{'vectorized ms':>15}{'top-k ms':>11}")
+    for slots in (4, 16, 32, 96):
+        t_naive, i_naive = timed(lambda: naive(prices, slots), repeat=1)
+        t_run, i_run = timed(lambda: running_sum(prices, slots))
+        t_vec, best = timed(lambda: ElpriserService.cheapest_windows(series, slots))
+        t_topk, _ = timed(lambda: ElpriserService.cheapest_windows(series, slots, k=args.k))
+        expected = series[i_run:i_run + 1].to_payload()[0]['time_start']
+        assert i_naive == i_run and best[0]['start'] == expected
+        print(f"{slots:>6}{t_naive * 1000:>12.1f}{t_run * 1000:>12.1f}{t_vec * 1000:>15.2f}{t_topk * 1000:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
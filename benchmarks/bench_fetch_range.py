@@ -0,0 +1,67 @@
+"""Benchmark: sequential vs concurrent fetch of 30 days x 4 zones.
+
+Runs against the local stand-in for elprisetjustnu.se
+(tools/fake_elpriser_server.py) with a fixed per-request latency, so no
+internet access is needed:
+
+    python benchmarks/bench_fetch_range.py [--days 30] [--latency 0.05]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from application.elpriser_api import ElpriserAPI
+from application.services.elpriser_service import ElpriserService
+from tools.fake_elpriser_server import start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per upstream request')
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency)
+    ElpriserAPI.BASE_URL = server.base_url
+
+    end = date(2025, 10, 31)
+    start = end - timedelta(days=args.days - 1)
+    n = args.days * len(ElpriserService.ZONES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        for i in range(args.days):
+            d = start + timedelta(days=i)
+            for zone in ElpriserService.ZONES:
+                ElpriserService.get_prices(Path(tmp), d.year, d.month, d.day, zone)
+        sequential = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        first = None
+        count = 0
+        for _ in ElpriserService.fetch_range(Path(tmp), start, end):
+            count += 1
+            if first is None:
+                first = time.perf_counter() - t0
+        concurrent = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in ElpriserService.fetch_range(Path(tmp), start, end):
+            pass
+        cached = time.perf_counter() - t0
+
+    server.shutdown()
+    print(f"{args.days} days x {len(ElpriserService.ZONES)} zones = {n} requests, {args.latency * 1000:.0f} ms upstream latency")
+    print(f"sequential get_prices : {sequential:7.3f} s")
+    print(f"fetch_range (cold)    : {concurrent:7.3f} s  ({sequential / concurrent:.1f}x, first result after {first * 1000:.0f} ms, {count} results)")
+    print(f"fetch_range (cached)  : {cached:7.3f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark: SQLite readers and a writer at the same time.
+
+Reader threads list a day's annotations while one writer thread votes, for
+a fixed time, first on an engine without connection pragmas (rollback
+journal, synchronous=FULL) and then with models.SQLITE_PRAGMAS (WAL,
+synchronous=NORMAL, busy_timeout, cache_size, mmap_size). Reports reads/s,
+writes/s and how many operations failed with "database is locked":
+
+    python benchmarks/bench_sqlite_concurrency.py [--readers 4] [--seconds 5]
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert
+
+from application import models
+from application.models import Annotation
+from application.services.annotations_service import AnnotationsService
+
+DAYS = [f"2025-10-{d:02d}" for d in range(1, 31)]
+
+
+def seed(engine, per_day=50):
+    rows = [{'id': f"{day}-{i}", 'date': day, 'area': 'SE3', 'text': 'seed', 'author': 'bench',
+             'likes': 0, 'dislikes': 0, 'status': 'active'}
+            for day in DAYS for i in range(per_day)]
+    with engine.begin() as conn:
+        conn.execute(insert(Annotation), rows)
+
+
+def run(path, pragmas, readers, seconds):
+    engine = models.make_engine(f"sqlite:///{path}", pragmas=pragmas,
+                                pool_size=readers + 1, connect_args={'timeout': 1})
+    models.Base.metadata.create_all(engine)
+    seed(engine)
+    models.remove_session()
+    models.SessionLocal.configure(bind=engine)
+    svc = AnnotationsService(Path(path).parent, use_db=True)
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        i = n
+        while not stop.is_set():
+            try:
+                sess = models.get_session()
+                sess.query(Annotation).filter(Annotation.date == DAYS[i % len(DAYS)]).all()
+                count('reads')
+            except Exception:
+                count('errors')
+            finally:
+                models.remove_session()
+            i += 1
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            # AnnotationsService.vote falls back to JSON on DB errors; call the DB path directly
+            try:
+                svc._write_votes({f"{DAYS[i % len(DAYS)]}-{i % 50}": (1, 0)})
+                count('writes')
+            except Exception:
+                count('errors')
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    models.remove_session()
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + 1 writer for {args.seconds:.0f} s")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, pragmas in (('no pragmas', {}), ('WAL + pragmas', None)):
+            counts = run(Path(tmp) / f"{name.split()[0]}.db", pragmas, args.readers, args.seconds)
+            print(f"  {name:14s} {counts['reads'] / args.seconds:8.0f} reads/s "
+                  f"{counts['writes'] / args.seconds:7.0f} writes/s  {counts['errors']} locked")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: concurrent votes on one annotation in SQLite.
+
+Several threads vote on the same annotation at once, first with the old
+read-modify-write (load the row, ``likes += 1`` in Python, commit) and then
+with AnnotationsService.vote(), which does it in a single UPDATE. Reports
+throughput and how many votes were lost:
+
+    python benchmarks/bench_vote_concurrency.py [--threads 8] [--votes 2000] [--flush-ms 100]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine
+
+from application import models
+from application.models import Annotation
+from application.services.annotations_service import AnnotationsService
+
+
+def read_modify_write(ann_id, vote):
+    """The vote path before it moved into SQL."""
+    sess = models.get_session()
+    try:
+        a = sess.query(Annotation).filter(Annotation.id == ann_id).one_or_none()
+        if vote == 'like':
+            a.likes += 1
+        else:
+            a.dislikes += 1
+        d = a.dislikes
+        if d >= 5:
+            a.status = 'removed'
+        elif d >= 3:
+            a.status = 'warning'
+        elif a.status in ('warning', 'removed'):
+            a.status = 'active'
+        sess.commit()
+    finally:
+        sess.close()
+
+
+def run(svc, vote_fn, threads, votes, finish=None):
+    ann = svc.create('2025-10-01', 'SE3', 'benchmark')
+    plan = ['like' if i % 3 else 'dislike' for i in range(votes)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda v: vote_fn(ann['id'], v), plan))
+    if finish is not None:
+        finish()
+    elapsed = time.perf_counter() - t0
+    final = [a for a in svc.list(date='2025-10-01') if a['id'] == ann['id']][0]
+    lost = votes - final['likes'] - final['dislikes']
+    return elapsed, lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--votes', type=int, default=2000)
+    parser.add_argument('--flush-ms', type=int, default=100, help='vote buffer flush interval')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", connect_args={'timeout': 30},
+                               pool_size=args.threads)
+        models.Base.metadata.create_all(engine)
+        models.SessionLocal.configure(bind=engine)
+        svc = AnnotationsService(Path(tmp), use_db=True)
+
+        print(f"{args.votes} votes from {args.threads} threads on one annotation")
+        for name, fn in (('read-modify-write', read_modify_write), ('single UPDATE', svc.vote)):
+            elapsed, lost = run(svc, fn, args.threads, args.votes)
+            print(f"  {name:18s} {elapsed:6.2f} s  {args.votes / elapsed:8.0f} votes/s  "
+                  f"{args.votes:6d} commits  lost {lost}")
+        buffer = svc.enable_vote_buffer(interval_ms=args.flush_ms)
+        elapsed, lost = run(svc, svc.vote, args.threads, args.votes, finish=buffer.stop)
+        print(f"  {'buffered':18s} {elapsed:6.2f} s  {args.votes / elapsed:8.0f} votes/s  "
+              f"{buffer.flushes:6d} commits  lost {lost}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# modules that build the app on import (application.app) get TestingConfig:
+# an in-memory database and no background threads fetching real prices
+os.environ['FLASK_ENV'] = 'testing'
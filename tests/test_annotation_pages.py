@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, insert
+
+from application import endpoints, models
+from application.endpoints import AnnotationsAPI
+from application.services.annotations_service import AnnotationsService
+
+T0 = datetime(2025, 10, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = models.make_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+    models.Base.metadata.create_all(engine)
+    rows = [{'id': f"{i:03d}", 'date': '2025-10-01', 'area': 'SE3' if i % 4 else 'SE4', 'text': f"note {i}",
+             'author': 'anonymous', 'likes': i, 'dislikes': 0, 'status': 'active',
+             # pairs share a timestamp, so the id has to break ties
+             'created_at': T0 + timedelta(seconds=i // 2)} for i in range(40)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Annotation), rows)
+    previous = models.SessionLocal.kw['bind']
+    models.remove_session()
+    models.SessionLocal.configure(bind=engine)
+    yield engine
+    models.remove_session()
+    models.SessionLocal.configure(bind=previous)
+    engine.dispose()
+
+
+def _walk(svc, **kwargs):
+    pages, after = [], None
+    while True:
+        items, after = svc.page(after=after, **kwargs)
+        pages.append(items)
+        if after is None:
+            return pages
+
+
+def test_db_pages_cover_every_row_once_in_keyset_order(tmp_path, db):
+    svc = AnnotationsService(tmp_path, use_db=True)
+    pages = _walk(svc, date='2025-10-01', area='SE3', limit=7)
+    ids = [a['id'] for page in pages for a in page]
+    assert ids == [f"{i:03d}" for i in range(40) if i % 4]
+    assert [len(p) for p in pages] == [7, 7, 7, 7, 2]
+    assert pages[0][0]['created_at'] == T0.isoformat()
+
+
+def test_db_page_selects_only_requested_columns_via_the_index(tmp_path, db):
+    svc = AnnotationsService(tmp_path, use_db=True)
+    statements = []
+    listener = lambda conn, cursor, stmt, params, context, many: statements.append((stmt, params))
+    event.listen(db, 'before_cursor_execute', listener)
+    try:
+        items, after = svc.page(date='2025-10-01', limit=5, fields=['text', 'likes'])
+        svc.page(date='2025-10-01', limit=5, after=after, fields=['text', 'likes'])
+    finally:
+        event.remove(db, 'before_cursor_execute', listener)
+    assert items[0] == {'text': 'note 0', 'likes': 0} and after == (T0.replace(second=2).isoformat(), '004')
+    sql, params = [s for s in statements if s[0].lstrip().upper().startswith('SELECT')][-1]
+    assert 'annotations.author' not in sql and 'annotations.status' not in sql
+    with db.connect() as conn:
+        plan = ' '.join(r[-1] for r in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params))
+    assert 'ix_annotations_date_created' in plan and 'TEMP B-TREE' not in plan
+
+
+def test_json_backend_pages_the_same_way(tmp_path):
+    svc = AnnotationsService(tmp_path, use_db=False)
+    created = [svc.create('2025-10-01', 'SE3', f"note {i}")['id'] for i in range(5)]
+    pages = _walk(svc, date='2025-10-01', limit=2, fields=['id', 'text'])
+    assert [a['id'] for page in pages for a in page] == created
+    assert pages[0][0] == {'id': created[0], 'text': 'note 0'}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    svc = AnnotationsService(tmp_path, use_db=False)
+    for i in range(5):
+        svc.create('2025-10-01', 'SE3', f"note {i}")
+    monkeypatch.setattr(endpoints, 'ANN_SERVICE', svc)
+    app = Flask(__name__)
+    app.add_url_rule('/annotations', view_func=AnnotationsAPI.as_view('annotations'))
+    return app.test_client()
+
+
+def test_api_follows_next_cursor(client):
+    texts, url = [], '/annotations?date=2025-10-01&limit=2&fields=text'
+    while url:
+        body = client.get(url).get_json()
+        texts += [a['text'] for a in body['annotations']]
+        url = body['next_cursor'] and f"/annotations?date=2025-10-01&limit=2&fields=text&cursor={body['next_cursor']}"
+    assert texts == [f"note {i}" for i in range(5)]
+    # without paging parameters the full list is returned as before
+    legacy = client.get('/annotations?date=2025-10-01').get_json()
+    assert len(legacy['annotations']) == 5 and 'next_cursor' not in legacy
+
+
+def test_api_rejects_bad_paging_parameters(client):
+    assert client.get('/annotations?limit=0').status_code == 422
+    assert client.get('/annotations?limit=abc').status_code == 422
+    assert client.get('/annotations?limit=10&cursor=not-a-cursor').status_code == 422
+    # well-formed cursor whose created_at is not a timestamp: 422, not a silent JSON fallback
+    bad_time = base64.urlsafe_b64encode(json.dumps(['yesterday', 'x']).encode()).decode().rstrip('=')
+    assert client.get(f'/annotations?limit=10&cursor={bad_time}').status_code == 422
+    resp = client.get('/annotations?fields=text,password')
+    assert resp.status_code == 422 and resp.get_json()['unknown'] == ['password']
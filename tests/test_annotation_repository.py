@@ -0,0 +1,167 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import json
+import multiprocessing
+import os
+
+from application.services import annotation_repository
+from application.services.annotation_repository import AnnotationRepository, LogCompactor
+from application.services.annotations_service import AnnotationsService
+
+
+def _service(tmp_path):
+    return AnnotationsService(tmp_path, use_db=False)
+
+
+def test_list_uses_indexes_and_keeps_file_order(tmp_path):
+    svc = _service(tmp_path)
+    a = svc.create('2025-10-01', 'SE3', 'first', user_id='u1')
+    b = svc.create('2025-10-01', 'SE4', 'second', user_id='u2')
+    c = svc.create('2025-10-01', 'SE3', 'third', user_id='u2')
+    svc.create('2025-10-02', 'SE3', 'other day')
+
+    assert [x['id'] for x in svc.list(date='2025-10-01', area='SE3')] == [a['id'], c['id']]
+    assert [x['id'] for x in svc.list(date='2025-10-01')] == [a['id'], b['id'], c['id']]
+    assert [x['id'] for x in svc.list(user_id='u2')] == [b['id'], c['id']]
+    assert [x['id'] for x in svc.list(date='2025-10-01', area='SE3', user_id='u2')] == [c['id']]
+    assert len(svc.list(area='SE3')) == 3
+    assert svc.list(date='2030-01-01') == []
+
+    # results are copies; mutating them doesn't touch the repository
+    svc.list(date='2025-10-01')[0]['text'] = 'changed'
+    assert svc.list(date='2025-10-01')[0]['text'] == 'first'
+
+
+def test_writes_append_to_the_log_and_compact_into_the_file(tmp_path):
+    svc = _service(tmp_path)
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    for _ in range(3):
+        voted = svc.vote(ann['id'], 'dislike')
+    assert voted['dislikes'] == 3 and voted['status'] == 'warning'
+    assert svc.moderate(ann['id'], 'remove')['status'] == 'removed'
+    assert svc.vote('missing', 'like') is None
+
+    events = [json.loads(line) for line in svc.repo.log_path.read_text(encoding='utf-8').splitlines()]
+    assert [e['op'] for e in events] == ['create', 'vote', 'vote', 'vote', 'moderate']
+    assert events[1]['vote'] == 'dislike' and events[-1]['action'] == 'remove'
+    assert not (tmp_path / 'annotations.json').exists()
+
+    assert svc.repo.compact(min_events=10) == 0
+    assert svc.repo.compact() == 5
+    assert svc.repo.log_path.stat().st_size == 0
+    on_disk = json.loads((tmp_path / 'annotations.json').read_text(encoding='utf-8'))
+    assert on_disk[0]['dislikes'] == 3 and on_disk[0]['status'] == 'removed'
+
+
+def test_state_is_rebuilt_from_snapshot_and_log(tmp_path):
+    svc = _service(tmp_path)
+    a = svc.create('2025-10-01', 'SE3', 'compacted')
+    svc.repo.compact()
+    b = svc.create('2025-10-01', 'SE3', 'logged')
+    svc.vote(a['id'], 'like')
+    svc.vote(a['id'], 'like')
+
+    # a fresh process sees the snapshot plus the replayed log
+    fresh = AnnotationRepository(tmp_path / 'annotations.json')
+    assert [(x['id'], x['likes']) for x in fresh.list(date='2025-10-01')] == [(a['id'], 2), (b['id'], 0)]
+
+
+def test_replay_works_without_pread(tmp_path, monkeypatch):
+    # os.pread doesn't exist on Windows
+    monkeypatch.delattr(os, 'pread', raising=False)
+    svc = _service(tmp_path)
+    a = svc.create('2025-10-01', 'SE3', 'logged')
+    svc.vote(a['id'], 'like')
+    fresh = AnnotationRepository(tmp_path / 'annotations.json')
+    assert fresh.get(a['id'])['likes'] == 1
+    svc.vote(a['id'], 'dislike')
+    assert fresh.get(a['id'])['dislikes'] == 1
+    assert fresh.compact() == 3
+
+def test_torn_last_line_is_ignored_and_overwritten(tmp_path):
+    svc = _service(tmp_path)
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    with open(svc.repo.log_path, 'ab') as fh:
+        fh.write(b'{"op": "vote", "id": "')  # crashed mid-append
+
+    fresh = AnnotationRepository(tmp_path / 'annotations.json')
+    assert fresh.get(ann['id'])['likes'] == 0
+    fresh.update(ann['id'], lambda found: found.update(likes=1), op='vote', vote='like')
+    assert AnnotationRepository(tmp_path / 'annotations.json').get(ann['id'])['likes'] == 1
+
+
+def test_without_flock_other_writers_events_are_kept(tmp_path, monkeypatch):
+    # Windows: no cross-process lock between one process's sync and append
+    monkeypatch.setattr(annotation_repository, 'fcntl', None)
+    first = AnnotationRepository(tmp_path / 'annotations.json')
+    second = AnnotationRepository(tmp_path / 'annotations.json')
+    a = first.add({'id': 'a', 'date': '2025-10-01', 'area': 'SE3', 'text': 'one', 'likes': 0})
+    second.add({'id': 'b', 'date': '2025-10-01', 'area': 'SE3', 'text': 'two', 'likes': 0})
+    with open(first.log_path, 'ab') as fh:
+        fh.write(b'{"op": "vote", "id": "')  # a torn tail
+
+    # second's event lands after first synced: first must not truncate it
+    with first._lock, first._flock(exclusive=True):
+        first._append('vote', dict(a, likes=1), vote='like')
+    fresh = AnnotationRepository(tmp_path / 'annotations.json')
+    assert {x['id']: x['likes'] for x in fresh.all()} == {'a': 1, 'b': 0}
+    assert first.log_path.read_bytes().endswith(b'\n')
+
+
+def test_replaying_a_log_that_was_already_compacted_changes_nothing(tmp_path):
+    svc = _service(tmp_path)
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    svc.vote(ann['id'], 'like')
+    log = svc.repo.log_path.read_bytes()
+    svc.repo.compact()
+    # crash between the snapshot rename and the log truncate
+    svc.repo.log_path.write_bytes(log)
+    assert AnnotationRepository(tmp_path / 'annotations.json').all() == svc.repo.all()
+    assert svc.repo.get(ann['id'])['likes'] == 1
+
+
+def _vote_many(path, ann_id, n):
+    svc = AnnotationsService(Path(path), use_db=False)
+    for _ in range(n):
+        svc.vote(ann_id, 'like')
+
+
+def test_votes_from_several_processes_are_not_lost(tmp_path):
+    ann = _service(tmp_path).create('2025-10-01', 'SE3', 'popular')
+    ctx = multiprocessing.get_context('spawn')
+    workers = [ctx.Process(target=_vote_many, args=(str(tmp_path), ann['id'], 25)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(60)
+    assert AnnotationRepository(tmp_path / 'annotations.json').get(ann['id'])['likes'] == 100
+
+
+def test_log_compactor_runs_when_enough_events_are_pending(tmp_path):
+    svc = _service(tmp_path)
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    compactor = LogCompactor(svc.repo, interval=3600, min_events=3)
+    assert compactor.run_once() == 0
+    svc.vote(ann['id'], 'like')
+    svc.vote(ann['id'], 'like')
+    assert compactor.run_once() == 3
+    assert json.loads((tmp_path / 'annotations.json').read_text(encoding='utf-8'))[0]['likes'] == 2
+
+
+def test_reloads_when_another_process_writes_the_file(tmp_path):
+    svc = _service(tmp_path)
+    svc.create('2025-10-01', 'SE3', 'mine')
+    svc.repo.compact()
+    path = tmp_path / 'annotations.json'
+    items = json.loads(path.read_text(encoding='utf-8'))
+    items.append({'id': 'external', 'date': '2025-10-01', 'area': 'SE3', 'text': 'theirs',
+                  'likes': 0, 'dislikes': 0, 'status': 'active'})
+    path.write_text(json.dumps(items), encoding='utf-8')
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert [a['text'] for a in svc.list(date='2025-10-01', area='SE3')] == ['mine', 'theirs']
+    assert AnnotationRepository.for_path(path) is svc.repo
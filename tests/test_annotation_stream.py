@@ -0,0 +1,110 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import json
+
+import pytest
+from flask import Flask
+
+from application import endpoints
+from application.endpoints import AnnotationStreamAPI
+from application.services.annotation_events import EventHub
+from application.services.annotations_service import AnnotationsService
+
+
+def _ann(date='2025-10-01', area='SE3', **extra):
+    return {'id': 'x', 'date': date, 'area': area, **extra}
+
+
+def test_events_reach_only_matching_subscribers():
+    hub = EventHub()
+    day_area = hub.subscribe(date='2025-10-01', area='SE3')
+    day = hub.subscribe(date='2025-10-01')
+    everything = hub.subscribe()
+    other = hub.subscribe(date='2025-10-02', area='SE3')
+
+    assert hub.publish('create', _ann()) == 3
+    assert hub.publish('vote', _ann(area='SE4')) == 2
+    assert [day_area.get(0)['type'], day_area.get(0)] == ['create', None]
+    assert [e['annotation']['area'] for e in (day.get(0), day.get(0))] == ['SE3', 'SE4']
+    assert everything.get(0)['id'] == 1 and other.get(0) is None
+
+    other.close()
+    assert hub.subscriber_count() == 3
+    assert other.get(0) is None and other.closed
+
+
+def test_slow_subscribers_drop_the_oldest_events():
+    hub = EventHub()
+    sub = hub.subscribe(maxsize=3)
+    for i in range(5):
+        hub.publish('vote', _ann(likes=i))
+    assert sub.dropped == 2
+    assert [sub.get(0)['annotation']['likes'] for _ in range(3)] == [2, 3, 4]
+
+
+def test_reconnect_replays_missed_events_from_history():
+    hub = EventHub(history=3)
+    for i in range(5):
+        hub.publish('vote', _ann(area='SE3' if i % 2 else 'SE4', likes=i))
+    sub = hub.subscribe(area='SE3', last_event_id=2)
+    assert [sub.get(0)['id'], sub.get(0)] == [4, None]
+
+
+def test_service_publishes_writes(tmp_path):
+    hub = EventHub()
+    svc = AnnotationsService(tmp_path, use_db=False, events=hub)
+    sub = hub.subscribe(date='2025-10-01')
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    svc.vote(ann['id'], 'like')
+    svc.moderate(ann['id'], 'warn')
+    svc.vote('missing', 'like')
+    events = [sub.get(0) for _ in range(3)]
+    assert [e['type'] for e in events] == ['create', 'vote', 'moderate']
+    assert events[1]['annotation']['likes'] == 1 and events[2]['annotation']['status'] == 'warning'
+    assert sub.get(0) is None
+
+
+@pytest.fixture
+def stream(tmp_path, monkeypatch):
+    svc = AnnotationsService(tmp_path, use_db=False, events=EventHub())
+    monkeypatch.setattr(endpoints, 'ANN_SERVICE', svc)
+    monkeypatch.setattr(AnnotationStreamAPI, 'HEARTBEAT_SECONDS', 0.01)
+    app = Flask(__name__)
+    app.add_url_rule('/annotations/stream', view_func=AnnotationStreamAPI.as_view('annotation_stream'))
+    return app.test_client(), svc
+
+
+def test_sse_endpoint_streams_filtered_events(stream):
+    client, svc = stream
+    resp = client.get('/annotations/stream?date=2025-10-01&prisklass=SE3', buffered=False)
+    assert resp.mimetype == 'text/event-stream' and resp.headers['Cache-Control'] == 'no-cache'
+    chunks = iter(resp.response)
+    assert next(chunks) == b'retry: 5000\n\n'
+    assert svc.events.subscriber_count() == 1
+
+    svc.create('2025-10-01', 'SE4', 'other area')
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    frame = next(chunks).decode('utf-8')
+    lines = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    assert lines['id'] == '2' and lines['event'] == 'create'
+    assert json.loads(lines['data'])['id'] == ann['id']
+    # nothing else pending: a heartbeat comment follows
+    assert next(chunks) == b': keepalive\n\n'
+
+    resp.close()
+    assert svc.events.subscriber_count() == 0
+
+
+def test_sse_resumes_after_last_event_id(stream):
+    client, svc = stream
+    first = svc.create('2025-10-01', 'SE3', 'before')
+    second = svc.create('2025-10-01', 'SE3', 'missed')
+    resp = client.get('/annotations/stream?date=2025-10-01', headers={'Last-Event-ID': '1'}, buffered=False)
+    chunks = iter(resp.response)
+    next(chunks)
+    frame = next(chunks).decode('utf-8')
+    assert 'id: 2\n' in frame and second['id'] in frame and first['id'] not in frame
+    resp.close()
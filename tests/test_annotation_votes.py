@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+
+from application import models
+from application.services.annotations_service import AnnotationsService
+
+
+@pytest.fixture
+def svc(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'votes.db'}", connect_args={'timeout': 30})
+    models.Base.metadata.create_all(engine)
+    previous = models.SessionLocal.kw['bind']
+    models.remove_session()
+    models.SessionLocal.configure(bind=engine)
+    yield AnnotationsService(tmp_path, use_db=True)
+    models.remove_session()
+    models.SessionLocal.configure(bind=previous)
+    engine.dispose()
+
+
+def test_vote_updates_counts_and_status_in_sql(svc):
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    assert svc.vote(ann['id'], 'like')['likes'] == 1
+    statuses = [svc.vote(ann['id'], 'dislike')['status'] for _ in range(5)]
+    assert statuses == ['active', 'active', 'warning', 'warning', 'removed']
+    assert svc.moderate(ann['id'], 'restore')['status'] == 'active'
+    # the next vote re-applies the thresholds
+    voted = svc.vote(ann['id'], 'like')
+    assert (voted['likes'], voted['dislikes'], voted['status']) == (2, 5, 'removed')
+    assert svc.vote('missing', 'like') is None
+    # nothing went to the JSON fallback
+    assert not svc.repo.log_path.exists()
+
+
+def test_concurrent_votes_are_not_lost(svc):
+    ann = svc.create('2025-10-01', 'SE3', 'popular')
+    votes = ['like'] * 120 + ['dislike'] * 80
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda v: svc.vote(ann['id'], v), votes))
+    assert all(r is not None for r in results)
+    final = [a for a in svc.list(date='2025-10-01') if a['id'] == ann['id']][0]
+    assert (final['likes'], final['dislikes'], final['status']) == (120, 80, 'removed')
+
+
+def test_vote_without_returning_reads_the_row_back(svc, monkeypatch):
+    monkeypatch.setattr(models.SessionLocal.kw['bind'].dialect, 'update_returning', False)
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    for _ in range(3):
+        voted = svc.vote(ann['id'], 'dislike')
+    assert (voted['dislikes'], voted['status']) == (3, 'warning')
+    assert svc.vote('missing', 'dislike') is None
@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from application import elpriser_api
+from application.endpoints import CheapestWindowAPI
+from application.services.elpriser_service import ElpriserService
+from application.services.price_series import PriceSeries
+from tools.fake_elpriser_server import generate_day
+
+
+def _series(days):
+    return PriceSeries.concat([PriceSeries.from_payload(generate_day(d, 'SE3')) for d in days], zone='SE3')
+
+
+def _brute_force(prices, slots):
+    means = [sum(prices[i:i + slots]) / slots for i in range(len(prices) - slots + 1)]
+    return int(np.argmin(means))
+
+
+def test_cheapest_window_matches_brute_force():
+    series = _series([date(2025, 10, 1) + timedelta(days=i) for i in range(3)])
+    prices = (series.sek * 100).tolist()
+    for slots in (1, 4, 13, 96):
+        best = ElpriserService.cheapest_windows(series, slots)[0]
+        i = _brute_force(prices, slots)
+        assert best['start'] == series[i:i + 1].to_payload()[0]['time_start']
+        assert best['end'] == series[i + slots - 1:i + slots].to_payload()[0]['time_end']
+        assert best['mean'] == round(float(np.mean(prices[i:i + slots])), 2)
+
+
+def test_top_k_windows_do_not_overlap_or_span_gaps():
+    # Oct 2 is missing, so no window may run from Oct 1 into Oct 3
+    series = _series([date(2025, 10, 1), date(2025, 10, 3)])
+    windows = ElpriserService.cheapest_windows(series, 8, k=5)
+    assert len(windows) == 5
+    assert [w['mean'] for w in windows] == sorted(w['mean'] for w in windows)
+    spans = sorted((w['start'], w['end']) for w in windows)
+    for (_, prev_end), (next_start, _) in zip(spans, spans[1:]):
+        assert prev_end <= next_start
+    for w in windows:
+        assert w['start'][:10] == w['end'][:10] or w['end'].endswith('T00:00:00+02:00')
+
+
+def test_cheapest_windows_edge_cases():
+    series = _series([date(2025, 10, 1)])
+    assert ElpriserService.cheapest_windows(series, 97) == []
+    assert len(ElpriserService.cheapest_windows(series, 96, k=3)) == 1
+    assert ElpriserService.cheapest_windows(PriceSeries.empty(), 4) == []
+
+
+@pytest.fixture
+def window_client(tmp_path, monkeypatch):
+    def fake_fetch(self):
+        if self.day == '05':
+            return None
+        return generate_day(date(int(self.year), int(self.month), int(self.day)), self.prisklass)
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    app = Flask(__name__)
+    app.config['PROJECT_ROOT'] = tmp_path
+    app.add_url_rule('/api/cheapest_window', view_func=CheapestWindowAPI.as_view('cheapest_window'))
+    return app.test_client()
+
+
+def test_cheapest_window_endpoint(window_client):
+    resp = window_client.get('/api/cheapest_window?zone=SE3&date=2025-10-01&slots=8&k=2')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    expected = ElpriserService.cheapest_windows(_series([date(2025, 10, 1)]), 8, k=2)
+    assert body['windows'] == expected and body['cheapest'] == expected[0]
+    assert window_client.get('/api/cheapest_window?date=2025-10-05').status_code == 404
+
+
+@pytest.mark.parametrize('query, error', [
+    ('zone=SE9', 'Invalid zone'),
+    ('slots=abc', 'slots and k must be whole numbers'),
+    ('k=1.5', 'slots and k must be whole numbers'),
+    ('slots=0', 'slots must be >= 1 and k between 1 and 24'),
+    ('k=25', 'slots must be >= 1 and k between 1 and 24'),
+    ('from=2025-10-02&to=2025-10-01', 'from must not be after to'),
+    ('date=tomorrow', 'date must be a date (YYYY-MM-DD)'),
+    ('from=2024-01-01&to=2025-10-01', 'Date range is limited to'),
+])
+def test_cheapest_window_endpoint_rejects_bad_input(window_client, query, error):
+    resp = window_client.get('/api/cheapest_window?' + query)
+    assert resp.status_code == 422
+    assert resp.get_json()['error'].startswith(error)
+
+
+def test_cheapest_window_downloads_a_bounded_number_of_days(tmp_path, monkeypatch):
+    fetched = []
+
+    def fake_fetch(self):
+        day = date(int(self.year), int(self.month), int(self.day))
+        fetched.append(day)
+        return generate_day(day, self.prisklass)
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    monkeypatch.setattr(ElpriserService, 'last_published_day', staticmethod(lambda: date(2025, 10, 2)))
+    app = Flask(__name__)
+    app.config['PROJECT_ROOT'] = tmp_path
+    app.add_url_rule('/api/cheapest_window', view_func=CheapestWindowAPI.as_view('cheapest_window'))
+
+    resp = app.test_client().get('/api/cheapest_window?from=2025-01-01&to=2025-12-31')
+    assert resp.status_code == 200
+    # never past tomorrow, and at most MAX_FETCH_DAYS days (the latest ones)
+    assert len(fetched) == ElpriserService.MAX_FETCH_DAYS
+    assert max(fetched) == date(2025, 10, 2)
+    assert min(fetched) == date(2025, 10, 2) - timedelta(days=ElpriserService.MAX_FETCH_DAYS - 1)
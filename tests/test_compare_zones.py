@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from application import elpriser_api
+from application.endpoints import CompareZonesAPI
+from application.services.elpriser_service import ElpriserService
+from application.services.price_series import PriceSeries, align_series
+from tools.fake_elpriser_server import generate_day
+
+
+@pytest.fixture
+def generated_upstream(monkeypatch):
+    """Serve fake-server data, except SE2 which has nothing for Oct 2."""
+    def fake_fetch(self):
+        if self.prisklass == 'SE2' and self.day == '02':
+            return None
+        return generate_day(date(int(self.year), int(self.month), int(self.day)), self.prisklass)
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+
+
+def test_align_series_fills_missing_slots_with_nan():
+    a = PriceSeries.from_payload(generate_day(date(2025, 10, 1), 'SE1'))
+    b = a[10:20]
+    start, offset, matrix = align_series([a, b, PriceSeries.empty()])
+    assert np.array_equal(start, a.start) and np.array_equal(offset, a.offset)
+    assert np.array_equal(matrix[0], a.sek)
+    assert np.isnan(matrix[1, :10]).all() and np.array_equal(matrix[1, 10:20], b.sek)
+    assert np.isnan(matrix[2]).all()
+
+
+def test_compare_zones_aligns_and_ranks(tmp_path, generated_upstream):
+    result = ElpriserService.compare_zones(tmp_path, date(2025, 10, 1), date(2025, 10, 2))
+    assert result['zones'] == ['SE1', 'SE2', 'SE3', 'SE4']
+    assert len(result['time_start']) == 192
+    assert result['prices']['SE2'][96:] == [None] * 96
+
+    per_slot = np.array([[np.nan if v is None else v for v in result['prices'][z]] for z in result['zones']])
+    expected = np.nanmax(per_slot, axis=0) - np.nanmin(per_slot, axis=0)
+    assert np.allclose(result['spread'], expected, atol=0.011)
+
+    assert [d['date'] for d in result['daily']] == ['2025-10-01', '2025-10-02']
+    assert result['daily'][1]['zone_means']['SE2'] is None
+    assert result['daily'][0]['max_spread'] == max(result['spread'][:96])
+
+    means = [r['mean'] for r in result['ranking']]
+    assert means == sorted(means)
+    assert sum(r['cheapest_slots'] for r in result['ranking']) == 192
+
+
+@pytest.fixture
+def compare_client(tmp_path, generated_upstream):
+    app = Flask(__name__)
+    app.config['PROJECT_ROOT'] = tmp_path
+    app.add_url_rule('/api/compare_zones', view_func=CompareZonesAPI.as_view('compare_zones'))
+    return app.test_client()
+
+
+def test_compare_zones_endpoint(compare_client):
+    resp = compare_client.get('/api/compare_zones?from=2025-10-01&to=2025-10-01&zones=se1,SE4')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['zones'] == ['SE1', 'SE4'] and body['from'] == body['to'] == '2025-10-01'
+    assert len(body['time_start']) == 96 and set(body['prices']) == {'SE1', 'SE4'}
+
+
+@pytest.mark.parametrize('query, error', [
+    ('zones=SE1,SE9', 'Invalid zone'),
+    ('from=2025-10-02&to=2025-10-01', 'from must not be after to'),
+    ('from=2025-13-01', 'from must be a date (YYYY-MM-DD)'),
+    ('from=2024-01-01&to=2025-10-01', 'Date range is limited to 366 days'),
+])
+def test_compare_zones_endpoint_rejects_bad_input(compare_client, query, error):
+    resp = compare_client.get('/api/compare_zones?' + query)
+    assert resp.status_code == 422
+    assert resp.get_json()['error'].startswith(error)
+
+
+def test_compare_zones_downloads_a_bounded_number_of_days(tmp_path, monkeypatch):
+    fetched = []
+
+    def fake_fetch(self):
+        day = date(int(self.year), int(self.month), int(self.day))
+        fetched.append((day, self.prisklass))
+        return generate_day(day, self.prisklass)
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    monkeypatch.setattr(ElpriserService, 'last_published_day', staticmethod(lambda: date(2025, 10, 2)))
+    result = ElpriserService.compare_zones(tmp_path, date(2025, 1, 1), date(2025, 12, 31))
+    days = ElpriserService.MAX_FETCH_DAYS // 4
+    assert len(fetched) == days * 4
+    assert {d for d, _ in fetched} == {date(2025, 10, 2) - timedelta(days=i) for i in range(days)}
+    assert len(result['daily']) == days
@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from application import models
+from application.app import FlaskApp
+from application.config import TestingConfig
+
+
+@pytest.fixture
+def restore_engine():
+    previous = models.engine
+    yield
+    models.dispose_engine(models.engine)
+    models.bind_engine(previous)
+
+
+def test_flask_app_uses_the_configured_in_memory_database(restore_engine):
+    flask_app = FlaskApp(TestingConfig)
+    assert models.is_memory_url(models.engine.url)
+    assert flask_app.app.teardown_appcontext_funcs[-1] is models.remove_session
+
+    client = flask_app.app.test_client()
+    created = client.post('/annotations', json={'text': 'hi', 'date': '2025-10-01', 'area': 'SE3'})
+    assert created.status_code == 201
+    ann_id = created.get_json()['annotation']['id']
+    assert client.post(f'/annotations/{ann_id}/vote', json={'vote': 'like'}).get_json()['annotation']['likes'] == 1
+
+    # other threads get their own connection to the same shared-cache database
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(
+        models.get_session().execute(text('SELECT likes FROM annotations WHERE id = :id'), {'id': ann_id}).scalar())
+        or models.remove_session())
+    worker.start()
+    worker.join()
+    assert seen == [1]
+
+
+def test_configure_engine_reads_uri_pool_and_echo(tmp_path, restore_engine):
+    engine = models.configure_engine({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'SQLALCHEMY_ECHO': True,
+        'SQLALCHEMY_POOL_SIZE': 3,
+        'SQLALCHEMY_MAX_OVERFLOW': 1,
+    })
+    assert engine is models.engine and models.SessionLocal.kw['bind'] is engine
+    assert engine.echo and engine.pool.size() == 3
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert 'annotations' in [r[0] for r in conn.execute(text("SELECT name FROM sqlite_master"))]
+
+
+def test_rebinding_releases_the_previous_in_memory_database(restore_engine):
+    import warnings
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        first = FlaskApp(TestingConfig)
+    old_engine = models.engine
+    keepalive = models._keepalive[old_engine]
+    client = first.app.test_client()
+    assert client.post('/annotations', json={'text': 'hi', 'date': '2025-10-01', 'area': 'SE3'}).status_code == 201
+
+    FlaskApp(TestingConfig)
+    assert old_engine not in models._keepalive
+    assert keepalive.dbapi_connection is None
+    with models.engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM annotations')).scalar() == 0
+
+
+
+def test_testing_config_leaves_the_project_database_alone(tmp_path):
+    # a copy of the app in a fresh interpreter, so import-time side effects
+    # count too and a missing annotations.db shows any table being created
+    shutil.copytree(PROJECT_ROOT / 'application', tmp_path / 'application',
+                    ignore=shutil.ignore_patterns('static', '__pycache__', '*.json'))
+    script = (
+        "from application.app import FlaskApp\n"
+        "from application.config import TestingConfig\n"
+        "client = FlaskApp(TestingConfig).app.test_client()\n"
+        "assert client.post('/annotations', json={'text': 'hi', 'date': '2025-10-01', 'area': 'SE3'}).status_code == 201\n"
+        "assert client.get('/annotations?date=2025-10-01&prisklass=SE3').status_code == 200\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k != 'DATABASE_URL'}
+    env.update(FLASK_ENV='testing', PYTHONPATH=str(tmp_path))
+    subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, check=True)
+    assert not list(tmp_path.glob('annotations.db*'))
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from application import models
+from application.app import FlaskApp
+from application.config import TestingConfig
+
+
+@pytest.fixture
+def flask_app():
+    previous = models.engine
+    yield FlaskApp(TestingConfig)
+    models.dispose_engine(models.engine)
+    models.bind_engine(previous)
+
+
+def test_teardown_removes_the_request_session(flask_app, monkeypatch):
+    removed = []
+    remove = models.Session.remove
+    monkeypatch.setattr(models.Session, 'remove', lambda: removed.append(True) or remove())
+
+    @flask_app.app.route('/_session')
+    def touch_session():
+        models.get_session().execute(text('SELECT 1'))
+        return 'ok'
+
+    assert flask_app.app.test_client().get('/_session').status_code == 200
+    assert removed == [True]
+    assert not models.Session.registry.has()
+
+
+def test_one_request_shares_one_session_and_connection(flask_app):
+    seen = {}
+
+    @flask_app.app.route('/_sessions')
+    def two_lookups():
+        first, second = models.get_session(), models.get_session()
+        seen['same_session'] = first is second
+        seen['same_connection'] = first.connection() is second.connection()
+        other = []
+        worker = threading.Thread(target=lambda: other.append(models.get_session()) or models.remove_session())
+        worker.start()
+        worker.join()
+        seen['other_thread'] = other[0] is not first
+        return 'ok'
+
+    flask_app.app.test_client().get('/_sessions')
+    assert seen == {'same_session': True, 'same_connection': True, 'other_thread': True}
+
+
+def test_file_databases_get_the_sqlite_pragmas(tmp_path):
+    engine = models.make_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == models.SQLITE_PRAGMAS['busy_timeout']
+            assert conn.execute(text('PRAGMA cache_size')).scalar() == models.SQLITE_PRAGMAS['cache_size']
+    finally:
+        engine.dispose()
@@ -0,0 +1,220 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from application import elpriser_api
+from application.services.elpriser_service import ElpriserService
+from tools.fake_elpriser_server import generate_day
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Replace the upstream fetch with one that returns a whole day at 1 SEK/kWh."""
+    calls = []
+
+    def fake_fetch(self):
+        calls.append((self.year, self.month, self.day, self.prisklass))
+        if self.prisklass == 'SE4' and self.day == '02':
+            return None
+        day = date(int(self.year), int(self.month), int(self.day))
+        return [dict(slot, SEK_per_kWh=1.0) for slot in generate_day(day, self.prisklass)]
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    return calls
+
+
+def test_fetch_range_yields_every_day_and_zone(tmp_path, fake_upstream):
+    results = list(ElpriserService.fetch_range(tmp_path, date(2025, 10, 1), date(2025, 10, 3), max_workers=4))
+    assert len(results) == 3 * 4
+    assert {(d.day, z) for d, z, _ in results} == {(d, z) for d in (1, 2, 3) for z in ElpriserService.ZONES}
+    failed = [(d, z) for d, z, payload in results if payload is None]
+    assert failed == [(date(2025, 10, 2), 'SE4')]
+
+
+def test_fetch_range_uses_cache_on_second_pass(tmp_path, fake_upstream):
+    list(ElpriserService.fetch_range(tmp_path, date(2025, 10, 1), date(2025, 10, 1), zones=['SE3']))
+    list(ElpriserService.fetch_range(tmp_path, date(2025, 10, 1), date(2025, 10, 1), zones=['SE3']))
+    assert fake_upstream == [('2025', '10', '01', 'SE3')]
+
+
+def test_concurrent_get_prices_share_one_download(tmp_path, monkeypatch):
+
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch(self):
+        calls.append(self.get_url())
+        started.set()
+        release.wait(5)
+        return [{"SEK_per_kWh": 2.0}]
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', slow_fetch)
+    before = ElpriserService.upstream_stats()
+    results = []
+
+    def worker():
+        results.append(ElpriserService.get_prices(tmp_path, 2025, 10, 31, 'SE3'))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    # wait until the followers are parked on the in-flight call
+    deadline = time.monotonic() + 5
+    while ElpriserService.upstream_stats()['coalesced'] - before['coalesced'] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    after = ElpriserService.upstream_stats()
+    assert len(calls) == 1
+    assert results == [[{"SEK_per_kWh": 2.0}]] * 5
+    assert after['executions'] - before['executions'] == 1
+    assert after['coalesced'] - before['coalesced'] == 4
+    assert after['in_flight'] == 0
+
+
+def test_failed_dates_are_negative_cached(tmp_path, monkeypatch):
+    from application.elpriser_api import ElpriserAPI, PricesNotPublished
+
+    class FakeClient:
+        calls = 0
+
+        def get_json(self, url):
+            FakeClient.calls += 1
+            response = type('R', (), {'status_code': 404})()
+            raise elpriser_api.requests.HTTPError('404', response=response)
+
+    monkeypatch.setattr(ElpriserAPI, '_negative', {})
+    monkeypatch.setattr(elpriser_api, 'get_client', lambda: FakeClient())
+
+    with pytest.raises(PricesNotPublished) as exc_info:
+        ElpriserService.get_prices(tmp_path, 2030, 1, 1, 'SE3', strict=True)
+    assert exc_info.value.status == 422
+    # second lookup is answered from the negative cache
+    assert ElpriserService.get_prices(tmp_path, 2030, 1, 1, 'SE3') is None
+    assert FakeClient.calls == 1
+    assert ElpriserAPI.negative_cache_size() == 1
+
+
+def test_upstream_failures_are_logged_not_printed(monkeypatch, caplog, capsys):
+    from application.elpriser_api import ElpriserAPI
+
+    class DownClient:
+        def get_json(self, url):
+            raise elpriser_api.requests.ConnectionError('refused')
+
+    monkeypatch.setattr(ElpriserAPI, '_negative', {})
+    monkeypatch.setattr(elpriser_api, 'get_client', lambda: DownClient())
+    with caplog.at_level('WARNING', logger=elpriser_api.logger.name):
+        assert ElpriserAPI(2030, 1, 1, 'SE3').fetch_prices() is None
+    assert 'kunde inte nås: refused' in caplog.text
+    assert capsys.readouterr().out == ''
+
+
+def test_concurrency_cap_timeouts_are_not_negative_cached(tmp_path, monkeypatch):
+    from application.elpriser_api import ElpriserAPI, PricesUnavailable
+    from application.http_client import UpstreamBusy
+
+    class BusyClient:
+        def get_json(self, url):
+            raise UpstreamBusy('limit reached')
+
+    monkeypatch.setattr(ElpriserAPI, '_negative', {})
+    monkeypatch.setattr(elpriser_api, 'get_client', lambda: BusyClient())
+    with pytest.raises(PricesUnavailable):
+        ElpriserService.get_prices(tmp_path, 2030, 1, 1, 'SE3', strict=True)
+    assert ElpriserAPI._negative == {}
+
+
+def test_negative_cache_prunes_expired_entries_and_is_capped(monkeypatch):
+    from application.elpriser_api import ElpriserAPI, PricesUnavailable
+
+    monkeypatch.setattr(ElpriserAPI, '_negative', {})
+    monkeypatch.setattr(ElpriserAPI, 'NEGATIVE_MAX_ENTRIES', 3)
+    error = PricesUnavailable('down')
+    ElpriserAPI._remember_failure('expired', error, -1)
+    ElpriserAPI._remember_failure('a', error, 60)
+    assert list(ElpriserAPI._negative) == ['a']
+    for url in ('b', 'c', 'd'):
+        ElpriserAPI._remember_failure(url, error, 60)
+    assert list(ElpriserAPI._negative) == ['b', 'c', 'd']
+
+
+def _reference_summary(values):
+    if not values:
+        return {'avg': None, 'min': None, 'max': None}
+    return {'avg': round(sum(values) / len(values), 2), 'min': round(min(values), 2), 'max': round(max(values), 2)}
+
+
+def test_vectorized_parse_matches_item_parser():
+    import json
+    with (PROJECT_ROOT / 'elpriser_data.json').open(encoding='utf-8') as fh:
+        payload = json.load(fh)
+    # add a zero-priced slot (dropped by the fallback chain) and a .5 rounding edge
+    payload = payload + [dict(payload[0], SEK_per_kWh=0.0), dict(payload[1], SEK_per_kWh=0.00125)]
+
+    assert ElpriserService.parse_arrays(payload) is not None
+    labels, values = ElpriserService._parse_items(payload)
+    assert ElpriserService.parse_raw_payload(payload) == (labels, values, _reference_summary(values))
+    assert labels[:2] == ['00:00', '00:15']
+
+
+@pytest.mark.parametrize('payload', [
+    {'hours': [{'hour': '10', 'price': '1.5'}, {'hour': '11', 'price': 2}]},
+    [{'time_start': '2025-10-31T00:00:00Z', 'SEK_per_kWh': 0.5}],
+    [{'time_start': '2025-10-31T25:00:00+01:00', 'SEK_per_kWh': 0.5}],
+    [{'time_start': '2025-10-31T00:00:00+01:00', 'SEK_per_kWh': 0.0, 'price': 0.4}],
+    [0.1, 0.2, None],
+    [],
+])
+def test_irregular_payloads_fall_back_to_item_parser(payload):
+    items = ElpriserService._payload_items(payload)
+    assert ElpriserService.parse_arrays(items) is None
+    labels, values = ElpriserService._parse_items(items)
+    assert ElpriserService.parse_raw_payload(payload) == (labels, values, _reference_summary(values))
+
+
+def test_get_parsed_is_memoized_and_follows_new_payloads(tmp_path, fake_upstream):
+    # entries are keyed by content hash, so earlier tests may have parsed this payload
+    ElpriserService._memo.clear()
+    before = ElpriserService.memo_stats()
+    first = ElpriserService.get_parsed(tmp_path, '2025', '10', '01', 'SE3')
+    again = ElpriserService.get_parsed(tmp_path, '2025', '10', '01', 'SE3')
+    assert again is first
+    assert first[2] == [100.0] * 96  # öre/kWh
+    stats = ElpriserService.memo_stats()
+    # parsed exactly once even though the daily rollup also reads it
+    assert stats['misses'] - before['misses'] == 1
+    assert stats['hits'] - before['hits'] >= 1
+
+    # a refetch storing a different payload must not serve the stale parse
+    cache = ElpriserService.cache_for(tmp_path)
+    cache.put('2025-10-01_SE3', [{"SEK_per_kWh": 3.0, "time_start": "2025-10-01T00:00:00+01:00"}])
+    fresh = ElpriserService.get_parsed(tmp_path, '2025', '10', '01', 'SE3')
+    assert fresh[2] == [300.0]
+    assert fake_upstream == [('2025', '10', '01', 'SE3')]
+
+
+def test_lru_memo_evicts_least_recently_used():
+    from application.services.memo import LRUMemo
+
+    memo = LRUMemo(maxsize=2)
+    memo.put('a', 1)
+    memo.put('b', 2)
+    assert memo.get('a') == 1
+    memo.put('c', 3)
+    assert memo.get('b') is None
+    assert memo.get_or_compute('a', lambda: 99) == 1
+    assert memo.get_or_compute('missing', lambda: None) is None
+    assert memo.stats() == {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 2, 'evictions': 1}
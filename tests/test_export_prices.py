@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import csv
+import gzip
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+from flask import Flask
+
+from application.endpoints import ExportPricesAPI
+from application.services.elpriser_service import ElpriserService
+from application.services.price_archive import PriceArchive
+from application.services.price_cache import PriceCache
+from application.services.price_series import PriceSeries
+from tools.fake_elpriser_server import generate_day
+
+START = date(2025, 10, 1)
+
+
+def _series(d, zone='SE3'):
+    return PriceSeries.from_payload(generate_day(d, zone), zone=zone)
+
+
+def test_iter_stored_combines_sources_in_chunks(tmp_path):
+    # day 0-1 archived, day 2 in the price table, day 3 only cached, day 4 missing
+    archive = PriceArchive(tmp_path / ElpriserService.ARCHIVE_DIRNAME).zone('SE3')
+    for i in (0, 1):
+        archive.append_day(START + timedelta(days=i), _series(START + timedelta(days=i)))
+    ElpriserService.price_store(tmp_path).upsert_series(_series(START + timedelta(days=2)))
+    d = START + timedelta(days=3)
+    PriceCache(tmp_path / ElpriserService.CACHE_DIRNAME).put(PriceCache.make_key(d.year, d.month, d.day, 'SE3'),
+                                                             generate_day(d, 'SE3'))
+
+    chunks = list(ElpriserService.iter_stored(tmp_path, 'SE3', START, START + timedelta(days=4), chunk_days=2))
+    assert [len(c) for c in chunks] == [192, 192]
+    payload = [row for c in chunks for row in c.to_payload()]
+    assert payload == [row for i in range(4) for row in generate_day(START + timedelta(days=i), 'SE3')]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def fake_iter_stored(project_root, zone, start, end, chunk_days=31):
+        for i in range((end - start).days + 1):
+            yield _series(start + timedelta(days=i), zone)
+
+    monkeypatch.setattr(ElpriserService, 'iter_stored', staticmethod(fake_iter_stored))
+    app = Flask(__name__)
+    app.add_url_rule('/export/prices', view_func=ExportPricesAPI.as_view('export_prices'))
+    return app.test_client()
+
+
+def test_export_csv_streams_one_chunk_per_series(client):
+    resp = client.get('/export/prices?zone=SE4&from=2025-10-01&to=2025-10-03', buffered=False)
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/csv'
+    assert resp.headers.get('Content-Encoding') is None
+    chunks = list(resp.response)
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    assert len(rows) == 3 * 96
+    first = generate_day(START, 'SE4')[0]
+    assert rows[0]['zone'] == 'SE4' and rows[0]['time_start'] == first['time_start']
+    assert float(rows[0]['SEK_per_kWh']) == first['SEK_per_kWh']
+
+
+def test_export_ndjson_gzip(client):
+    resp = client.get('/export/prices?zone=SE3&date=2025-10-26&format=ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(resp.get_data()).decode('utf-8').splitlines()
+    assert [json.loads(line)['time_start'] for line in lines] == [s['time_start'] for s in generate_day(date(2025, 10, 26), 'SE3')]
+
+
+def test_export_rejects_bad_input(client):
+    assert client.get('/export/prices?format=xml').status_code == 422
+    assert client.get('/export/prices?zone=SE9').status_code == 422
+    assert client.get('/export/prices?from=2025-10-02&to=2025-10-01').status_code == 422
+    resp = client.get('/export/prices?from=1900-01-01&to=2100-12-31')
+    assert resp.status_code == 422 and resp.get_json()['error'] == 'Date range is limited to 1830 days'
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from datetime import date
+
+import pytest
+
+from application.elpriser_api import ElpriserAPI
+from tools.fake_elpriser_server import generate_day, start_server
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = start_server(today=date(2025, 10, 31))
+    monkeypatch.setattr(ElpriserAPI, 'BASE_URL', server.base_url)
+    monkeypatch.setattr(ElpriserAPI, '_negative', {})
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_day_matches_upstream_shape():
+    slots = generate_day(date(2025, 10, 31), 'SE3')
+    assert len(slots) == 96
+    assert set(slots[0]) == {'SEK_per_kWh', 'EUR_per_kWh', 'EXR', 'time_start', 'time_end'}
+    assert slots[0]['time_start'] == '2025-10-31T00:00:00+01:00'
+    assert slots[-1]['time_end'] == '2025-11-01T00:00:00+01:00'
+    # deterministic per (date, zone)
+    assert generate_day(date(2025, 10, 31), 'SE3') == slots
+    # DST change days have 100 / 92 quarter-hours
+    assert len(generate_day(date(2025, 10, 26), 'SE3')) == 100
+    assert len(generate_day(date(2025, 3, 30), 'SE3')) == 92
+
+
+def test_elpriser_api_against_fake_server(fake_server):
+    api = ElpriserAPI(year=2025, month=10, day=31, prisklass='SE4')
+    assert api.fetch_prices() == generate_day(date(2025, 10, 31), 'SE4')
+
+    unpublished = ElpriserAPI(year=2025, month=11, day=5, prisklass='SE4')
+    assert unpublished.fetch_prices() is None
+    assert unpublished.error.status == 422
+    assert fake_server.requests == 2
+
+
+def test_fetch_endpoint_stores_under_the_configured_project_root(fake_server, tmp_path):
+    from flask import Flask
+    from application.endpoints import ElpriserAPI as ElpriserEndpoint
+    from application.services.elpriser_service import ElpriserService
+
+    app = Flask(__name__)
+    app.config['PROJECT_ROOT'] = tmp_path
+    app.add_url_rule('/fetch_elpriser', view_func=ElpriserEndpoint.as_view('fetch_elpriser'))
+    resp = app.test_client().get('/fetch_elpriser?year=2025&month=10&day=30&prisklass=SE2')
+    assert resp.status_code == 200
+    assert ElpriserService.load_cached(tmp_path, 2025, 10, 30, 'SE2') == generate_day(date(2025, 10, 30), 'SE2')
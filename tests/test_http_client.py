@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+import requests
+
+from application.http_client import UpstreamClient, CircuitOpenError
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"status {self.status_code}")
+
+
+def _client_with(responses, monkeypatch, **kwargs):
+    client = UpstreamClient(backoff_base=0, backoff_max=0, **kwargs)
+    calls = []
+
+    def fake_get(url, **kw):
+        calls.append(kw.get('timeout'))
+        item = responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    monkeypatch.setattr(client.session, 'get', fake_get)
+    return client, calls
+
+
+def test_retries_transient_errors_then_succeeds(monkeypatch):
+    client, calls = _client_with([
+        requests.ConnectionError('boom'),
+        FakeResponse(503),
+        FakeResponse(200, [{'SEK_per_kWh': 1.0}]),
+    ], monkeypatch, connect_timeout=1, read_timeout=2)
+    assert client.get_json('http://upstream/x') == [{'SEK_per_kWh': 1.0}]
+    assert calls == [(1.0, 2.0)] * 3
+
+
+def test_does_not_retry_client_errors(monkeypatch):
+    client, calls = _client_with([FakeResponse(404)], monkeypatch)
+    with pytest.raises(requests.HTTPError):
+        client.get_json('http://upstream/missing')
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    client, calls = _client_with([requests.Timeout('slow')] * 3, monkeypatch, max_retries=2)
+    with pytest.raises(requests.Timeout):
+        client.get('http://upstream/slow')
+    assert len(calls) == 3
+
+
+def test_from_config_reads_settings():
+    client = UpstreamClient.from_config({'UPSTREAM_READ_TIMEOUT': 1.5, 'UPSTREAM_MAX_CONCURRENCY': 2})
+    assert client.read_timeout == 1.5
+    assert client.max_concurrency == 2
+    assert client.max_retries == 3
+
+
+def test_circuit_opens_after_threshold_and_fails_fast(monkeypatch):
+    client, calls = _client_with([requests.ConnectionError('down')] * 2 + [FakeResponse(200, [])],
+                                 monkeypatch, max_retries=0, breaker_threshold=2, breaker_reset=60)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            client.get('http://upstream/x')
+    with pytest.raises(CircuitOpenError):
+        client.get('http://upstream/x')
+    assert len(calls) == 2
+    [state] = client.breaker_states()
+    assert state['host'] == 'upstream'
+    assert state['state'] == 'open'
+    assert state['rejected'] == 1
+
+
+def test_half_open_probe_closes_circuit(monkeypatch):
+    client, calls = _client_with([requests.ConnectionError('down'), FakeResponse(200, [])],
+                                 monkeypatch, max_retries=0, breaker_threshold=1, breaker_reset=0)
+    with pytest.raises(requests.ConnectionError):
+        client.get('http://upstream/x')
+    assert client.breaker_states()[0]['state'] == 'open'
+    # reset_timeout=0: the next call is let through as a probe
+    assert client.get('http://upstream/x').status_code == 200
+    assert client.breaker_states()[0]['state'] == 'closed'
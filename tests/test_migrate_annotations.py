@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import json
+
+from sqlalchemy import text
+
+from application import migrate_annotations, models
+from application.services.annotations_service import AnnotationsService
+
+
+def _ann(i, **extra):
+    return {'id': f"a{i}", 'date': '2025-10-01', 'area': 'SE3', 'text': f"note {i}", 'author': 'anonymous',
+            'hour': None, 'created_at': f"2025-10-01T10:00:{i:02d}.000000Z", 'likes': i, 'dislikes': 0,
+            'status': 'active', 'user_id': None, **extra}
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['migrate_annotations', *argv])
+    return migrate_annotations.main()
+
+
+def test_adds_indexes_to_an_existing_table(tmp_path, monkeypatch, capsys):
+    db = tmp_path / 'old.db'
+    engine = models.make_engine(f"sqlite:///{db}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE annotations (id VARCHAR PRIMARY KEY, user_id VARCHAR, date VARCHAR NOT NULL, "
+                          "area VARCHAR NOT NULL, text TEXT NOT NULL, author VARCHAR, created_at DATETIME, "
+                          "likes INTEGER, dislikes INTEGER, status VARCHAR)"))
+    assert _run(monkeypatch, '--db', f"sqlite:///{db}", '--indexes-only') == 0
+    out = capsys.readouterr().out
+    assert 'ix_annotations_date_area_status' in out and 'ix_annotations_user_created' in out
+    assert 'INDEX ix_annotations_date_area_' in out
+    assert migrate_annotations.ensure_indexes(engine) == []
+
+
+def test_imports_in_chunks_with_dedupe(tmp_path, monkeypatch, capsys):
+    items = [_ann(i) for i in range(7)] + [_ann(3, text='edited'), {'id': 'broken', 'date': '2025-10-01'}]
+    path = tmp_path / 'annotations.json'
+    path.write_text(json.dumps(items), encoding='utf-8')
+    db = f"sqlite:///{tmp_path / 'new.db'}"
+    engine = models.make_engine(db)
+    migrate_annotations.ensure_indexes(engine)
+    stats = migrate_annotations.import_annotations(engine, migrate_annotations.read_annotations(path), chunk_size=3)
+    assert stats == {'read': 9, 'invalid': 1, 'duplicates': 1, 'inserted': 7, 'existing': 0}
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, text, likes, created_at FROM annotations ORDER BY id")).all()
+    assert len(rows) == 7
+    assert rows[3][:3] == ('a3', 'edited', 3) and rows[3][3].startswith('2025-10-01 10:00:03')
+
+    # re-running skips everything already imported
+    assert _run(monkeypatch, '--json', str(path), '--db', db, '--chunk-size', '2') == 0
+    assert 'inserted 0 in' in capsys.readouterr().out
+    assert migrate_annotations.import_annotations(engine, items)['existing'] == 7
+
+
+def test_reads_the_json_event_log(tmp_path):
+    svc = AnnotationsService(tmp_path, use_db=False)
+    ann = svc.create('2025-10-01', 'SE3', 'logged only')
+    svc.vote(ann['id'], 'like')
+    items = migrate_annotations.read_annotations(tmp_path / 'annotations.json')
+    assert [(a['id'], a['likes']) for a in items] == [(ann['id'], 1)]
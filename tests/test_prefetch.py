@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from datetime import datetime, date, timezone
+
+import pytest
+
+from application import elpriser_api
+from application.services import prefetch
+from application.services.prefetch import FileLease, PrefetchScheduler
+from tools.fake_elpriser_server import generate_day
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    calls = []
+
+    def fake_fetch(self):
+        calls.append(f"{self.year}-{self.month}-{self.day}_{self.prisklass}")
+        return generate_day(date(int(self.year), int(self.month), int(self.day)), self.prisklass)
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    return calls
+
+
+def test_before_publication_only_today_is_fetched(tmp_path, fake_upstream):
+    sched = PrefetchScheduler(tmp_path, zones=['SE3', 'SE4'], publish_hour=13)
+    fetched = sched.run_once(now=datetime(2025, 10, 31, 9, 0))
+    assert sorted(fetched) == [(date(2025, 10, 31), 'SE3'), (date(2025, 10, 31), 'SE4')]
+
+
+def test_after_publication_tomorrow_is_fetched_and_cache_is_reused(tmp_path, fake_upstream):
+    sched = PrefetchScheduler(tmp_path, zones=['SE3'], publish_hour=13)
+    sched.run_once(now=datetime(2025, 10, 31, 9, 0))
+    fetched = sched.run_once(now=datetime(2025, 10, 31, 14, 0))
+    assert fetched == [(date(2025, 11, 1), 'SE3')]
+    assert sched.run_once(now=datetime(2025, 10, 31, 14, 10)) == []
+    assert fake_upstream == ['2025-10-31_SE3', '2025-11-01_SE3']
+
+
+@pytest.mark.parametrize('utc, due_days', [
+    # 12:30 UTC is 13:30 in Stockholm: tomorrow's prices are due
+    (datetime(2025, 10, 31, 12, 30), [date(2025, 10, 31), date(2025, 11, 1)]),
+    # 23:30 UTC is already Nov 1 in Stockholm
+    (datetime(2025, 10, 31, 23, 30), [date(2025, 11, 1)]),
+])
+def test_schedule_follows_stockholm_time(tmp_path, monkeypatch, utc, due_days):
+    class UTCHost(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            instant = utc.replace(tzinfo=timezone.utc)
+            return instant.astimezone(tz) if tz else utc
+
+    monkeypatch.setattr(prefetch, 'datetime', UTCHost)
+    sched = PrefetchScheduler(tmp_path, zones=['SE3'], publish_hour=13)
+    assert sched.due() == [(d, 'SE3') for d in due_days]
+
+
+def test_lease_blocks_second_process(tmp_path, fake_upstream):
+    holder = FileLease(tmp_path / 'price_cache' / PrefetchScheduler.LEASE_NAME, ttl=600)
+    assert holder.acquire()
+    sched = PrefetchScheduler(tmp_path, zones=['SE3'])
+    assert sched.run_once(now=datetime(2025, 10, 31, 9, 0)) is None
+    assert fake_upstream == []
+    holder.release()
+    assert sched.run_once(now=datetime(2025, 10, 31, 9, 0)) == [(date(2025, 10, 31), 'SE3')]
+
+
+def test_stale_lease_is_taken_over(tmp_path):
+    path = tmp_path / 'lease'
+    assert FileLease(path, ttl=0).acquire()
+    other = FileLease(path, ttl=0)
+    assert other.acquire()
+    other.release()
+    assert not path.exists()
+
+
+def test_app_starts_background_tasks_only_when_asked(monkeypatch):
+    from application.app import FlaskApp
+    from application.config import TestingConfig
+    from application import models
+    from application.services.annotation_repository import LogCompactor
+
+    started = []
+    monkeypatch.setattr(PrefetchScheduler, 'start', lambda self: started.append('prefetch') or self)
+    monkeypatch.setattr(LogCompactor, 'start', lambda self: started.append('compactor') or self)
+
+    class LiveConfig(TestingConfig):
+        TESTING = False
+        PREFETCH_ENABLED = True
+        ANNOTATIONS_COMPACT_INTERVAL_SECONDS = 300
+
+    previous = models.engine
+    try:
+        flask_app = FlaskApp(LiveConfig)
+        assert started == [] and flask_app.prefetcher is None
+        flask_app.start_background_tasks()
+        flask_app.start_background_tasks()
+        assert started == ['prefetch', 'compactor']
+
+        LiveConfig.START_BACKGROUND_TASKS = True
+        FlaskApp(LiveConfig)
+        assert started == ['prefetch', 'compactor'] * 2
+    finally:
+        models.dispose_engine(models.engine)
+        models.bind_engine(previous)
+
+
+def test_importing_the_app_uses_testing_config():
+    from application.app import flask_app
+    assert flask_app.app.testing
+    assert flask_app.prefetcher is None and flask_app.compactor is None
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from application.services.elpriser_service import ElpriserService
+from application.services.price_archive import ArchiveError, PriceArchive, ZoneArchive
+from application.services.price_cache import PriceCache
+from application.services.price_series import PriceSeries
+from tools import build_price_archive
+from tools.fake_elpriser_server import generate_day
+
+START = date(2025, 10, 24)
+
+
+def _series(d, zone='SE3'):
+    return PriceSeries.from_payload(generate_day(d, zone), zone=zone)
+
+
+def test_append_and_slice_without_copying(tmp_path):
+    archive = PriceArchive(tmp_path).zone('SE3')
+    for i in range(5):
+        archive.append_day(START + timedelta(days=i), _series(START + timedelta(days=i)))
+
+    assert archive.days() == [START + timedelta(days=i) for i in range(5)]
+    # Oct 26 is the 100-slot DST day
+    assert len(archive) == 96 * 4 + 100
+    window = archive.series(START + timedelta(days=1), START + timedelta(days=3))
+    expected = [slot for i in (1, 2, 3) for slot in generate_day(START + timedelta(days=i), 'SE3')]
+    assert window.to_payload() == expected
+    records, _ = archive._map()
+    assert np.shares_memory(window.sek, records)
+    assert archive.covers(START, START + timedelta(days=4))
+    assert not archive.covers(START, START + timedelta(days=5))
+    assert len(archive.series(date(2024, 1, 1))) == 0
+
+
+def test_appends_are_in_order_and_visible_to_other_readers(tmp_path):
+    writer = ZoneArchive(tmp_path, 'SE1')
+    reader = ZoneArchive(tmp_path, 'SE1')
+    writer.append_day(START, _series(START, 'SE1'))
+    assert len(reader.series(START)) == 96
+    with pytest.raises(ArchiveError):
+        writer.append_day(START, _series(START, 'SE1'))
+    writer.append_day(START + timedelta(days=1), _series(START + timedelta(days=1), 'SE1'))
+    assert reader.last_day() == START + timedelta(days=1)
+
+
+def test_interrupted_append_is_ignored_and_overwritten(tmp_path):
+    archive = ZoneArchive(tmp_path, 'SE2')
+    archive.append_day(START, _series(START, 'SE2'))
+    with open(archive.data_path, 'ab') as fh:
+        fh.write(b'\x01' * 100)  # records written, index never updated
+    assert len(ZoneArchive(tmp_path, 'SE2')) == 96
+    nxt = START + timedelta(days=1)
+    archive.append_day(nxt, _series(nxt, 'SE2'))
+    assert ZoneArchive(tmp_path, 'SE2').series(nxt).to_payload() == generate_day(nxt, 'SE2')
+
+
+def test_converter_and_series_between_read_the_archive(tmp_path, monkeypatch):
+    cache = PriceCache(tmp_path / ElpriserService.CACHE_DIRNAME)
+    for i in range(3):
+        d = START + timedelta(days=i)
+        cache.put(PriceCache.make_key(d.year, d.month, d.day, 'SE3'), generate_day(d, 'SE3'))
+    extra = tmp_path / 'payloads' / '2025'
+    extra.mkdir(parents=True)
+    d = START + timedelta(days=3)
+    (extra / f"{d:%m-%d}_SE3.json").write_text(json.dumps(generate_day(d, 'SE3')))
+
+    monkeypatch.setattr(sys, 'argv', ['build_price_archive', '--project-root', str(tmp_path), str(tmp_path / 'payloads')])
+    assert build_price_archive.main() == 0
+    # a second run has nothing new to append
+    assert build_price_archive.main() == 0
+
+    series = ElpriserService.series_between(tmp_path, 'SE3', START, d, fetch=False)
+    archive = ElpriserService.archive_for(tmp_path).zone('SE3')
+    assert np.shares_memory(series.start, archive._map()[0])
+    assert len(series) == 96 * 2 + 100 + 96
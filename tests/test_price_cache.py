@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import multiprocessing
+from datetime import date
+
+import pytest
+from flask import Flask
+
+from application.endpoints import ElpriserAPI as ElpriserEndpoint
+from application.services.price_cache import PriceCache
+from application.services.elpriser_service import ElpriserService
+from application import elpriser_api
+from tools.fake_elpriser_server import generate_day
+
+
+PAYLOAD = [
+    {"SEK_per_kWh": 0.5, "EUR_per_kWh": 0.05, "EXR": 10.0,
+     "time_start": "2025-10-31T00:00:00+01:00", "time_end": "2025-10-31T00:15:00+01:00"},
+    {"SEK_per_kWh": 0.75, "EUR_per_kWh": 0.07, "EXR": 10.0,
+     "time_start": "2025-10-31T00:15:00+01:00", "time_end": "2025-10-31T00:30:00+01:00"},
+]
+
+
+def test_put_and_get_roundtrip(tmp_path):
+    cache = PriceCache(tmp_path / 'cache')
+    key = PriceCache.make_key('2025', '10', '31', 'se3')
+    assert key == '2025-10-31_SE3'
+    assert cache.get(key) is None
+
+    digest = cache.put(key, PAYLOAD)
+    assert (tmp_path / 'cache' / 'objects' / f'{digest}.json.gz').exists()
+    assert cache.get(key) == PAYLOAD
+    # a fresh instance reads the persisted index
+    assert PriceCache(tmp_path / 'cache').get(key) == PAYLOAD
+
+
+def test_identical_payloads_share_one_object(tmp_path):
+    cache = PriceCache(tmp_path / 'cache')
+    d1 = cache.put('2025-10-31_SE3', PAYLOAD)
+    d2 = cache.put('2025-10-31_SE4', PAYLOAD)
+    assert d1 == d2
+    assert len(list((tmp_path / 'cache' / 'objects').iterdir())) == 1
+    assert sorted(cache.keys()) == ['2025-10-31_SE3', '2025-10-31_SE4']
+
+
+def _put_many(root, zone, n):
+    cache = PriceCache(root)
+    for i in range(n):
+        cache.put(f"2025-01-{i + 1:02d}_{zone}", PAYLOAD)
+
+
+def test_processes_do_not_lose_index_entries(tmp_path):
+    ctx = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    procs = [ctx.Process(target=_put_many, args=(tmp_path / 'cache', zone, 20)) for zone in ('SE1', 'SE2', 'SE3')]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert len(PriceCache(tmp_path / 'cache').keys()) == 60
+
+
+def test_is_complete_day():
+    day = generate_day(date(2025, 10, 31), 'SE3')
+    assert PriceCache.is_complete_day('2025-10-31_SE3', day)
+    # DST ends: 25 hours, 100 slots
+    assert PriceCache.is_complete_day('2025-10-26_SE3', generate_day(date(2025, 10, 26), 'SE3'))
+    assert not PriceCache.is_complete_day('2025-11-01_SE3', day)
+    assert not PriceCache.is_complete_day('2025-10-31_SE3', day[:-1])
+    assert not PriceCache.is_complete_day('2025-10-31_SE3', day[:10] + day[11:])
+    assert not PriceCache.is_complete_day('2025-10-31_SE3', [dict(day[0], SEK_per_kWh=None)] + day[1:])
+    assert not PriceCache.is_complete_day('2025-10-31_SE3', PAYLOAD)
+    assert not PriceCache.is_complete_day('2025-10-31_SE3', {'error': 'not found'})
+
+
+def test_get_prices_only_fetches_once(tmp_path, monkeypatch):
+    calls = []
+    payload = generate_day(date(2025, 10, 31), 'SE3')
+
+    def fake_fetch(self):
+        calls.append(self.get_url())
+        return payload
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    first = ElpriserService.get_prices(tmp_path, 2025, 10, 31, 'SE3')
+    second = ElpriserService.get_prices(tmp_path, '2025', '10', '31', 'SE3')
+    assert first == second == payload
+    assert len(calls) == 1
+    assert ElpriserService.load_cached(tmp_path, 2025, 10, 31, 'SE3') == payload
+    assert ElpriserService.load_cached(tmp_path, 2025, 10, 31, 'SE1') is None
+
+
+def test_incomplete_day_is_served_but_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', lambda self: PAYLOAD)
+    assert ElpriserService.get_prices(tmp_path, 2025, 10, 31, 'SE3') == PAYLOAD
+    assert ElpriserService.cache_for(tmp_path).keys() == []
+
+
+def test_failed_fetch_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', lambda self: None)
+    assert ElpriserService.get_prices(tmp_path, 2025, 10, 31, 'SE3') is None
+    assert ElpriserService.cache_for(tmp_path).keys() == []
+
+
+def test_fetch_elpriser_rejects_invalid_date():
+    app = Flask(__name__)
+    app.add_url_rule('/fetch_elpriser', view_func=ElpriserEndpoint.as_view('fetch_elpriser'))
+    resp = app.test_client().get('/fetch_elpriser?year=2025&month=13&day=01&prisklass=SE3')
+    assert resp.status_code == 422
+    assert resp.get_json()['error'] == 'Invalid date'
@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from application.services.price_series import PriceSeries
+from application.services.elpriser_service import ElpriserService
+from tools.fake_elpriser_server import generate_day
+
+
+@pytest.fixture
+def payload():
+    with (PROJECT_ROOT / 'elpriser_data.json').open(encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def test_roundtrip_to_payload_is_exact(payload):
+    series = PriceSeries.from_payload(payload, zone='SE3')
+    assert len(series) == 96
+    assert series.to_payload() == payload
+    assert PriceSeries.from_dict(json.loads(series.to_json())).to_payload() == payload
+
+
+def test_roundtrip_on_dst_day():
+    dst = generate_day(date(2025, 10, 26), 'SE4')
+    assert PriceSeries.from_payload(dst).to_payload() == dst
+
+
+def test_slicing_is_zero_copy(payload):
+    series = PriceSeries.from_payload(payload)
+    part = series[8:12]
+    assert len(part) == 4
+    assert np.shares_memory(part.sek, series.sek)
+    assert part.labels() == ['02:00', '02:15', '02:30', '02:45']
+    t0 = int(datetime.fromisoformat('2025-10-31T10:00:00+01:00').timestamp())
+    window = series.between(t0, t0 + 3600)
+    assert window.labels() == ['10:00', '10:15', '10:30', '10:45']
+
+
+def test_slot_lookup_by_timestamp(payload):
+    series = PriceSeries.from_payload(payload)
+    ts = int(datetime.fromisoformat('2025-10-31T10:00:00+01:00').timestamp())
+    assert series.index_of(ts) == 40
+    assert series.at(ts) == payload[40]
+    assert series.index_of(ts + 60) is None
+    # irregular spacing falls back to a lazily built index
+    irregular = PriceSeries.concat([series[0:2], series[10:12]])
+    assert irregular.index_of(int(series.start[11])) == 3
+
+
+def test_parse_series_matches_parse_raw_payload(payload):
+    payload = payload + [dict(payload[0], SEK_per_kWh=0.0)]
+    series = PriceSeries.from_payload(payload)
+    assert ElpriserService.parse_series(series) == ElpriserService.parse_raw_payload(payload)
+
+
+def test_series_is_much_smaller_than_list_of_dicts(payload):
+    series = PriceSeries.from_payload(payload)
+    # dict + value objects per slot (keys are interned and shared)
+    as_dicts = sys.getsizeof(payload) + sum(
+        sys.getsizeof(item) + sum(sys.getsizeof(v) for v in item.values()) for item in payload)
+    assert series.nbytes * 8 < as_dicts
+
+
+def test_empty_series_serializes():
+    empty = PriceSeries.empty('SE3')
+    assert empty.to_payload() == [] and empty.labels() == []
+    assert PriceSeries.from_dict(json.loads(empty.to_json())).to_payload() == []
+
+
+def test_missing_eur_and_exr_become_null(payload):
+    series = PriceSeries.from_payload([{k: v for k, v in slot.items() if k not in ('EUR_per_kWh', 'EXR')}
+                                       for slot in payload[:2]])
+    rows = json.loads(json.dumps(series.to_payload(), allow_nan=False))
+    assert rows[0]['EUR_per_kWh'] is None and rows[0]['EXR'] is None
+    data = json.loads(series.to_json())
+    assert data['EXR'] == [None, None]
+    assert np.isnan(PriceSeries.from_dict(data).eur).all()
+
+
+def test_end_offset_before_a_gap_across_dst():
+    # the last slot of Oct 25 ends in summer time even though the next slot shown is in winter time
+    before, after = generate_day(date(2025, 10, 25), 'SE3'), generate_day(date(2025, 10, 27), 'SE3')
+    series = PriceSeries.concat([PriceSeries.from_payload(before), PriceSeries.from_payload(after)])
+    assert series.to_payload() == before + after
+    assert series[95:96].to_payload() == before[95:]
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from application import elpriser_api
+from application.services.elpriser_service import ElpriserService
+from application.services.price_series import PriceSeries
+from application.services.price_store import PriceStore, day_bounds
+from tools.fake_elpriser_server import generate_day
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(create_engine(f"sqlite:///{tmp_path / 'prices.db'}")).create()
+
+
+def _day(d, zone='SE3'):
+    return generate_day(d, zone)
+
+
+def test_upsert_and_range_roundtrip(store):
+    days = [date(2025, 10, 25), date(2025, 10, 26), date(2025, 10, 27)]
+    payload = [slot for d in days for slot in _day(d)]
+    assert store.upsert_series(PriceSeries.from_payload(payload, zone='SE3')) == len(payload)
+    # other zones don't leak into the range
+    store.upsert_series(PriceSeries.from_payload(_day(days[1], 'SE4'), zone='SE4'))
+
+    assert store.series_for_days('SE3', days[0], days[-1]).to_payload() == payload
+    dst_day = store.series_for_days('SE3', days[1])
+    assert len(dst_day) == 100
+    assert dst_day.to_payload() == _day(days[1])
+    assert len(store.series_for_days('SE3', date(2025, 11, 1))) == 0
+
+
+def test_upsert_overwrites_existing_slots(store):
+    d = date(2025, 10, 1)
+    store.upsert_series(PriceSeries.from_payload(_day(d), zone='SE3'))
+    changed = _day(d)
+    changed[5]['SEK_per_kWh'] = 9.99
+    store.upsert_series(PriceSeries.from_payload(changed, zone='SE3'))
+    series = store.series(*(('SE3',) + day_bounds(d)))
+    assert len(series) == 96
+    assert series.sek[5] == 9.99
+
+
+def test_year_of_history_is_one_range_scan(store):
+    start = date(2025, 1, 1)
+    parts = [PriceSeries.from_payload(_day(start + timedelta(days=i)), zone='SE3') for i in range(365)]
+    store.upsert_series(PriceSeries.concat(parts))
+    series = store.series_for_days('SE3', start, date(2025, 12, 31))
+    assert len(series) == sum(len(p) for p in parts)
+    assert (np.diff(series.start) > 0).all()
+
+
+def test_get_day_ingests_and_then_reads_the_table(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_fetch(self):
+        calls.append(self.day)
+        return generate_day(date(int(self.year), int(self.month), int(self.day)), self.prisklass)
+
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', fake_fetch)
+    first = ElpriserService.get_day(tmp_path, '2025', '10', '01', 'SE3')
+    assert calls == ['01']
+    stored = ElpriserService.stored_series(tmp_path, 'SE3', date(2025, 10, 1))
+    assert len(stored) == 96
+
+    again = ElpriserService.get_day(tmp_path, '2025', '10', '01', 'SE3')
+    assert again[1:] == first[1:]
+    assert calls == ['01']
+
+
+def test_get_day_ingests_cached_days_once_and_memoizes_the_stored_parse(tmp_path, monkeypatch):
+    d = date(2025, 10, 2)
+    ElpriserService.cache_for(tmp_path).put('2025-10-02_SE3', _day(d))
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices', lambda self: pytest.fail('fetched upstream'))
+    upserts = []
+    original = PriceStore.upsert_series
+    monkeypatch.setattr(PriceStore, 'upsert_series', lambda self, s, zone=None: upserts.append(len(s)) or original(self, s, zone))
+    parses = []
+    parse_series = ElpriserService.parse_series.__func__
+    monkeypatch.setattr(ElpriserService, 'parse_series',
+                        classmethod(lambda cls, s: parses.append(len(s)) or parse_series(cls, s)))
+
+    first = ElpriserService.get_day(tmp_path, '2025', '10', '02', 'SE3')
+    assert upserts == [96]
+    assert len(ElpriserService.stored_series(tmp_path, 'SE3', d)) == 96
+    parses.clear()
+    second = ElpriserService.get_day(tmp_path, '2025', '10', '02', 'SE3')
+    third = ElpriserService.get_day(tmp_path, '2025', '10', '02', 'SE3')
+    assert second[1:] == first[1:] and third is second
+    assert len(parses) <= 1 and upserts == [96]
+
+
+def test_get_day_upserts_a_download_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(elpriser_api.ElpriserAPI, 'fetch_prices',
+                        lambda self: _day(date(int(self.year), int(self.month), int(self.day))))
+    upserts = []
+    original = PriceStore.upsert_series
+    monkeypatch.setattr(PriceStore, 'upsert_series', lambda self, s, zone=None: upserts.append(len(s)) or original(self, s, zone))
+    ElpriserService.get_day(tmp_path, '2025', '10', '03', 'SE3')
+    assert upserts == [96]
+
+
+def test_range_view_falls_back_to_the_cache_and_404s_when_empty(tmp_path):
+    from flask import Flask
+    from application.endpoints import ElpriserDataView
+
+    ElpriserService.cache_for(tmp_path).put('2025-10-25_SE3', _day(date(2025, 10, 25)))
+    app = Flask(__name__)
+    app.config['PROJECT_ROOT'] = tmp_path
+    app.add_url_rule('/elpriser_data.json', view_func=ElpriserDataView.as_view('data'))
+    client = app.test_client()
+    resp = client.get('/elpriser_data.json?prisklass=SE3&from=2025-10-25&to=2025-10-26')
+    assert resp.status_code == 200 and resp.get_json() == _day(date(2025, 10, 25))
+    assert client.get('/elpriser_data.json?prisklass=SE3&from=2025-10-27&to=2025-10-28').status_code == 404
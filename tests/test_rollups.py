@@ -0,0 +1,128 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from application.services.elpriser_service import ElpriserService
+from application.services.price_cache import PriceCache
+from application.services.price_series import PriceSeries
+from application.services.rollups import RollupStore, aggregate, resample
+from tools.fake_elpriser_server import generate_day
+
+
+def test_aggregate_matches_numpy_per_group():
+    rng = np.random.default_rng(7)
+    keys = rng.integers(0, 20, size=500)
+    values = rng.normal(80, 30, size=500)
+    uniq, first, counts, stats = aggregate(keys, values)
+    for i, k in enumerate(uniq):
+        group = values[keys == k]
+        assert counts[i] == group.size
+        assert first[i] == np.flatnonzero(keys == k)[0]
+        assert np.isclose(stats['mean'][i], group.mean())
+        assert np.isclose(stats['median'][i], np.median(group))
+        assert np.isclose(stats['p10'][i], np.percentile(group, 10))
+        assert np.isclose(stats['p90'][i], np.percentile(group, 90))
+        assert np.isclose(stats['std'][i], group.std())
+        assert stats['min'][i] == group.min() and stats['max'][i] == group.max()
+
+
+def test_resample_follows_local_time_across_dst():
+    # 2025-10-26: clocks go back, so the day has 100 quarter-hours
+    series = PriceSeries.from_payload(generate_day(date(2025, 10, 26), 'SE3'))
+    daily = resample(series, 'day')
+    assert [(r['period'], r['slots']) for r in daily] == [('2025-10-26', 100)]
+    assert daily[0]['mean'] == round(float(np.mean(series.sek * 100)), 2)
+
+    hourly = resample(series, 'hour')
+    assert len(hourly) == 25
+    assert {r['slots'] for r in hourly} == {4}
+    assert hourly[0]['period'] == '2025-10-26T00:00:00+02:00'
+    assert hourly[-1]['period'] == '2025-10-26T23:00:00+01:00'
+
+    assert resample(series, 'week')[0]['period'] == '2025-10-20'
+    assert resample(series, 'month')[0]['period'] == '2025-10'
+
+
+def _fill(cache, days, zone='SE3', scale=1.0):
+    for d in days:
+        payload = generate_day(d, zone)
+        for slot in payload:
+            slot['SEK_per_kWh'] = round(slot['SEK_per_kWh'] * scale, 5)
+        cache.put(PriceCache.make_key(d.year, d.month, d.day, zone), payload)
+
+
+def test_rollup_store_is_incremental_and_persisted(tmp_path):
+    cache = PriceCache(tmp_path)
+    days = [date(2025, 9, 30), date(2025, 10, 1), date(2025, 10, 2)]
+    _fill(cache, days)
+    loads = []
+
+    def load_series(digest, zone):
+        loads.append(digest)
+        return PriceSeries.from_payload(cache.load(digest), zone=zone)
+
+    store = RollupStore(cache, load_series=load_series)
+    rows = store.daily('SE3', '2025-09-01', '2025-10-31')
+    assert [r['period'] for r in rows] == ['2025-09-30', '2025-10-01', '2025-10-02']
+    assert 'sha256' not in rows[0]
+    months = store.monthly('SE3', '2025-09', '2025-10')
+    assert [(m['period'], m['slots']) for m in months] == [('2025-09', 96), ('2025-10', 192)]
+
+    # a fresh store (new process) reads the persisted rows without parsing
+    loads.clear()
+    again = RollupStore(cache, load_series=load_series)
+    assert again.daily('SE3', '2025-09-01', '2025-10-31') == rows
+    assert again.monthly('SE3', '2025-09', '2025-10') == months
+    assert loads == []
+
+    # a new day only recomputes that day and its month
+    _fill(cache, [date(2025, 10, 3)])
+    again.add_day('2025-10-03_SE3')
+    months = again.monthly('SE3', '2025-09', '2025-10')
+    assert [m['slots'] for m in months] == [96, 288]
+    assert len(loads) == 1 + 3
+
+    # a changed payload for a day replaces its rollups
+    _fill(cache, [date(2025, 10, 1)], scale=2.0)
+    row = again.daily('SE3', '2025-10-01', '2025-10-01')[0]
+    assert row['max'] > rows[1]['max']
+
+
+@pytest.fixture
+def rollups_client(tmp_path):
+    from flask import Flask
+    from application.endpoints import RollupsAPI
+
+    cache = PriceCache(tmp_path / ElpriserService.CACHE_DIRNAME)
+    for d in (date(2025, 10, 1), date(2025, 10, 2)):
+        cache.put(PriceCache.make_key(d.year, d.month, d.day, 'SE3'), generate_day(d, 'SE3'))
+    app = Flask(__name__)
+    app.config['PROJECT_ROOT'] = tmp_path
+    app.add_url_rule('/api/rollups', view_func=RollupsAPI.as_view('rollups'))
+    return app.test_client()
+
+
+def test_rollups_endpoint(rollups_client):
+    resp = rollups_client.get('/api/rollups?zone=se3&period=day&from=2025-10-01&to=2025-10-03')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['zone'] == 'SE3' and body['unit'] == 'öre/kWh'
+    assert [r['period'] for r in body['rows']] == ['2025-10-01', '2025-10-02']
+
+
+@pytest.mark.parametrize('query, error', [
+    ('zone=SE9', 'Invalid zone'),
+    ('period=fortnight', "Unknown period 'fortnight'"),
+    ('from=2025-10-03&to=2025-10-01', 'from must not be after to'),
+    ('from=yesterday', 'from must be a date (YYYY-MM-DD)'),
+])
+def test_rollups_endpoint_rejects_bad_input(rollups_client, query, error):
+    resp = rollups_client.get('/api/rollups?' + query)
+    assert resp.status_code == 422
+    assert resp.get_json()['error'].startswith(error)
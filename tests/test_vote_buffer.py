@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from application import models
+from application.services.annotations_service import AnnotationsService
+from application.services.vote_buffer import VoteBuffer
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'votes.db'}")
+    models.Base.metadata.create_all(engine)
+    previous = models.SessionLocal.kw['bind']
+    models.remove_session()
+    models.SessionLocal.configure(bind=engine)
+    yield engine
+    models.remove_session()
+    models.SessionLocal.configure(bind=previous)
+    engine.dispose()
+
+
+def _stored(engine, ann_id):
+    with engine.connect() as conn:
+        return tuple(conn.execute(text('SELECT likes, dislikes, status FROM annotations WHERE id = :id'),
+                                  {'id': ann_id}).one())
+
+
+def test_buffered_votes_are_merged_into_reads_and_flushed_in_one_batch(tmp_path, engine):
+    svc = AnnotationsService(tmp_path, use_db=True)
+    buffer = svc.enable_vote_buffer(interval_ms=60_000, max_votes=1000)
+    try:
+        a = svc.create('2025-10-01', 'SE3', 'a')
+        b = svc.create('2025-10-01', 'SE4', 'b')
+        for _ in range(4):
+            svc.vote(a['id'], 'like')
+        voted = [svc.vote(b['id'], 'dislike') for _ in range(3)][-1]
+        assert (voted['dislikes'], voted['status']) == (3, 'warning')
+        assert svc.vote('missing', 'like') is None
+
+        # nothing written yet, but reads include the pending votes
+        assert _stored(engine, a['id']) == (0, 0, 'active')
+        listed = {x['id']: x for x in svc.list(date='2025-10-01')}
+        assert listed[a['id']]['likes'] == 4 and listed[b['id']]['status'] == 'warning'
+
+        assert buffer.flush() == 7
+        assert buffer.flushes == 1 and len(buffer) == 0
+        assert _stored(engine, a['id']) == (4, 0, 'active')
+        assert _stored(engine, b['id']) == (0, 3, 'warning')
+    finally:
+        buffer.stop()
+
+
+def test_moderation_flushes_pending_votes_first(tmp_path, engine):
+    svc = AnnotationsService(tmp_path, use_db=True)
+    buffer = svc.enable_vote_buffer(interval_ms=60_000)
+    try:
+        ann = svc.create('2025-10-01', 'SE3', 'hello')
+        svc.vote(ann['id'], 'dislike')
+        assert svc.moderate(ann['id'], 'remove')['status'] == 'removed'
+        assert _stored(engine, ann['id']) == (0, 1, 'removed')
+    finally:
+        buffer.stop()
+
+
+def test_flush_on_count_and_on_stop(tmp_path, engine):
+    svc = AnnotationsService(tmp_path, use_db=True)
+    buffer = svc.enable_vote_buffer(interval_ms=60_000, max_votes=5)
+    ann = svc.create('2025-10-01', 'SE3', 'hello')
+    for _ in range(5):
+        svc.vote(ann['id'], 'like')
+    deadline = time.time() + 5
+    while buffer.flushed_votes < 5 and time.time() < deadline:
+        time.sleep(0.01)
+    assert _stored(engine, ann['id'])[0] == 5
+
+    svc.vote(ann['id'], 'like')
+    buffer.stop(timeout=5)
+    assert _stored(engine, ann['id'])[0] == 6
+
+
+def test_failed_flush_keeps_the_votes():
+    calls = []
+
+    def flaky(deltas):
+        calls.append(dict(deltas))
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+
+    buffer = VoteBuffer(flaky)
+    buffer.add('a', 'like')
+    buffer.add('a', 'dislike')
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    buffer.add('a', 'like')
+    assert buffer.pending('a') == (2, 1) and len(buffer) == 3
+    assert buffer.flush() == 3
+    assert calls[-1] == {'a': [2, 1]}
@@ -0,0 +1,161 @@
+"""Convert cached JSON price payloads into the memory-mapped price archive.
+
+Reads every payload in the price cache (``price_cache/``) plus any JSON
+files given on the command line, and appends the days that are newer than
+what the archive already holds (see application/services/price_archive.py).
+Run it again later to append new days; ``--rebuild`` writes a fresh archive
+and swaps it in when done.
+
+    python -m tools.build_price_archive
+    python -m tools.build_price_archive --rebuild
+    python -m tools.build_price_archive payloads/2024/ elpriser_data.json --zone SE3
+
+Extra files are matched by name (``YYYY-MM-DD_SE3.json``, or the upstream
+layout ``YYYY/MM-DD_SE3.json``); ``--zone`` covers files without a zone in
+their name, whose date is taken from the first slot.
+"""
+import argparse
+import json
+import re
+import shutil
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from application.services.elpriser_service import ElpriserService
+from application.services.price_archive import ArchiveError, PriceArchive
+from application.services.price_cache import PriceCache
+from application.services.price_series import PriceSeries
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# YYYY-MM-DD_SE3.json or the upstream YYYY/MM-DD_SE3.json
+NAME_RE = re.compile(r'(\d{4})[-/](\d{2})-(\d{2})_(SE[1-4])\.json$')
+
+
+def _day_from_name(path: Path):
+    """Return (date, zone) from a payload file name, or (None, None)."""
+    match = NAME_RE.search(path.as_posix())
+    if not match:
+        return None, None
+    year, month, day, zone = match.groups()
+    try:
+        return date(int(year), int(month), int(day)), zone
+    except ValueError:
+        return None, None
+
+
+def _read_json(path: Path):
+    try:
+        with path.open('r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        print(f"skipping {path}: not readable JSON", file=sys.stderr)
+        return None
+
+
+def collect_cache(project_root: Path):
+    """Yield (day, zone, load) for every payload in the price cache; load() reads it."""
+    cache = PriceCache(project_root / ElpriserService.CACHE_DIRNAME)
+    for key, entry in sorted(cache.entries().items()):
+        day, zone = key.rsplit('_', 1)
+        yield date.fromisoformat(day), zone, (lambda digest=entry['sha256']: cache.load(digest))
+
+
+def collect_files(paths, default_zone=None):
+    """Yield (day, zone, load) for JSON payload files (directories are searched)."""
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*.json')) if path.is_dir() else [path]
+        for f in files:
+            day, zone = _day_from_name(f)
+            if day is not None:
+                yield day, zone, (lambda f=f: _read_json(f))
+                continue
+            # no date in the name: take it from the first slot
+            payload = _read_json(f)
+            if payload is None:
+                continue
+            if isinstance(payload, list) and payload and isinstance(payload[0], dict):
+                try:
+                    day = date.fromisoformat(str(payload[0].get('time_start', ''))[:10])
+                except ValueError:
+                    day = None
+            if day is None or default_zone is None:
+                print(f"skipping {f}: can't tell its date and zone (use --zone)", file=sys.stderr)
+                continue
+            yield day, default_zone.upper(), (lambda payload=payload: payload)
+
+
+def build(archive: PriceArchive, sources):
+    """Append every day newer than the archive's last day per zone; return counts.
+
+    Payloads are loaded one day at a time while appending, so memory use
+    doesn't grow with the size of the history.
+    """
+    by_zone = defaultdict(dict)
+    for day, zone, load in sources:
+        # later sources win, so files given on the command line override the cache
+        by_zone[zone][day] = load
+    stats = {'days': 0, 'slots': 0, 'skipped': 0, 'invalid': 0}
+    for zone in sorted(by_zone):
+        target = archive.zone(zone)
+        last = target.last_day()
+        for day in sorted(by_zone[zone]):
+            if last is not None and day <= last:
+                stats['skipped'] += 1
+                continue
+            try:
+                series = PriceSeries.from_payload(by_zone[zone][day]() or [], zone=zone)
+            except ValueError:
+                stats['invalid'] += 1
+                continue
+            if not len(series):
+                stats['invalid'] += 1
+                continue
+            stats['slots'] += target.append_day(day, series)
+            stats['days'] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*', help='extra JSON payload files or directories')
+    parser.add_argument('--project-root', type=Path, default=PROJECT_ROOT)
+    parser.add_argument('--zone', help='zone for files whose name has none')
+    parser.add_argument('--no-cache', action='store_true', help="don't read the price cache")
+    parser.add_argument('--rebuild', action='store_true', help='build a fresh archive and replace the old one')
+    args = parser.parse_args()
+
+    target = args.project_root / ElpriserService.ARCHIVE_DIRNAME
+    root = target.with_name(target.name + '.new') if args.rebuild else target
+    if args.rebuild and root.exists():
+        shutil.rmtree(root)
+
+    sources = []
+    if not args.no_cache:
+        sources.append(collect_cache(args.project_root))
+    sources.append(collect_files(args.files, default_zone=args.zone))
+
+    t0 = time.perf_counter()
+    try:
+        stats = build(PriceArchive(root), (item for source in sources for item in source))
+    except ArchiveError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    if args.rebuild:
+        old = target.with_name(target.name + '.old')
+        if target.exists():
+            target.rename(old)
+        root.rename(target)
+        shutil.rmtree(old, ignore_errors=True)
+    print(f"appended {stats['days']} days ({stats['slots']} slots) in {time.perf_counter() - t0:.2f} s; "
+          f"{stats['skipped']} already archived, {stats['invalid']} not in the upstream shape")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
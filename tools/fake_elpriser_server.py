@@ -0,0 +1,146 @@
+"""Local stand-in for the elprisetjustnu.se price API.
+
+Serves ``/api/v1/prices/<YYYY>/<MM>-<DD>_<SEx>.json`` with 96 quarter-hour
+slots in the same shape as ``elpriser_data.json``. Prices are generated
+deterministically per (date, zone) with a morning and an evening peak, so
+repeated runs see the same data. Dates after tomorrow return 404 just like
+the real API before publication.
+
+Run it and point the app at it:
+
+    python -m tools.fake_elpriser_server --port 8001 --latency 0.05 --error-rate 0.02
+    ELPRISER_API_BASE_URL=http://127.0.0.1:8001/api/v1/prices python -c "from application.app import FlaskApp; FlaskApp().run()"
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+STOCKHOLM = ZoneInfo('Europe/Stockholm')
+PATH_RE = re.compile(r'^/api/v1/prices/(\d{4})/(\d{2})-(\d{2})_(SE[1-4])\.json$')
+# SE1 (north) is usually cheapest, SE4 (south) the most expensive
+ZONE_LEVEL = {'SE1': 0.35, 'SE2': 0.4, 'SE3': 0.8, 'SE4': 1.1}
+
+
+def generate_day(day: date, zone: str):
+    """Return the 96-slot payload for ``day`` in ``zone`` (92/100 slots on DST days)."""
+    rng = random.Random(f"{day.isoformat()}_{zone}")
+    exr = round(10.8 + rng.uniform(-0.3, 0.3), 6)
+    level = ZONE_LEVEL[zone] * rng.uniform(0.5, 1.6)
+    start = datetime(day.year, day.month, day.day, tzinfo=STOCKHOLM)
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=STOCKHOLM)
+    slots = []
+    t = start
+    while t < end:
+        # step in UTC so DST changes give 92/100 slots, like the real feed
+        t_next = (t.astimezone(ZoneInfo('UTC')) + timedelta(minutes=15)).astimezone(STOCKHOLM)
+        hour = t.hour + t.minute / 60.0
+        shape = (0.55
+                 + 0.45 * math.exp(-((hour - 8.0) ** 2) / 4.0)
+                 + 0.6 * math.exp(-((hour - 18.5) ** 2) / 5.0))
+        sek = max(0.0, level * shape + rng.gauss(0, 0.05 * level))
+        slots.append({
+            'SEK_per_kWh': round(sek, 5),
+            'EUR_per_kWh': round(sek / exr, 5),
+            'EXR': exr,
+            'time_start': t.isoformat(),
+            'time_end': t_next.isoformat(),
+        })
+        t = t_next
+    return slots
+
+
+class FakeElpriserServer(ThreadingHTTPServer):
+    """Threaded HTTP server with configurable latency and error injection."""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, jitter=0.0, error_rate=0.0, today=None):
+        super().__init__(address, FakeElpriserHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.today = today
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v1/prices"
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+class FakeElpriserHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.count()
+        delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send(500, {'error': 'injected failure'})
+
+        match = PATH_RE.match(self.path.split('?', 1)[0])
+        if not match:
+            return self._send(404, {'error': 'not found'})
+        year, month, day, zone = match.groups()
+        try:
+            d = date(int(year), int(month), int(day))
+        except ValueError:
+            return self._send(404, {'error': 'not found'})
+        today = server.today or date.today()
+        if d > today + timedelta(days=1):
+            return self._send(404, {'error': 'not published'})
+        return self._send(200, generate_day(d, zone))
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(host='127.0.0.1', port=0, **kwargs):
+    """Start a FakeElpriserServer in a daemon thread and return it."""
+    server = FakeElpriserServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, name='fake-elpriser', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the elprisetjustnu.se API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='fixed delay per request (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    args = parser.parse_args()
+
+    server = FakeElpriserServer((args.host, args.port), latency=args.latency,
+                                jitter=args.jitter, error_rate=args.error_rate)
+    print(f"Serving fake elpriser API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
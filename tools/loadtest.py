@@ -0,0 +1,155 @@
+"""Load generator for the Flask app.
+
+Drives ``/fetch_elpriser``, ``/elpriser`` and ``/pandas`` with N concurrent
+clients and reports throughput and p50/p95/p99 latency per route.
+
+Without ``--url`` the app is started in-process against the local fake price
+server (tools/fake_elpriser_server.py), so no internet access is needed:
+
+    python -m tools.loadtest --clients 16 --duration 20 --upstream-latency 0.05
+    python -m tools.loadtest --url http://127.0.0.1:5000 --routes fetch_elpriser,elpriser
+"""
+import argparse
+import atexit
+import logging
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tools.fake_elpriser_server import start_server
+
+ZONES = ('SE1', 'SE2', 'SE3', 'SE4')
+
+
+def _random_day(days):
+    d = date.today() - timedelta(days=random.randrange(days))
+    return d.year, f"{d.month:02d}", f"{d.day:02d}"
+
+
+def build_request(route, days):
+    """Return the path (with query string) for one request to ``route``."""
+    if route == 'pandas':
+        return '/pandas'
+    year, month, day = _random_day(days)
+    zone = random.choice(ZONES)
+    return f"/{route}?year={year}&month={month}&day={day}&prisklass={zone}"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def start_local_app(upstream_latency, upstream_error_rate):
+    """Start the fake upstream and the Flask app in this process; return the app's base URL.
+
+    The app runs on TestingConfig's in-memory database with a temporary
+    project root, so the fake prices never reach the project's price cache
+    or annotations.db. The temporary directory is removed at exit.
+    """
+    upstream = start_server(latency=upstream_latency, error_rate=upstream_error_rate)
+    project_root = Path(tempfile.mkdtemp(prefix='elpriser-loadtest-'))
+    atexit.register(shutil.rmtree, project_root, True)
+    # application.app builds its module-level app on import; keep that one off annotations.db too
+    os.environ['FLASK_ENV'] = 'testing'
+
+    from werkzeug.serving import make_server
+    from application.app import FlaskApp
+    from application.config import TestingConfig
+
+    class LoadTestConfig(TestingConfig):
+        TESTING = False
+        PROJECT_ROOT = project_root
+        ELPRISER_API_BASE_URL = upstream.base_url
+
+    app = FlaskApp(LoadTestConfig).app
+    app.logger.setLevel('WARNING')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-app', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def run(base_url, routes, clients, duration, days):
+    results = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local = defaultdict(list)
+        local_errors = defaultdict(int)
+        while time.perf_counter() < deadline:
+            route = random.choice(routes)
+            url = base_url + build_request(route, days)
+            t0 = time.perf_counter()
+            try:
+                status = session.get(url, timeout=60).status_code
+            except requests.RequestException:
+                status = None
+            local[route].append(time.perf_counter() - t0)
+            if status is None or status >= 500:
+                local_errors[route] += 1
+        with lock:
+            for route, samples in local.items():
+                results[route].extend(samples)
+            for route, n in local_errors.items():
+                errors[route] += n
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return results, errors, elapsed
+
+
+def report(results, errors, elapsed, clients):
+    print(f"{clients} clients, {elapsed:.1f} s")
+    print(f"{'route':<16}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    total = 0
+    for route in sorted(results):
+        samples = sorted(results[route])
+        total += len(samples)
+        print(f"{route:<16}{len(samples):>9}{errors.get(route, 0):>8}{len(samples) / elapsed:>9.1f}"
+              f"{percentile(samples, 50) * 1000:>9.1f}{percentile(samples, 95) * 1000:>9.1f}{percentile(samples, 99) * 1000:>9.1f}")
+    print(f"{'total':<16}{total:>9}{sum(errors.values()):>8}{total / elapsed:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Flask app')
+    parser.add_argument('--url', help='base URL of a running app; omit to start one in-process')
+    parser.add_argument('--routes', default='fetch_elpriser,elpriser,pandas')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds')
+    parser.add_argument('--days', type=int, default=30, help='pick dates from the last N days')
+    parser.add_argument('--upstream-latency', type=float, default=0.05)
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/') if args.url else start_local_app(args.upstream_latency, args.upstream_error_rate)
+    routes = [r.strip().lstrip('/') for r in args.routes.split(',') if r.strip()]
+    results, errors, elapsed = run(base_url, routes, args.clients, args.duration, args.days)
+    report(results, errors, elapsed, args.clients)
+
+
+if __name__ == '__main__':
+    main()